@@ -0,0 +1,228 @@
+# Benchmark reproducible del flujo completo sobre carpetas Docupen sintéticas.
+# Uso: python benchmarks/bench_flujo.py [escalas] [--semilla N] [--guardar-base NOMBRE] [--comparar NOMBRE] [--tolerancia 0.15]
+# Escalas por defecto: 1000,10000,100000 archivos (generador_docupen.py, misma semilla → mismo lote).
+# Mide cada etapa: parseo, hash, movimiento (archivado_auditable.procesar_archivos, el que
+# usa main.ejecutar_flujo_principal), movimiento_pipeline (archivado_automatico), historial,
+# resumen e inconsistencias (primera pasada y pasada incremental sobre carpetas sin cambios).
+# Cada etapa de disco trabaja sobre su propio lote (misma semilla, carpetas distintas) para
+# que ninguna caliente la caché de páginas de otra; en Linux con root además se vacía la
+# caché del sistema antes de cada una (queda anotado en "cache_so_vaciada").
+# --guardar-base escribe benchmarks/bases/NOMBRE.json; --comparar informa la variación
+# por etapa contra esa base y termina con código 1 si alguna empeora más que la tolerancia.
+
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+# Agregar la raíz del proyecto al path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from benchmarks.generador_docupen import generar_docupen
+from scripts import archivado_automatico, archivado_auditable, cache_hash, cache_directorios, hash_checker
+from scripts import parser_nombres, inconsistencias
+from scripts.config_loader import obtener_hilos_hash
+from scripts.motor_hash import hashear_en_paralelo
+from scripts.historial_archivo import actualizar_historial
+from scripts.generar_resumen_excel import generar_resumen
+from scripts.bitacora_movimientos import BitacoraMovimientos
+from scripts.registro_eventos import LogAuditoria
+from scripts.indice_merkle import IndiceMerkle
+
+CARPETA_BASES = ROOT_DIR / "benchmarks" / "bases"
+RUTA_CONFIG = str(ROOT_DIR / "config" / "config.ini")
+ESCALAS = [1000, 10_000, 100_000]
+SEMILLA = 42
+TOLERANCIA = 0.15  # empeoramiento relativo aceptado al comparar contra la base
+ETAPAS = ["parseo", "hash", "movimiento", "movimiento_pipeline", "historial", "resumen",
+          "inconsistencias", "inconsistencias_incremental"]
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def _limpiar_estado():
+    # Cachés en proceso: cada escala arranca como una ejecución nueva
+    for funcion in (parser_nombres.tokenizar, parser_nombres.subrol_de, parser_nombres.vista_auditoria):
+        funcion.cache_clear()
+    cache_hash._cache = None
+    cache_hash._modificada = False
+    for clave in cache_hash.estadisticas:
+        cache_hash.estadisticas[clave] = 0
+    cache_directorios._conocidos.clear()
+    cache_directorios._escaneados.clear()
+    archivado_auditable.hashes_existentes.clear()
+
+def _vaciar_cache_so():
+    """Descarta la caché de páginas (solo Linux y con permisos). Devuelve si pudo."""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+        return True
+    except OSError:
+        return False
+
+def _cronometrar(funcion):
+    inicio = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+def medir_escala(archivos, semilla=SEMILLA):
+    """Genera los lotes en una carpeta temporal y devuelve {"manifiesto", "etapas": {etapa: segundos}, "pipeline"}."""
+    _limpiar_estado()
+    with tempfile.TemporaryDirectory(prefix="bench_flujo_") as carpeta:
+        carpeta = Path(carpeta)
+        origen = carpeta / "Docupen"
+        lotes = {"hash": carpeta / "Docupen_hash", "pipeline": carpeta / "Docupen_pipeline"}
+        inicio = time.perf_counter()
+        manifiesto = generar_docupen(origen, archivos, semilla=semilla, ruta_cuentas=carpeta / "cuentas.xlsx")
+        for lote in lotes.values():
+            generar_docupen(lote, archivos, semilla=semilla)
+        print(f"🧪 {archivos} archivos x {len(lotes) + 1} lotes generados en {time.perf_counter() - inicio:.1f}s "
+              f"({manifiesto['bytes'] / 1024 / 1024:.1f} MiB por lote, {manifiesto['duplicados']} duplicados)")
+
+        archivado_auditable.RUTA_ENTRADA = str(origen)
+        archivado_auditable.RUTA_SALIDA = str(carpeta / "Legajos")
+        archivado_auditable.RUTA_CONFIG = RUTA_CONFIG
+        archivado_auditable.bitacora_movimientos = BitacoraMovimientos(str(carpeta / "movimientos_auditable.jsonl"))
+        archivado_auditable.log_auditoria = LogAuditoria(str(carpeta / "auditoria"))
+        archivado_auditable.indice_integridad = IndiceMerkle(str(carpeta / "Legajos"))
+
+        archivado_automatico.CARPETA_ORIGEN = lotes["pipeline"]
+        archivado_automatico.BASE_PATH = carpeta / "Legajos_pipeline"
+        archivado_automatico.EXCEL_CUENTAS = carpeta / "cuentas.xlsx"
+        archivado_automatico.RUTA_CONFIG = RUTA_CONFIG
+        archivado_automatico.RUTA_MOVIMIENTOS = str(carpeta / "movimientos.jsonl")
+        hash_checker.HASH_DB = str(carpeta / "hashes.db")
+        hash_checker.HASH_REGISTRO = str(carpeta / "hashes.json")
+        cache_hash.RUTA_CACHE = str(carpeta / "cache_hashes.json")
+        archivado_auditable.RUTA_ESTADO_INCONSISTENCIAS = str(carpeta / "estado_inconsistencias.json")
+
+        nombres = sorted(os.listdir(origen))
+        rutas = [str(lotes["hash"] / nombre) for nombre in nombres]
+        etapas = {}
+        cache_so_vaciada = True
+
+        etapas["parseo"], _ = _cronometrar(lambda: [parser_nombres.tokenizar(n) for n in nombres])
+        parser_nombres.tokenizar.cache_clear()
+        cache_so_vaciada &= _vaciar_cache_so()
+        etapas["hash"], _ = _cronometrar(
+            lambda: [f.result() for _, f in hashear_en_paralelo(rutas, obtener_hilos_hash(RUTA_CONFIG))])
+        cache_so_vaciada &= _vaciar_cache_so()
+        etapas["movimiento"], filas = _cronometrar(archivado_auditable.procesar_archivos)
+        parser_nombres.tokenizar.cache_clear()
+        cache_hash._cache = None
+        cache_directorios._conocidos.clear()
+        cache_directorios._escaneados.clear()
+        cache_so_vaciada &= _vaciar_cache_so()
+        etapas["movimiento_pipeline"], _ = _cronometrar(archivado_automatico.procesar_archivos)
+        etapas["historial"], _ = _cronometrar(
+            lambda: actualizar_historial(filas, str(carpeta / "historial_archivo.json")))
+        etapas["resumen"], _ = _cronometrar(lambda: generar_resumen(filas, str(carpeta / "resumen.xlsx")))
+
+        # hashes_existentes ya tiene lo que registró el flujo auditable
+        etapas["inconsistencias"], _ = _cronometrar(archivado_auditable.detectar_inconsistencias)
+        # Segunda pasada: las carpetas sin cambios no se vuelven a listar. Las carpetas
+        # recién escritas quedan dentro del margen de mtime; en una corrida nocturna no.
+        margen, inconsistencias.MARGEN_MTIME = inconsistencias.MARGEN_MTIME, 0
+        try:
+            etapas["inconsistencias_incremental"], _ = _cronometrar(archivado_auditable.detectar_inconsistencias)
+        finally:
+            inconsistencias.MARGEN_MTIME = margen
+
+        pipeline = archivado_automatico.metricas_pipeline
+        cache_hash._cache = None  # la caché temporal desaparece con la carpeta
+        for abierto in (archivado_auditable.bitacora_movimientos, archivado_auditable.log_auditoria,
+                        archivado_auditable.indice_integridad):
+            abierto.cerrar()
+
+    return {
+        "manifiesto": manifiesto,
+        "etapas": {etapa: round(segundos, 4) for etapa, segundos in etapas.items()},
+        "movidos": sum(1 for fila in filas if fila.get("destino")),
+        "cache_so_vaciada": cache_so_vaciada,
+        "pipeline": pipeline
+    }
+
+def comparar(actual, base, tolerancia=TOLERANCIA):
+    """Imprime la variación por etapa contra la base y devuelve las regresiones."""
+    regresiones = []
+    for escala, resultado in actual["escalas"].items():
+        anterior = base["escalas"].get(escala)
+        if anterior is None:
+            print(f"ℹ️ {escala}: sin datos en la base")
+            continue
+        for etapa in ETAPAS:
+            nuevo, viejo = resultado["etapas"].get(etapa), anterior["etapas"].get(etapa)
+            if nuevo is None or not viejo:
+                continue
+            variacion = (nuevo - viejo) / viejo
+            marca = "❌" if variacion > tolerancia else "✅"
+            print(f"{marca} {escala:>7} {etapa:<28} {viejo:9.3f}s → {nuevo:9.3f}s ({variacion:+.1%})")
+            if variacion > tolerancia:
+                regresiones.append((escala, etapa, variacion))
+    return regresiones
+
+def _argumento(argumentos, nombre, defecto=None):
+    if nombre in argumentos:
+        return argumentos[argumentos.index(nombre) + 1]
+    return defecto
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    escalas = ESCALAS
+    if argumentos and not argumentos[0].startswith("--"):
+        escalas = [int(x) for x in argumentos[0].split(",")]
+    semilla = int(_argumento(argumentos, "--semilla", SEMILLA))
+    guardar = _argumento(argumentos, "--guardar-base")
+    contra = _argumento(argumentos, "--comparar")
+    tolerancia = float(_argumento(argumentos, "--tolerancia", TOLERANCIA))
+
+    resultado = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "semilla": semilla,
+        "escalas": {}
+    }
+    print(f"📊 Benchmark del flujo: escalas {escalas}, semilla {semilla}\n")
+    for archivos in escalas:
+        medicion = medir_escala(archivos, semilla)
+        resultado["escalas"][str(archivos)] = medicion
+        for etapa in ETAPAS:
+            print(f"   {etapa:<28} {medicion['etapas'][etapa]:9.3f}s")
+        print(f"   movidos: {medicion['movidos']}\n")
+
+    if guardar:
+        CARPETA_BASES.mkdir(exist_ok=True)
+        ruta = CARPETA_BASES / f"{guardar}.json"
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"💾 Base guardada en {ruta}")
+
+    if contra:
+        with open(CARPETA_BASES / f"{contra}.json", "r", encoding="utf-8") as f:
+            base = json.load(f)
+        print(f"🔁 Comparación contra {contra} (commit {base.get('commit')}, tolerancia {tolerancia:.0%})")
+        regresiones = comparar(resultado, base, tolerancia)
+        if regresiones:
+            print(f"❌ {len(regresiones)} etapas empeoraron más de {tolerancia:.0%}")
+            sys.exit(1)
+        print("✅ Sin regresiones")
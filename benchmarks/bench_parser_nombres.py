@@ -0,0 +1,322 @@
+# Benchmark del parser de nombres: implementaciones anteriores vs. parser_nombres.
+# Uso: python benchmarks/bench_parser_nombres.py [repeticiones]
+# Verifica que cada vista devuelva lo mismo que el parser original sobre un corpus
+# de variantes reales de nombres y compara tiempos (memo frío y memo caliente).
+
+import io
+import os
+import re
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+# Agregar la raíz del proyecto al path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from scripts import parser_nombres
+from scripts.archivado_automatico import (
+    extraer_datos_desde_nombre, obtener_prefijo, extraer_anio, extraer_subrol_constancia
+)
+from scripts.archivado_auditable import extraer_datos
+from scripts.preprocesar_nombres import proponer_nombre_corregido
+from parser_flexible import extraer_datos_flexibles
+
+# --- Corpus: variantes de la convención que llegan desde Docupen ---
+CORPUS = [
+    "01. 14959 T. CAC 10-09-2025.pdf",
+    "01.14959 T. CAC 10-09-2025.pdf",
+    "01.-14959 C1. DNI 01-02-2024.pdf",
+    "03.- 20577 CUIT SOCIEDAD 31-12-2023.pdf",
+    "03. 20577 CUIT RL 15-06-2025.pdf",
+    "03. 20577 CUIT-BF MARIA 15-06-2025.pdf",
+    "03. 20577 CONSTANCIA BF 15-06-2025.pdf",
+    "08.- 3310 CUIT_RL REPRESENTANTE LEGAL.pdf",
+    "08. 3310 BENEFICIARIO FINAL 2025.pdf",
+    "14959 T. CAC 10-09-2025.pdf",
+    "14959 T CAC 10-09-2025.pdf",
+    "14959 C2. DNI REVERSO 32-13-2025.pdf",
+    "14959_T._CAC_10_09_2025.pdf",
+    "14959-C3.-DNI-10-09-2025.pdf",
+    "  01.   14959   T.   CAC   .pdf",
+    "01. 14959 T. CAC 10-09-2025.pdf.pdf",
+    "01. 14959 T. CAC 10-09-2025.PDF.pdf",
+    "12. 100200 C12. NOSIS 05/05/2025.pdf",
+    "13.-99999 PERFIL OI 2025.xlsx",
+    "05. 14959 CONST. AFIP 10-09-2025.pdf",
+    "CAC 14959 T. 10-09-2025.pdf",
+    "sin cuenta.pdf",
+    "01..pdf",
+    "01.",
+    "",
+    ".pdf",
+    "DNI.pdf",
+    "99. 14959 T. CAC 10-09-2025.pdf",
+    "15.14959 T. CAC.pdf",
+    "07. 1234567 T. DNI 01-01-2020.pdf",
+    "10. 14959 c1. otros 29-02-2023.pdf",
+    "10. 14959 t. otros 29-02-2024.pdf",
+    "02. 14959 ESTATUTO SOCIEDAD ANONIMA.docx",
+    "09. 14959 T.BALANCE 2024.pdf",
+    "04. 14959 NOSIS C1.pdf",
+    "06.- 14959 PERFIL-OI T. 01-01-2025.pdf",
+    "11. 14959 C1.C2. PERFIL 01-01-2025.pdf",
+    "01. ١٤٩٥٩ T. CAC.pdf",
+    "01. 14959 T. CAC 10-09-2025",
+    "01. 14959 T. CAC 10-09-2025.tar.gz",
+]
+
+# --- Implementaciones anteriores (copia textual, solo como referencia) ---
+def viejo_extraer_datos_desde_nombre(nombre_archivo):
+    nombre_sin_ext = os.path.splitext(nombre_archivo)[0]
+    nombre_sin_ext = re.sub(r"[_\-]", " ", nombre_sin_ext)
+    nombre_sin_ext = re.sub(r"\s+", " ", nombre_sin_ext).strip()
+
+    match_prefijo = re.match(r"^(0[1-9]|1[0-4])\.(\-)?(\d+)", nombre_sin_ext)
+    if match_prefijo:
+        prefijo = f"{match_prefijo.group(1)}."
+        nro_cuenta = match_prefijo.group(3)
+        resto = nombre_sin_ext.replace(match_prefijo.group(0), "").strip()
+    else:
+        partes = nombre_sin_ext.split(" ")
+        prefijo = partes[0] if partes[0].endswith(".") or partes[0].endswith(".-") else None
+        offset = 1 if prefijo else 0
+        nro_cuenta = partes[offset] if len(partes) > offset and partes[offset].isdigit() else None
+        resto = " ".join(partes[offset+1:])
+
+    if not nro_cuenta:
+        return None, None, None, None
+
+    fecha_raw = re.search(r"\d{2}-\d{2}-\d{4}", nombre_sin_ext)
+    fecha_raw = fecha_raw.group() if fecha_raw else None
+    fecha = fecha_raw.replace("-", "") if fecha_raw else datetime.now().strftime("%d%m%Y")
+
+    if not re.match(r"^(0[1-9]|[12][0-9]|3[01])(0[1-9]|1[0-2])\d{4}$", fecha):
+        return None, None, None, None
+
+    tipo_doc = None
+    for parte in resto.split():
+        if re.search(r"T\.|C\d+\.", parte.upper()):
+            tipo_doc = re.sub(r"[^\w]", "", parte.upper())
+            break
+
+    nombre_doc = resto
+    for elemento in [fecha_raw, tipo_doc]:
+        if elemento:
+            nombre_doc = nombre_doc.replace(elemento, "")
+    nombre_doc = nombre_doc.strip()
+
+    return nro_cuenta, tipo_doc, nombre_doc, fecha
+
+def viejo_obtener_prefijo(nombre_archivo):
+    partes = nombre_archivo.split()
+    return partes[0] if partes and (partes[0].endswith(".-") or partes[0].endswith(".")) else None
+
+def viejo_extraer_anio(nombre):
+    match = re.search(r"\d{2}-\d{2}-\d{4}", nombre)
+    if match:
+        try:
+            fecha = datetime.strptime(match.group(), "%d-%m-%Y")
+            return str(fecha.year)
+        except:
+            pass
+    return "SIN_FECHA"
+
+def viejo_extraer_subrol_constancia(nombre):
+    nombre = nombre.upper()
+    if "SOCIEDAD" in nombre:
+        return "SOCIEDAD"
+    if re.search(r"CUIT[\s\-_]*RL", nombre) or "REPRESENTANTE LEGAL" in nombre:
+        return "REPRESENTANTE LEGAL"
+    if re.search(r"CUIT[\s\-_]*BF", nombre) or "BENEFICIARIO FINAL" in nombre or re.search(r"\bBF\b", nombre):
+        return "BENEFICIARIOS FINALES"
+    if re.search(r"\bT[\.\s_-]", nombre):
+        return "TITULAR"
+    match = re.search(r"\bC(\d+)(?=[.\s_-])", nombre)
+    if match:
+        return f"COTITULAR {match.group(1)}"
+    return "OTROS"
+
+def viejo_detectar_categoria(prefijo):
+    categorias = {
+        "01": "CAC", "02": "ESTATUTO-CONTRATO SOCIAL", "03": "CONSTANCIAS",
+        "04": "NOSIS", "05": "DOCUMENTACION", "06": "PERFIL-OI",
+        "07": "DNI", "08": "CONSTANCIAS", "09": "ESTADOS CONTABLES",
+        "10": "OTROS", "12": "NOSIS", "13": "PERFIL-OI"
+    }
+    return categorias.get(prefijo, "OTROS")
+
+def viejo_extraer_datos(nombre):
+    nombre = nombre.upper()
+    cuenta_match = re.search(r"\b(\d{4,6})\b", nombre)
+    cuenta = cuenta_match.group(1) if cuenta_match else "SIN_CUENTA"
+
+    prefijo_match = re.match(r"^(\d{2,})[.\s_-]", nombre)
+    categoria = f"{prefijo_match.group(1)}. " + viejo_detectar_categoria(prefijo_match.group(1)) if prefijo_match else "SIN_CATEGORIA"
+
+    subrol = viejo_extraer_subrol_constancia(nombre)
+    fecha_match = re.search(r"(\d{2})[-_/](\d{2})[-_/](\d{4})", nombre)
+    anio = fecha_match.group(3) if fecha_match else "SIN_FECHA"
+
+    return cuenta, categoria, subrol, anio
+
+def viejo_extraer_datos_diagnostico(nombre_archivo):
+    nombre_sin_ext = os.path.splitext(nombre_archivo)[0]
+    partes = nombre_sin_ext.strip().split(" ")
+
+    if len(partes) < 4:
+        return None, None, None, None
+
+    nro_cuenta = partes[0]
+    tipo_raw = partes[1].replace(".", "").upper()
+    fecha_raw = partes[-1]
+
+    nombre_doc = " ".join(partes[2:-1]).strip()
+
+    if re.match(r"^\d{2}-\d{2}-\d{4}$", fecha_raw):
+        fecha = fecha_raw.replace("-", "")
+    else:
+        fecha = datetime.now().strftime("%d%m%Y")
+
+    if not nro_cuenta.isdigit():
+        return None, None, None, None
+    if not re.match(r"^(T|C\d+)$", tipo_raw):
+        return None, None, None, None
+    if not re.match(r"^(0[1-9]|[12][0-9]|3[01])(0[1-9]|1[0-2])\d{4}$", fecha):
+        return None, None, None, None
+
+    return nro_cuenta, tipo_raw, nombre_doc, fecha
+
+def viejo_proponer_nombre_corregido(nombre_archivo):
+    partes = nombre_archivo.split(".")
+    if len(partes) > 2 and partes[-1].lower() == partes[-2].lower():
+        nombre_archivo = ".".join(partes[:-1]) + "." + partes[-1]
+    nombre_sin_ext, ext = os.path.splitext(nombre_archivo)
+
+    partes = nombre_sin_ext.strip().split(" ")
+    if len(partes) < 2:
+        return None
+
+    nro_cuenta = partes[0]
+    tipo_raw = partes[1].replace(".", "").upper()
+    nombre_doc = " ".join(partes[2:]) if len(partes) > 2 else ""
+
+    match = re.search(r"\d{2}-\d{2}-\d{4}", nombre_doc)
+    fecha_detectada, tiene_fecha = (match.group(), True) if match else (datetime.now().strftime("%d-%m-%Y"), False)
+    nombre_doc = re.sub(r"\d{2}-\d{2}-\d{4}", "", nombre_doc).strip()
+
+    if not nombre_doc:
+        nombre_doc = "SIN_DESCRIPCION"
+
+    return f"{nro_cuenta} {tipo_raw}. {nombre_doc} {fecha_detectada}{ext}", tiene_fecha
+
+def viejo_extraer_datos_flexibles(nombre_archivo):
+    nombre_sin_ext = os.path.splitext(nombre_archivo)[0]
+    nombre_sin_ext = re.sub(r"\s+", " ", nombre_sin_ext).strip()
+    partes = nombre_sin_ext.split(" ")
+
+    # Detectar si hay prefijo
+    prefijo = partes[0] if partes[0].endswith(".") or partes[0].endswith(".-") else None
+    offset = 1 if prefijo else 0
+
+    try:
+        nro_cuenta = partes[offset]
+        if not nro_cuenta.isdigit():
+            return None, None, None, None
+
+        # Buscar fecha válida
+        fecha = None
+        for parte in reversed(partes):
+            if re.match(r"\d{2}-\d{2}-\d{4}", parte):
+                fecha = parte.replace("-", "")
+                break
+
+        if not fecha:
+            fecha = datetime.now().strftime("%d%m%Y")
+            print(f"🕒 Fecha asignada automáticamente para '{nombre_archivo}': {fecha}")
+
+        # Construir nombre documental desde el resto
+        nombre_doc = " ".join(partes[offset + 1:]).replace(fecha, "").strip()
+
+        return nro_cuenta, nombre_doc, prefijo, fecha
+
+    except Exception as e:
+        print(f"❌ Error al parsear '{nombre_archivo}': {e}")
+        return None, None, None, None
+
+# --- Pares (anterior, nuevo) que deben coincidir ---
+def _automatico_viejo(nombre):
+    datos = viejo_extraer_datos_desde_nombre(nombre)
+    return datos, viejo_obtener_prefijo(nombre), viejo_extraer_anio(nombre), viejo_extraer_subrol_constancia(datos[2] or "")
+
+def _automatico_nuevo(nombre):
+    datos = extraer_datos_desde_nombre(nombre)
+    return datos, obtener_prefijo(nombre), extraer_anio(nombre), extraer_subrol_constancia(datos[2] or "")
+
+def _diagnostico_nuevo(nombre):
+    datos = parser_nombres.vista_diagnostico(nombre)
+    if datos is None or not datos[4]:
+        return None, None, None, None
+    fecha = datos[3] if datos[3] is not None else datetime.now().strftime("%d%m%Y")
+    return datos[0], datos[1], datos[2], fecha
+
+def _silencioso(funcion):
+    # El parser flexible avisa por consola cada fecha asignada: no se mide la salida
+    def envoltura(nombre):
+        with redirect_stdout(io.StringIO()):
+            return funcion(nombre)
+    return envoltura
+
+PARES = {
+    "automatico": (_automatico_viejo, _automatico_nuevo),
+    "auditable": (viejo_extraer_datos, extraer_datos),
+    "diagnostico": (viejo_extraer_datos_diagnostico, _diagnostico_nuevo),
+    "preprocesar": (viejo_proponer_nombre_corregido, proponer_nombre_corregido),
+    "flexible": (_silencioso(viejo_extraer_datos_flexibles), _silencioso(extraer_datos_flexibles)),
+}
+
+def limpiar_memo():
+    for funcion in (parser_nombres.tokenizar, parser_nombres.subrol_de, parser_nombres.vista_auditoria,
+                    parser_nombres.vista_diagnostico, parser_nombres.vista_renombrado,
+                    parser_nombres.vista_flexible):
+        funcion.cache_clear()
+
+def verificar_paridad(corpus=CORPUS):
+    """Devuelve la lista de (vista, nombre, anterior, nuevo) que no coinciden."""
+    diferencias = []
+    for vista, (viejo, nuevo) in PARES.items():
+        for nombre in corpus:
+            anterior, actual = viejo(nombre), nuevo(nombre)
+            if anterior != actual:
+                diferencias.append((vista, nombre, anterior, actual))
+    return diferencias
+
+def medir(funcion, nombres):
+    inicio = time.perf_counter()
+    for nombre in nombres:
+        funcion(nombre)
+    return time.perf_counter() - inicio
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    diferencias = verificar_paridad()
+    for vista, nombre, anterior, actual in diferencias:
+        print(f"❌ {vista}: '{nombre}' → antes {anterior!r}, ahora {actual!r}")
+    print(f"{'✅' if not diferencias else '⚠️'} Paridad: {len(diferencias)} diferencias en {len(CORPUS) * len(PARES)} casos")
+
+    # Nombres únicos (memo frío) y repetidos (memo caliente), como en reprocesos de Docupen
+    unicos = [f"{os.path.splitext(n)[0]} {i}{os.path.splitext(n)[1]}" for i in range(repeticiones) for n in CORPUS]
+    repetidos = CORPUS * repeticiones
+    print(f"\n{'vista':<12} {'anterior':>10} {'nuevo frío':>11} {'nuevo memo':>11}")
+    for vista, (viejo, nuevo) in PARES.items():
+        limpiar_memo()
+        t_viejo = medir(viejo, unicos)
+        t_frio = medir(nuevo, unicos)
+        t_memo = medir(nuevo, repetidos)
+        print(f"{vista:<12} {t_viejo:9.3f}s {t_frio:10.3f}s {t_memo:10.3f}s")
+    return 1 if diferencias else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
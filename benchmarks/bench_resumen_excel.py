@@ -0,0 +1,51 @@
+# Benchmark del resumen Excel: modo normal (generar_resumen) vs. streaming write-only.
+# Uso: python benchmarks/bench_resumen_excel.py [filas]
+# Mide tiempo total y pico de memoria (tracemalloc) de cada modo.
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Agregar la raíz del proyecto al path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from scripts.generar_resumen_excel import generar_resumen, generar_resumen_streaming
+
+def filas_sinteticas(cantidad):
+    for i in range(cantidad):
+        cuenta = str(1000 + i % 500)
+        yield {
+            "fecha_archivo": "04-09-2025",
+            "cuenta": cuenta,
+            "cuit_cuil": f"30-{i:08d}-1",
+            "nombre": f"COMITENTE {cuenta}",
+            "tipo_documento": "CONSTANCIAS",
+            "subcarpeta": "08. CONSTANCIAS",
+            "ruta_relativa": f"{cuenta}\\08. CONSTANCIAS\\SOCIEDAD\\2025\\08.- {cuenta} CUIT SOCIEDAD {i}.pdf",
+            "destino": "Legajos",
+            "hash": f"{i:064x}",
+        }
+
+def medir(nombre, funcion):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcion()
+    duracion = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    print(f"{nombre:<12} {duracion:8.2f} s {pico:10.1f} MiB pico")
+    return duracion, pico
+
+if __name__ == "__main__":
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    carpeta = tempfile.mkdtemp()
+    normal = os.path.join(carpeta, "normal.xlsx")
+    streaming = os.path.join(carpeta, "streaming.xlsx")
+
+    print(f"📊 Benchmark resumen Excel: {cantidad} filas\n")
+    medir("normal", lambda: generar_resumen(list(filas_sinteticas(cantidad)), normal, "C:/Legajos"))
+    medir("streaming", lambda: generar_resumen_streaming(filas_sinteticas(cantidad), streaming, "C:/Legajos"))
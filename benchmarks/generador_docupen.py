@@ -0,0 +1,128 @@
+# Generador de carpetas Docupen sintéticas y reproducibles para los benchmarks.
+# Uso: python benchmarks/generador_docupen.py CARPETA [archivos] [semilla]
+# Con la misma semilla y parámetros genera exactamente los mismos nombres y contenidos.
+# Escribe también cuentas.xlsx con el maestro de comitentes del lote.
+
+import json
+import os
+import random
+import sys
+from pathlib import Path
+
+# Agregar la raíz del proyecto al path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+# --- Parámetros por defecto ---
+TAMANO_MEDIANO = 8 * 1024           # bytes; distribución lognormal alrededor de este valor
+DISPERSION = 1.0                    # sigma de la lognormal (0 = todos del mismo tamaño)
+TAMANO_MAXIMO = 4 * 1024 * 1024
+PROPORCION_DUPLICADOS = 0.1         # archivos que repiten el contenido de uno anterior
+CUENTAS = 200
+VARIANTES = {                       # mezcla de variantes de nombre (pesos relativos)
+    "canonico": 60,
+    "sin_espacio": 8,
+    "guion": 8,
+    "guiones_bajos": 4,
+    "constancia": 15,
+    "invalido": 5,
+}
+
+TIPOS_DOCUMENTO = ["CAC", "DNI", "NOSIS", "PERFIL", "MATRIZ", "BALANCE", "PODER"]
+CONSTANCIAS = ["SOCIEDAD", "RL", "BF PEREZ", "BF GOMEZ"]
+
+def _fecha(azar):
+    return f"{azar.randint(1, 28):02d}-{azar.randint(1, 12):02d}-{azar.randint(2019, 2025)}"
+
+def _nombre(variante, indice, cuenta, azar):
+    prefijo = f"{azar.randint(1, 10):02d}"
+    rol = azar.choice(["T", "T", "C1", "C2"])
+    documento = f"{azar.choice(TIPOS_DOCUMENTO)} {indice:06d}"
+    fecha = _fecha(azar)
+    if variante == "canonico":
+        return f"{prefijo}. {cuenta} {rol}. {documento} {fecha}.pdf"
+    if variante == "sin_espacio":
+        return f"{prefijo}.{cuenta} {rol}. {documento} {fecha}.pdf"
+    if variante == "guion":
+        return f"{prefijo}.- {cuenta} {rol}. {documento} {fecha}.pdf"
+    if variante == "guiones_bajos":
+        return f"{cuenta}_{rol}._{documento.replace(' ', '_')}_{fecha.replace('-', '_')}.pdf"
+    if variante == "constancia":
+        return f"08. {cuenta} CUIT {azar.choice(CONSTANCIAS)} {indice:06d} {fecha}.pdf"
+    return f"ESCANEO {indice:06d}.pdf"
+
+def escribir_cuentas(ruta_excel, cuentas):
+    """Maestro de comitentes con las columnas del Excel real."""
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Comitentes")
+    ws.append(["Comitente  -Número", "Comitente  -Tipo de Comitente", "CUIT", "Comitente  -Descripción"])
+    for cuenta, tipo in cuentas.items():
+        ws.append([cuenta, "Persona Física" if tipo == "fisica" else "Persona Jurídica",
+                   f"30-{int(cuenta):08d}-1", f"COMITENTE {cuenta}"])
+    wb.save(ruta_excel)
+
+def generar_docupen(carpeta, archivos=1000, semilla=42, tamano_mediano=TAMANO_MEDIANO,
+                    dispersion=DISPERSION, tamano_maximo=TAMANO_MAXIMO,
+                    proporcion_duplicados=PROPORCION_DUPLICADOS, cuentas=CUENTAS, variantes=None,
+                    ruta_cuentas=None):
+    """
+    Crea carpeta con archivos sintéticos de Docupen y devuelve el manifiesto:
+    parámetros, cantidad por variante, duplicados generados y bytes totales.
+    """
+    azar = random.Random(semilla)
+    variantes = variantes or VARIANTES
+    nombres_variantes = list(variantes)
+    pesos = [variantes[v] for v in nombres_variantes]
+    os.makedirs(carpeta, exist_ok=True)
+
+    maestro = {str(10000 + 7 * i): azar.choice(["fisica", "juridica"]) for i in range(cuentas)}
+    lista_cuentas = list(maestro)
+    contenidos = []   # semillas de contenido ya usadas (para los duplicados)
+    por_variante = dict.fromkeys(nombres_variantes, 0)
+    duplicados = 0
+    total_bytes = 0
+
+    for indice in range(archivos):
+        variante = azar.choices(nombres_variantes, pesos)[0]
+        nombre = _nombre(variante, indice, azar.choice(lista_cuentas), azar)
+        if contenidos and azar.random() < proporcion_duplicados:
+            semilla_contenido, tamano = azar.choice(contenidos)
+            duplicados += 1
+        else:
+            tamano = min(int(azar.lognormvariate(0, dispersion) * tamano_mediano) + 1, tamano_maximo)
+            semilla_contenido = azar.getrandbits(64)
+            contenidos.append((semilla_contenido, tamano))
+        with open(os.path.join(carpeta, nombre), "wb") as f:
+            f.write(random.Random(semilla_contenido).randbytes(tamano))
+        por_variante[variante] += 1
+        total_bytes += tamano
+
+    if ruta_cuentas:
+        escribir_cuentas(ruta_cuentas, maestro)
+
+    return {
+        "archivos": archivos,
+        "semilla": semilla,
+        "tamano_mediano": tamano_mediano,
+        "dispersion": dispersion,
+        "proporcion_duplicados": proporcion_duplicados,
+        "cuentas": cuentas,
+        "variantes": por_variante,
+        "duplicados": duplicados,
+        "bytes": total_bytes,
+    }
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python benchmarks/generador_docupen.py CARPETA [archivos] [semilla]")
+        sys.exit(1)
+    carpeta = sys.argv[1]
+    manifiesto = generar_docupen(
+        carpeta,
+        archivos=int(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+        semilla=int(sys.argv[3]) if len(sys.argv) > 3 else 42,
+        ruta_cuentas=os.path.join(carpeta, "..", "cuentas.xlsx")
+    )
+    print(json.dumps(manifiesto, indent=2, ensure_ascii=False))
@@ -1,30 +1,70 @@
 import os
 import socket
+import sys
+import threading
+import time
 from datetime import datetime
 
-# --- Registro de seguridad ---
-ENTORNO_EJECUCION = {
-    "host": socket.gethostname(),
-    "ip_local": socket.gethostbyname(socket.gethostname()),
-    "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-    "script": "archivado_auditable.py"
-}
+INICIO = time.perf_counter()
 
 # --- Importación de módulos ---
-from scripts.config_loader import cargar_configuracion
+# Solo lo que usa cualquier ejecución; openpyxl, numpy, asyncio y compañía se
+# importan en la etapa que los necesita (ver scripts/reporte_importaciones.py)
+from scripts.config_loader import cargar_configuracion, obtener_parametros_vigilancia, obtener_rutas_metricas
 from scripts.verificar_permisos_ruta import verificar_permisos
 from scripts.seguridad_v2 import verificar_entorno, verificar_dependencias
 from scripts.archivado_auditable import (
+    RUTA_ENTRADA,
     procesar_archivos,
+    procesar_archivo,
+    recuperar_movimientos,
     generar_reporte,
+    resumir_auditoria,
+    resumir_integridad,
+    indice_integridad,
     log_auditoria,
     hashes_existentes,
     detectar_inconsistencias
 )
-from scripts.generar_resumen_excel import generar_resumen
-from scripts.actualizar_resumen import actualizar_resumen
 from scripts.historial_archivo import actualizar_historial
-from scripts.alertas_email import enviar_alerta
+from scripts.cache_hash import guardar_cache
+from scripts import metricas_flujo
+from scripts.registro_eventos import obtener_logger, configurar_registro, detener_registro
+
+log = obtener_logger("main")
+
+# --- Registro de seguridad ---
+# Se resuelve en segundo plano al arrancar el flujo: gethostbyname puede tardar
+# segundos en equipos con DNS mal configurado y no debe frenar la importación.
+def resolver_entorno():
+    host = socket.gethostname()
+    try:
+        ip_local = socket.gethostbyname(host)
+    except OSError:
+        ip_local = "desconocida"
+    return {
+        "host": host,
+        "ip_local": ip_local,
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "script": "archivado_auditable.py"
+    }
+
+def iniciar_resolucion_entorno():
+    """Arranca resolver_entorno en un hilo; devuelve una función que espera y entrega el resultado."""
+    entorno = {}
+    hilo = threading.Thread(target=lambda: entorno.update(resolver_entorno()), daemon=True)
+    hilo.start()
+
+    def obtener():
+        hilo.join()
+        return entorno
+    return obtener
+
+def cerrar_alertas_pendientes():
+    # Si no se encoló ninguna alerta el despachador (y asyncio) ni siquiera se importó
+    despachador = sys.modules.get("scripts.despachador_alertas")
+    if despachador and not despachador.cerrar_despachadores():
+        log.warning("⚠️ Quedaron alertas sin enviar al cerrar")
 
 # --- Validación de configuración ---
 def validar_configuracion_interna(config):
@@ -59,51 +99,152 @@ def validar_configuracion_interna(config):
     if not config.get("EMAIL", "destinatario", fallback=""):
         raise ValueError("Falta destinatario en sección [EMAIL]")
 
-    print("✅ Configuración validada correctamente.")
+    log.info("✅ Configuración validada correctamente.")
 
 # --- Manejo inteligente del resumen ---
 RUTA_RESUMEN = "./resumen_archivo.xlsx"
 
 def manejar_resumen(resumen_data):
+    """Devuelve la ruta del libro escrito en esta ejecución (para adjuntar en la alerta)."""
+    from scripts.generar_resumen_excel import generar_resumen
+    from scripts.actualizar_resumen import actualizar_resumen
+
     if os.path.exists(RUTA_RESUMEN):
-        print("📄 Resumen existente detectado. Actualizando...")
-        actualizar_resumen(resumen_data, RUTA_RESUMEN)
+        log.info("📄 Resumen existente detectado. Agregando partición nueva...")
+        particiones = actualizar_resumen(resumen_data, RUTA_RESUMEN)
+        return particiones[-1] if particiones else RUTA_RESUMEN
+    log.info("📄 No hay resumen previo. Generando desde cero...")
+    generar_resumen(resumen_data, RUTA_RESUMEN)
+    return RUTA_RESUMEN
+
+# --- Historial, resumen y alerta de lo archivado ---
+def publicar_resultados(resumen_data, config, entorno):
+    """entorno: función que devuelve el registro de seguridad (ver iniciar_resolucion_entorno)."""
+    from scripts.exportacion_columnar import exportar_historial
+    with metricas_flujo.medir("historial"):
+        actualizar_historial(resumen_data, "scripts/historial_archivo.json", entorno=entorno())
+    metricas_flujo.sumar("filas_historial", len(resumen_data))
+    with metricas_flujo.medir("exportacion"):
+        exportar_historial("scripts/historial_archivo.json")
+    with metricas_flujo.medir("resumen"):
+        ruta_resumen = manejar_resumen(resumen_data)
+    metricas_flujo.sumar("filas_resumen", len(resumen_data))
+
+    if config.getboolean("EMAIL", "activar_alertas", fallback=False):
+        from scripts.alertas_email import enviar_alerta
+        with metricas_flujo.medir("alertas"):
+            enviar_alerta(resumen_path=ruta_resumen, destinatario=config.get("EMAIL", "destinatario"))
     else:
-        print("📄 No hay resumen previo. Generando desde cero...")
-        generar_resumen(resumen_data, RUTA_RESUMEN)
+        log.info("📭 Alerta desactivada por configuración")
+
+# --- Métricas de la ejecución ---
+def exportar_metricas():
+    # Se llama también cuando el flujo falla: esa es la ejecución que más interesa revisar
+    try:
+        metricas_flujo.exportar(*obtener_rutas_metricas("config/config.ini"))
+    except Exception as e:
+        log.error(f"❌ No se pudieron exportar las métricas: {e}")
 
 # --- Flujo principal del sistema ---
 def ejecutar_flujo_principal():
+    metricas_flujo.reiniciar()
+    metricas_flujo.fijar("ejecucion_fallida", 0)
+    try:
+        with metricas_flujo.medir("verificacion"):
+            config = cargar_configuracion("config/config.ini")
+            configurar_registro(config.get("GENERAL", "log_nivel", fallback="info"))
+            validar_configuracion_interna(config)
+
+            entorno = iniciar_resolucion_entorno()
+            verificar_entorno()
+            verificar_dependencias()
+
+        with metricas_flujo.medir("archivado"):
+            resumen_data = procesar_archivos()
+
+        if resumen_data:
+            publicar_resultados(resumen_data, config, entorno)
+        else:
+            log.info("📭 Sin documentos nuevos: historial y resumen no cambian")
+
+        if log_auditoria:
+            from scripts.exportacion_columnar import exportar_eventos_archivo
+            with metricas_flujo.medir("exportacion"):
+                exportar_eventos_archivo(log_auditoria)
+
+        # --- Auditoría extendida ---
+        resumir_auditoria()
+        resumir_integridad()
+
+        with metricas_flujo.medir("inconsistencias"):
+            inconsistencias = detectar_inconsistencias()
+        metricas_flujo.fijar("inconsistencias", len(inconsistencias))
+        if inconsistencias:
+            log.warning("⚠️ Inconsistencias detectadas:")
+            for i in inconsistencias:
+                log.info(f"🔍 Hash: {i['hash']} | Ruta esperada: {i['ruta_esperada']} | Estado: {i['estado']}")
+        else:
+            log.info("✅ No se detectaron inconsistencias.")
+
+        # Las alertas salieron en segundo plano: se espera lo pendiente antes de terminar
+        with metricas_flujo.medir("cierre_alertas"):
+            cerrar_alertas_pendientes()
+    except BaseException:
+        metricas_flujo.fijar("ejecucion_fallida", 1)
+        raise
+    finally:
+        exportar_metricas()
+
+# --- Modo vigilancia: cada archivo se archiva apenas el escáner termina de escribirlo ---
+def ejecutar_modo_vigilancia():
+    from scripts.exportacion_columnar import exportar_eventos_archivo
+    from scripts.modo_vigilancia import vigilar
+
     config = cargar_configuracion("config/config.ini")
+    configurar_registro(config.get("GENERAL", "log_nivel", fallback="info"))
     validar_configuracion_interna(config)
 
+    entorno = iniciar_resolucion_entorno()
     verificar_entorno()
     verificar_dependencias()
 
-    resumen_data = procesar_archivos()
-
-    actualizar_historial(resumen_data, "scripts/historial_archivo.json", entorno=ENTORNO_EJECUCION)
-    manejar_resumen(resumen_data)
-
-    if config.getboolean("EMAIL", "activar_alertas", fallback=False):
-        enviar_alerta(resumen_path=RUTA_RESUMEN, destinatario=config.get("EMAIL", "destinatario"))
-    else:
-        print("📭 Alerta desactivada por configuración")
-
-    # --- Auditoría extendida ---
-    print("\n📄 Log de auditoría:")
-    for evento in log_auditoria:
-        print(f"{evento['fecha']} | {evento['estado']} | {evento['archivo']} → {evento['cuenta']}/{evento['categoria']}/{evento['subrol']}")
-
-    inconsistencias = detectar_inconsistencias()
-    if inconsistencias:
-        print("\n⚠️ Inconsistencias detectadas:")
-        for i in inconsistencias:
-            print(f"🔍 Hash: {i['hash']} | Ruta esperada: {i['ruta_esperada']} | Estado: {i['estado']}")
-    else:
-        print("\n✅ No se detectaron inconsistencias.")
+    recuperar_movimientos()
+    espera_estable, intervalo = obtener_parametros_vigilancia("config/config.ini")
+    exportados = [0]
+    filas = []  # lo archivado desde la última inactividad
+
+    def archivar(ruta):
+        procesar_archivo(ruta, filas=filas)
+
+    def al_quedar_inactivo():
+        guardar_cache()
+        indice_integridad.guardar()
+        if filas:
+            # Cada tanda de inactividad pasa por lo mismo que una ejecución por lote
+            tanda = filas[:]
+            filas.clear()
+            publicar_resultados(tanda, config, entorno)
+        hasta = log_auditoria.posicion()
+        exportar_eventos_archivo(log_auditoria.leer(exportados[0], hasta))
+        exportados[0] = hasta
+        exportar_metricas()
+
+    log.info(f"👀 Vigilando {RUTA_ENTRADA} (Ctrl+C para detener)")
+    try:
+        vigilar(RUTA_ENTRADA, archivar, espera_estable, intervalo, al_quedar_inactivo=al_quedar_inactivo)
+    except KeyboardInterrupt:
+        al_quedar_inactivo()
+        cerrar_alertas_pendientes()
+        log.info("🛑 Vigilancia detenida")
 
 # --- Punto de entrada ---
 if __name__ == "__main__":
-    ejecutar_flujo_principal()
-    print("✅ main.py se ejecutó correctamente")
+    if "--reporte-importacion" in sys.argv:
+        from scripts.reporte_importaciones import imprimir_reporte
+        imprimir_reporte("main")
+    elif "--vigilar" in sys.argv:
+        ejecutar_modo_vigilancia()
+    else:
+        ejecutar_flujo_principal()
+        log.info(f"✅ main.py se ejecutó correctamente ({time.perf_counter() - INICIO:.2f} s)")
+        detener_registro()
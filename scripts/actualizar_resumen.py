@@ -1,49 +1,199 @@
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
 from openpyxl.utils import get_column_letter
+from datetime import datetime
+from itertools import islice
+import json
 import os
 
 ENCABEZADOS = [
     "Fecha", "Cuenta", "Nombre / Razón Social", "CUIT / CUIL",
     "Tipo de Documento", "Archivo", "Destino", "Hash"
 ]
+MAX_FILAS_PARTICION = 10_000  # filas por libro (por ejecución y al compactar un mes)
 
-def actualizar_resumen(resumen_data, excel_path="historial_archivo.xlsx", proteger=False):
-    # Crear archivo si no existe
-    if not os.path.exists(excel_path):
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Historial"
-        ws.append(ENCABEZADOS)
-
-        # Estilo de encabezados
-        for col in range(1, len(ENCABEZADOS) + 1):
-            ws.cell(row=1, column=col).font = Font(bold=True)
-
-        # Ajuste de ancho
-        for col in range(1, len(ENCABEZADOS) + 1):
-            ws.column_dimensions[get_column_letter(col)].width = 20
-    else:
-        wb = openpyxl.load_workbook(excel_path)
-        ws = wb.active
-
-    # Agregar registros nuevos
-    for fila in resumen_data:
-        nueva_fila = [
-            fila.get("Fecha_archivo", ""),
-            fila.get("Cuenta", ""),
-            fila.get("Nombre-Razón Social", ""),
-            fila.get("CUIT-CUIL", ""),
-            fila.get("Tipo de documento", ""),
-            fila.get("Subcarpeta", ""),
-            fila.get("Ruta relativa", ""),
-            fila.get("hash", "")
-        ]
-        ws.append(nueva_fila)
+# --- Particiones e índice ---
+# El resumen acumulado se guarda en libros dentro de <nombre>_particiones/.
+# Cada ejecución escribe sus filas en un libro nuevo: cuesta O(filas nuevas) y no
+# relee nada. Al empezar un mes, los libros del mes cerrado se compactan una sola
+# vez en libros de hasta MAX_FILAS_PARTICION filas, así que cada fila se reescribe
+# como mucho una vez. El índice permite leer toda la historia como un único conjunto.
+def carpeta_particiones(excel_path):
+    return os.path.splitext(excel_path)[0] + "_particiones"
+
+def ruta_indice(excel_path):
+    return os.path.join(carpeta_particiones(excel_path), "indice.json")
+
+def cargar_indice(excel_path):
+    try:
+        with open(ruta_indice(excel_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {"particiones": []}
+
+def guardar_indice(excel_path, indice):
+    ruta = ruta_indice(excel_path)
+    with open(f"{ruta}.tmp", "w", encoding="utf-8") as f:
+        json.dump(indice, f, indent=2, ensure_ascii=False)
+    os.replace(f"{ruta}.tmp", ruta)
+
+def _registrar_legado(excel_path, indice):
+    """El libro acumulado anterior queda como primera partición, sin reescribirlo."""
+    if not os.path.exists(excel_path) or any(p.get("legado") for p in indice["particiones"]):
+        return
+    wb = openpyxl.load_workbook(excel_path, read_only=True)
+    filas = max(wb.active.max_row - 1, 0)
+    wb.close()
+    indice["particiones"].insert(0, {
+        "archivo": os.path.relpath(excel_path, carpeta_particiones(excel_path)),
+        "periodo": None,
+        "filas": filas,
+        "legado": True
+    })
+
+def _nueva_fila(fila):
+    return [
+        fila.get("Fecha_archivo", ""),
+        fila.get("Cuenta", ""),
+        fila.get("Nombre-Razón Social", ""),
+        fila.get("CUIT-CUIL", ""),
+        fila.get("Tipo de documento", ""),
+        fila.get("Subcarpeta", ""),
+        fila.get("Ruta relativa", ""),
+        fila.get("hash", "")
+    ]
+
+def _escribir_particion(ruta, filas, proteger):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Historial")
+
+    # Ajuste de ancho
+    for col in range(1, len(ENCABEZADOS) + 1):
+        ws.column_dimensions[get_column_letter(col)].width = 20
 
     # Protección opcional
     if proteger:
         ws.protection.sheet = True
         ws.protection.enable()
 
-    wb.save(excel_path)
\ No newline at end of file
+    # Estilo de encabezados
+    negrita = Font(bold=True)
+    encabezados = []
+    for titulo in ENCABEZADOS:
+        celda = WriteOnlyCell(ws, value=titulo)
+        celda.font = negrita
+        encabezados.append(celda)
+    ws.append(encabezados)
+
+    for fila in filas:
+        ws.append(fila)
+    wb.save(f"{ruta}.tmp")
+    os.replace(f"{ruta}.tmp", ruta)
+
+def _leer_particion(ruta):
+    wb = openpyxl.load_workbook(ruta, read_only=True)
+    try:
+        for fila in wb.active.iter_rows(min_row=2, values_only=True):
+            yield fila
+    finally:
+        wb.close()
+
+# --- Compactación de un mes cerrado ---
+def compactar_mes(excel_path, periodo, indice=None, proteger=False):
+    """
+    Reúne los libros de periodo en libros de hasta MAX_FILAS_PARTICION filas.
+    Lee y escribe en streaming (en memoria, a lo sumo un libro de filas).
+    Los nuevos se escriben antes de actualizar el índice y los viejos se borran
+    después, así un corte a mitad de camino no pierde filas.
+    """
+    guardar = indice is None
+    indice = cargar_indice(excel_path) if indice is None else indice
+    carpeta = carpeta_particiones(excel_path)
+    del_mes = [p for p in indice["particiones"] if p.get("periodo") == periodo]
+    if len(del_mes) <= 1:
+        for particion in del_mes:
+            particion["compactado"] = True
+        if guardar:
+            guardar_indice(excel_path, indice)
+        return []
+
+    base = os.path.splitext(os.path.basename(excel_path))[0]
+    marca = datetime.now().strftime("%Y%m%d%H%M%S")
+    filas = (fila for p in del_mes for fila in _leer_particion(os.path.join(carpeta, p["archivo"])))
+    compactas = []
+    while True:
+        bloque = list(islice(filas, MAX_FILAS_PARTICION))
+        if not bloque:
+            break
+        nombre = f"{base}_{periodo}_mes{marca}_{len(compactas) + 1:02d}.xlsx"
+        _escribir_particion(os.path.join(carpeta, nombre), bloque, proteger)
+        compactas.append({"archivo": nombre, "periodo": periodo, "filas": len(bloque),
+                          "creado": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "compactado": True})
+
+    posicion = indice["particiones"].index(del_mes[0])
+    restantes = [p for p in indice["particiones"] if p.get("periodo") != periodo]
+    indice["particiones"] = restantes[:posicion] + compactas + restantes[posicion:]
+    guardar_indice(excel_path, indice)
+    for particion in del_mes:
+        try:
+            os.remove(os.path.join(carpeta, particion["archivo"]))
+        except OSError:
+            pass
+    return [os.path.join(carpeta, p["archivo"]) for p in compactas]
+
+# --- Agregar registros: un libro nuevo por ejecución ---
+def actualizar_resumen(resumen_data, excel_path="historial_archivo.xlsx", proteger=False):
+    """
+    Escribe las filas de esta ejecución en libros nuevos y devuelve sus rutas.
+    Costo: O(filas nuevas); además, la primera ejecución de cada mes compacta
+    una vez los libros del mes anterior.
+    """
+    carpeta = carpeta_particiones(excel_path)
+    os.makedirs(carpeta, exist_ok=True)
+    indice = cargar_indice(excel_path)
+    _registrar_legado(excel_path, indice)
+
+    periodo = datetime.now().strftime("%Y-%m")
+    cerrados = {p["periodo"] for p in indice["particiones"]
+                if p.get("periodo") and p["periodo"] < periodo and not p.get("compactado")}
+    for cerrado in sorted(cerrados):
+        compactar_mes(excel_path, cerrado, indice, proteger)
+
+    filas = [_nueva_fila(fila) for fila in resumen_data]
+    if not filas:
+        guardar_indice(excel_path, indice)
+        return []
+
+    ahora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    base = os.path.splitext(os.path.basename(excel_path))[0]
+    secuencia = sum(1 for p in indice["particiones"] if p.get("periodo") == periodo)
+    escritas = []
+
+    for inicio in range(0, len(filas), MAX_FILAS_PARTICION):
+        bloque = filas[inicio:inicio + MAX_FILAS_PARTICION]
+        secuencia += 1
+        nombre = f"{base}_{periodo}_{secuencia:04d}.xlsx"
+        ruta = os.path.join(carpeta, nombre)
+        _escribir_particion(ruta, bloque, proteger)
+        indice["particiones"].append({
+            "archivo": nombre,
+            "periodo": periodo,
+            "filas": len(bloque),
+            "creado": ahora
+        })
+        escritas.append(ruta)
+
+    guardar_indice(excel_path, indice)
+    return escritas
+
+# --- Lectura de toda la historia como un único conjunto ---
+def leer_resumen_completo(excel_path="historial_archivo.xlsx"):
+    """Recorre en orden todas las particiones del índice y entrega las filas (sin encabezado)."""
+    carpeta = carpeta_particiones(excel_path)
+    indice = cargar_indice(excel_path)
+    if not indice["particiones"] and os.path.exists(excel_path):
+        _registrar_legado(excel_path, indice)
+
+    for particion in indice["particiones"]:
+        yield from _leer_particion(os.path.normpath(os.path.join(carpeta, particion["archivo"])))
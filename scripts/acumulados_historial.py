@@ -0,0 +1,154 @@
+"""
+acumulados_historial.py
+
+Acumulados precalculados del historial para los reportes de cumplimiento.
+
+- Un acumulado por mes (punto de control) y uno por día, con: estados,
+  actividad por cuenta, archivos sin categoría y alertas de integridad
+- Actualización incremental: solo se leen los eventos agregados a la bitácora
+  desde el último offset procesado
+- Reportes por rango de fechas arbitrario: meses completos desde el punto de
+  control mensual, bordes del rango desde los acumulados diarios
+"""
+
+import json
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from scripts.bitacora_historial import abrir_bitacora, ruta_bitacora, generacion_actual
+
+SIN_FECHA = "SIN_FECHA"
+
+def ruta_acumulados(ruta_historial):
+    return ruta_bitacora(ruta_historial) + ".acumulados.json"
+
+# 🧮 Acumulado vacío y acumulación de un evento
+def acumulado_vacio():
+    return {"total": 0, "estados": Counter(), "cuentas": Counter(), "sin_categoria": 0, "alertas": 0}
+
+def clasificar_estado(entrada):
+    if entrada.get("evento") == "Archivo archivado" and not entrada.get("error"):
+        return "Archivado"
+    if entrada.get("error") == "Duplicado por hash":
+        return "Duplicado"
+    return "Error"
+
+def acumular(acumulado, entrada):
+    acumulado["total"] += 1
+    acumulado["estados"][clasificar_estado(entrada)] += 1
+    if entrada.get("cuenta"):
+        acumulado["cuentas"][entrada["cuenta"]] += 1
+    if not entrada.get("categoria"):
+        acumulado["sin_categoria"] += 1
+    if entrada.get("alerta_integridad"):
+        acumulado["alertas"] += 1
+
+def combinar(destino, origen):
+    destino["total"] += origen["total"]
+    destino["estados"].update(origen["estados"])
+    destino["cuentas"].update(origen["cuentas"])
+    destino["sin_categoria"] += origen["sin_categoria"]
+    destino["alertas"] += origen["alertas"]
+    return destino
+
+def _desde_json(datos):
+    acumulado = acumulado_vacio()
+    acumulado.update(datos)
+    acumulado["estados"] = Counter(datos.get("estados", {}))
+    acumulado["cuentas"] = Counter(datos.get("cuentas", {}))
+    return acumulado
+
+# 📥 Carga y guardado de los puntos de control
+def _cargar(ruta_historial):
+    try:
+        with open(ruta_acumulados(ruta_historial), "r", encoding="utf-8") as f:
+            datos = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {"generacion": None, "offset": 0, "meses": {}, "dias": {}}
+    datos["meses"] = {k: _desde_json(v) for k, v in datos.get("meses", {}).items()}
+    datos["dias"] = {k: _desde_json(v) for k, v in datos.get("dias", {}).items()}
+    return datos
+
+def _guardar(ruta_historial, datos):
+    ruta = ruta_acumulados(ruta_historial)
+    with open(f"{ruta}.tmp", "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(f"{ruta}.tmp", ruta)
+
+# ⏩ Actualización incremental
+def actualizar_acumulados(ruta_historial):
+    """
+    Incorpora a los acumulados los eventos agregados desde el último offset.
+    Tras una compactación de la bitácora (nueva generación) se recalculan una vez.
+    """
+    ruta_jsonl = abrir_bitacora(ruta_historial)
+    tamano = os.path.getsize(ruta_jsonl)
+    generacion = generacion_actual(ruta_historial)
+
+    datos = _cargar(ruta_historial)
+    if datos.get("generacion") != generacion or datos.get("offset", 0) > tamano:
+        datos = {"generacion": generacion, "offset": 0, "meses": {}, "dias": {}}
+    if datos["offset"] == tamano:
+        return datos
+
+    with open(ruta_jsonl, "rb") as f:
+        f.seek(datos["offset"])
+        posicion = datos["offset"]
+        for linea in f:
+            posicion += len(linea)
+            if posicion > tamano:
+                break
+            try:
+                entrada = json.loads(linea)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            dia = (entrada.get("timestamp") or "")[:10] or SIN_FECHA
+            mes = dia[:7] if dia != SIN_FECHA else SIN_FECHA
+            acumular(datos["dias"].setdefault(dia, acumulado_vacio()), entrada)
+            acumular(datos["meses"].setdefault(mes, acumulado_vacio()), entrada)
+
+    datos["offset"] = tamano
+    _guardar(ruta_historial, datos)
+    return datos
+
+# 📊 Consulta por rango de fechas
+def _a_fecha(valor):
+    if valor is None or isinstance(valor, date):
+        return valor
+    return datetime.strptime(valor, "%Y-%m-%d").date()
+
+def _primer_dia_mes_siguiente(dia):
+    return (dia.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def acumulado_periodo(ruta_historial, desde=None, hasta=None):
+    """
+    Acumulado del rango [desde, hasta] (fechas o "YYYY-MM-DD", extremos opcionales).
+    Los meses completos salen del punto de control mensual; los bordes, de los días.
+    """
+    datos = actualizar_acumulados(ruta_historial)
+    desde, hasta = _a_fecha(desde), _a_fecha(hasta)
+    resultado = acumulado_vacio()
+
+    if desde is None and hasta is None:
+        for acumulado in datos["meses"].values():
+            combinar(resultado, acumulado)
+        return resultado
+
+    for mes, acumulado in datos["meses"].items():
+        if mes == SIN_FECHA:
+            continue
+        inicio_mes = datetime.strptime(mes, "%Y-%m").date()
+        fin_mes = _primer_dia_mes_siguiente(inicio_mes) - timedelta(days=1)
+        if (desde and fin_mes < desde) or (hasta and inicio_mes > hasta):
+            continue
+        if (desde is None or desde <= inicio_mes) and (hasta is None or fin_mes <= hasta):
+            combinar(resultado, acumulado)
+            continue
+        for dia, acumulado_dia in datos["dias"].items():
+            if not dia.startswith(mes):
+                continue
+            fecha = datetime.strptime(dia, "%Y-%m-%d").date()
+            if (desde is None or fecha >= desde) and (hasta is None or fecha <= hasta):
+                combinar(resultado, acumulado_dia)
+    return resultado
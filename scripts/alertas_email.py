@@ -1,34 +1,42 @@
 import os
-import smtplib
-from email.message import EmailMessage
 from scripts.historial_archivo import registrar_evento
+from scripts.despachador_alertas import obtener_despachador
+from scripts.registro_eventos import obtener_logger
+
+SMTP_SERVER = "smtp.tu-servidor.com"
+SMTP_PUERTO = 587
+log = obtener_logger("alertas")
 
 def enviar_alerta(resumen_path, destinatario="tu@email.com"):
+    """
+    Encola el resumen como adjunto y vuelve de inmediato; el envío (con reintentos)
+    corre en segundo plano y su resultado queda en el historial.
+    """
     if not os.path.exists(resumen_path):
         registrar_evento("historial_archivo.xlsx", "Error al enviar alerta: resumen no encontrado")
         raise FileNotFoundError(f"❌ No se encontró el archivo de resumen: {resumen_path}")
 
-    msg = EmailMessage()
-    msg["Subject"] = "Resumen de documentos archivados"
-    msg["From"] = "automatizacion@empresa.com"
-    msg["To"] = destinatario
-    msg.set_content("Adjunto el resumen de los documentos archivados.")
-
     with open(resumen_path, "rb") as f:
-        msg.add_attachment(
+        adjunto = (
+            os.path.basename(resumen_path),
             f.read(),
-            maintype="application",
-            subtype="vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            filename=os.path.basename(resumen_path)
+            "application",
+            "vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
 
-    try:
-        with smtplib.SMTP("smtp.tu-servidor.com", 587) as server:
-            server.starttls()
-            server.login("usuario", "contraseña")
-            server.send_message(msg)
-        registrar_evento("historial_archivo.xlsx", "Alerta enviada correctamente", resumen_path)
-        print("✅ Alerta enviada correctamente")
-    except Exception as e:
-        registrar_evento("historial_archivo.xlsx", f"Error al enviar alerta: {str(e)}", resumen_path)
-        raise RuntimeError(f"❌ Falló el envío de alerta: {str(e)}")
\ No newline at end of file
+    def al_resultado(alerta, error):
+        if error is None:
+            registrar_evento("historial_archivo.xlsx", "Alerta enviada correctamente", resumen_path)
+            log.info("✅ Alerta enviada correctamente")
+        else:
+            registrar_evento("historial_archivo.xlsx", f"Error al enviar alerta: {str(error)}", resumen_path)
+            log.error("❌ Falló el envío de alerta: %s", error)
+
+    despachador = obtener_despachador(
+        SMTP_SERVER, SMTP_PUERTO, usuario="usuario", contrasena="contraseña",
+        starttls=True, remitente="automatizacion@empresa.com"
+    )
+    despachador.encolar(
+        "Adjunto el resumen de los documentos archivados.", destinatario,
+        asunto="Resumen de documentos archivados", adjuntos=[adjunto], al_resultado=al_resultado
+    )
@@ -15,20 +15,36 @@ Funciones principales:
 """
 
 import os
-import re
-import hashlib
+import time
 from datetime import datetime
 
+from scripts.motor_hash import hashear_en_paralelo
+from scripts.cache_hash import obtener_hash, guardar_cache, estadisticas_cache
+from scripts.config_loader import obtener_hilos_hash
+from scripts.parser_nombres import vista_auditoria, subrol_de
+from scripts.cache_directorios import precalentar, asegurar_directorio, estadisticas_directorios
+from scripts.bitacora_movimientos import BitacoraMovimientos
+from scripts import metricas_flujo
+from scripts.registro_eventos import LogAuditoria, obtener_logger, configurar_registro
+from scripts import inconsistencias as auditoria_carpetas
+from scripts.indice_merkle import IndiceMerkle
+
 # 📁 Configuración
 RUTA_ENTRADA = "C:/Users/ALEJANDRA/Desktop/Legajos/Docupen/"
 RUTA_SALIDA = "C:/Users/ALEJANDRA/Desktop/Legajos/"
+RUTA_CONFIG = "config/config.ini"
+RUTA_MOVIMIENTOS = "scripts/movimientos_auditable.jsonl"
+RUTA_ESTADO_INCONSISTENCIAS = "scripts/estado_inconsistencias.json"
 hashes_existentes = {}  # {hash: {"ruta": ..., "tamano": ..., "modificado": ...}}
-log_auditoria = []
+log_auditoria = LogAuditoria()  # JSONL en logs/auditoria/, en memoria solo contadores
+log = obtener_logger("auditable")
+bitacora_movimientos = BitacoraMovimientos(RUTA_MOVIMIENTOS)
+# Árbol de integridad junto al archivo; Docupen vive dentro de RUTA_SALIDA pero no es parte del archivo
+indice_integridad = IndiceMerkle(RUTA_SALIDA, excluir=[os.path.basename(os.path.normpath(RUTA_ENTRADA))])
 
 # 🔐 Cálculo de hash
 def calcular_hash_archivo(ruta):
-    with open(ruta, "rb") as f:
-        return hashlib.sha256(f.read()).hexdigest()
+    return obtener_hash(ruta)
 
 # 🔍 Detección de colisión
 def detectar_colision(hash_actual, ruta_actual):
@@ -58,29 +74,22 @@ def registrar_evento(archivo, cuenta, categoria, subrol, estado, hash_actual):
 
 # ⚠️ Inconsistencias
 def detectar_inconsistencias():
-    inconsistencias = []
-    for hash_registrado, datos in hashes_existentes.items():
-        if not os.path.exists(datos["ruta"]):
-            inconsistencias.append({
-                "hash": hash_registrado,
-                "ruta_esperada": datos["ruta"],
-                "estado": "Archivo no encontrado"
-            })
+    # Un listado por carpeta (y ninguno si no cambió desde la última pasada), no un exists por hash
+    inconsistencias = auditoria_carpetas.detectar_inconsistencias(
+        ((hash_registrado, datos["ruta"]) for hash_registrado, datos in hashes_existentes.items()),
+        RUTA_ESTADO_INCONSISTENCIAS
+    )
+    carpetas = auditoria_carpetas.estadisticas
+    metricas_flujo.fijar("carpetas_listadas", carpetas["escaneadas"])
+    metricas_flujo.fijar("carpetas_sin_cambios", carpetas["reutilizadas"])
+    log.info(f"🗂️ Inconsistencias: {carpetas['carpetas']} carpetas, {carpetas['escaneadas']} listadas, "
+             f"{carpetas['reutilizadas']} sin cambios")
     return inconsistencias
 
 # 🧠 Clasificación
 def extraer_datos(nombre):
-    nombre = nombre.upper()
-    cuenta_match = re.search(r"\b(\d{4,6})\b", nombre)
-    cuenta = cuenta_match.group(1) if cuenta_match else "SIN_CUENTA"
-
-    prefijo_match = re.match(r"^(\d{2,})[.\s_-]", nombre)
-    categoria = f"{prefijo_match.group(1)}. " + detectar_categoria(prefijo_match.group(1)) if prefijo_match else "SIN_CATEGORIA"
-
-    subrol = extraer_subrol_constancia(nombre)
-    fecha_match = re.search(r"(\d{2})[-_/](\d{2})[-_/](\d{4})", nombre)
-    anio = fecha_match.group(3) if fecha_match else "SIN_FECHA"
-
+    cuenta, prefijo, subrol, anio = vista_auditoria(nombre)
+    categoria = f"{prefijo}. " + detectar_categoria(prefijo) if prefijo else "SIN_CATEGORIA"
     return cuenta, categoria, subrol, anio
 
 def detectar_categoria(prefijo):
@@ -93,68 +102,142 @@ def detectar_categoria(prefijo):
     return categorias.get(prefijo, "OTROS")
 
 def extraer_subrol_constancia(nombre):
-    if "SOCIEDAD" in nombre:
-        return "SOCIEDAD"
-    if re.search(r"CUIT[\s\-_]*RL", nombre) or "REPRESENTANTE LEGAL" in nombre:
-        return "REPRESENTANTE LEGAL"
-    if re.search(r"CUIT[\s\-_]*BF", nombre) or "BENEFICIARIO FINAL" in nombre or re.search(r"\bBF\b", nombre):
-        return "BENEFICIARIOS FINALES"
-    if re.search(r"\bT[.\s_-]", nombre):
-        return "TITULAR"
-    match = re.search(r"\bC(\d+)(?=[.\s_-])", nombre)
-    if match:
-        return f"COTITULAR {match.group(1)}"
-    return "OTROS"
-
-# 🚀 Procesamiento
-def procesar_archivos():
-    for archivo in os.listdir(RUTA_ENTRADA):
-        ruta_archivo = os.path.join(RUTA_ENTRADA, archivo)
+    return subrol_de(nombre)
+
+# 🚀 Procesamiento de un archivo (lote o modo vigilancia)
+def procesar_archivo(ruta_archivo, hash_actual=None, filas=None):
+    """
+    Archiva un documento y devuelve su estado. Si se pasa filas, agrega la fila
+    del resumen con el mismo formato que archivado_automatico.procesar_archivos.
+    """
+    inicio = time.perf_counter()
+    archivo = os.path.basename(ruta_archivo)
+    if hash_actual is None:
         hash_actual = calcular_hash_archivo(ruta_archivo)
 
-        # Colisión
-        colision = detectar_colision(hash_actual, ruta_archivo)
-        if colision:
-            registrar_evento(archivo, "-", "-", "-", colision["estado"], hash_actual)
-            print(f"⚠️ Colisión detectada: {archivo}")
-            continue
-
-        # Duplicado físico
-        if hash_actual in hashes_existentes and os.path.exists(hashes_existentes[hash_actual]["ruta"]):
-            registrar_evento(archivo, "-", "-", "-", "Duplicado", hash_actual)
-            print(f"🛑 Duplicado detectado: {archivo}")
-            continue
-
-        # Clasificación
-        cuenta, categoria, subrol, anio = extraer_datos(archivo)
-        destino = os.path.join(RUTA_SALIDA, cuenta, categoria, subrol, anio, archivo)
-        os.makedirs(os.path.dirname(destino), exist_ok=True)
+    # Colisión
+    colision = detectar_colision(hash_actual, ruta_archivo)
+    if colision:
+        registrar_evento(archivo, "-", "-", "-", colision["estado"], hash_actual)
+        _agregar_fila(filas, archivo, ruta_archivo, hash_actual, error=colision["estado"])
+        log.warning("⚠️ Colisión detectada: %s", archivo)
+        metricas_flujo.sumar("colisiones")
+        return colision["estado"]
+
+    # Duplicado físico
+    if hash_actual in hashes_existentes and os.path.exists(hashes_existentes[hash_actual]["ruta"]):
+        registrar_evento(archivo, "-", "-", "-", "Duplicado", hash_actual)
+        _agregar_fila(filas, archivo, ruta_archivo, hash_actual, error="Duplicado por hash")
+        log.warning("🛑 Duplicado detectado: %s", archivo)
+        metricas_flujo.sumar("duplicados")
+        return "Duplicado"
+
+    # Clasificación
+    cuenta, categoria, subrol, anio = extraer_datos(archivo)
+    destino = os.path.join(RUTA_SALIDA, cuenta, categoria, subrol, anio, archivo)
+    asegurar_directorio(os.path.dirname(destino))
+
+    # Movimiento con bitácora de intención: planificado → movido → registrado
+    entrada = {
+        "archivo": archivo, "origen": ruta_archivo, "destino": destino, "hash": hash_actual,
+        "cuenta": cuenta, "categoria": categoria, "subrol": subrol
+    }
+    id_movimiento = bitacora_movimientos.planificar(**entrada)
+    inicio_movimiento = time.perf_counter()
+    try:
         os.rename(ruta_archivo, destino)
-
-        # Registro
-        hashes_existentes[hash_actual] = {
-            "ruta": destino,
-            "tamano": os.path.getsize(destino),
-            "modificado": os.path.getmtime(destino)
-        }
-        registrar_evento(archivo, cuenta, categoria, subrol, "Procesado", hash_actual)
-        print(f"📦 Movido: {archivo} → {destino}")
+    except OSError:
+        bitacora_movimientos.descartar(id_movimiento)
+        metricas_flujo.sumar("errores")
+        raise
+    metricas_flujo.observar("movimiento", time.perf_counter() - inicio_movimiento)
+    bitacora_movimientos.movido(id_movimiento, hash_actual)
+
+    # Registro
+    registrar_movimiento(entrada, "Procesado")
+    bitacora_movimientos.registrado(id_movimiento)
+    metricas_flujo.sumar("archivos_movidos")
+    metricas_flujo.sumar("bytes_movidos", hashes_existentes[hash_actual]["tamano"])
+    metricas_flujo.observar("archivo", time.perf_counter() - inicio)
+    _agregar_fila(filas, archivo, ruta_archivo, hash_actual, destino=destino, cuenta=cuenta,
+                  categoria=categoria, subrol=subrol, anio=anio)
+    log.info("📦 Movido: %s → %s", archivo, destino)
+    return "Procesado"
+
+def _agregar_fila(filas, archivo, origen, hash_actual, **datos):
+    if filas is not None:
+        filas.append(dict({"archivo": archivo, "origen": origen, "cuenta": None, "categoria": None,
+                           "hash": hash_actual}, **datos))
+
+def registrar_movimiento(entrada, estado):
+    destino = entrada["destino"]
+    hashes_existentes[entrada["hash"]] = {
+        "ruta": destino,
+        "tamano": os.path.getsize(destino),
+        "modificado": os.path.getmtime(destino)
+    }
+    indice_integridad.agregar(destino, entrada["hash"])
+    registrar_evento(entrada["archivo"], entrada["cuenta"], entrada["categoria"], entrada["subrol"], estado, entrada["hash"])
+
+# 🩹 Recuperación de movimientos interrumpidos (al arrancar)
+def recuperar_movimientos():
+    # El índice de integridad arranca con lo que ya estaba archivado
+    construidos = indice_integridad.construir_si_falta()
+    if construidos is not None:
+        log.info(f"🔐 Índice de integridad construido desde el disco: {construidos} documentos")
+    resultado = bitacora_movimientos.recuperar(lambda entrada: registrar_movimiento(entrada, "Recuperado"))
+    for clave in ("rehechos", "revertidos", "perdidos"):
+        if resultado[clave]:
+            log.info(f"🩹 Movimientos {clave} al recuperar: {len(resultado[clave])}")
+    return resultado
+
+# 🚀 Procesamiento por lote
+def procesar_archivos(hilos=None):
+    """Archiva la bandeja de entrada y devuelve las filas del resumen (lista vacía si no había nada)."""
+    recuperar_movimientos()
+    hilos = hilos or obtener_hilos_hash(RUTA_CONFIG)
+    rutas = [os.path.join(RUTA_ENTRADA, archivo) for archivo in os.listdir(RUTA_ENTRADA)]
+    metricas_flujo.sumar("archivos_vistos", len(rutas))
+    precalentar(RUTA_SALIDA, {extraer_datos(os.path.basename(ruta))[0] for ruta in rutas})
+
+    # Hash anticipado en paralelo; colisiones y duplicados se deciden en orden
+    filas = []
+    for ruta_archivo, hash_anticipado in hashear_en_paralelo(rutas, hilos, calcular_hash_archivo):
+        procesar_archivo(ruta_archivo, hash_anticipado.result(), filas)
+
+    guardar_cache()
+    indice_integridad.guardar()
+    directorios = estadisticas_directorios()
+    log.info(f"📁 Caché de directorios: {directorios['evitadas']} consultas evitadas, {directorios['consultas']} realizadas")
+    metricas_flujo.fijar("cache_hash_aciertos", estadisticas_cache()["aciertos"])
+    metricas_flujo.fijar("directorios_creados", directorios["creados"])
+    metricas_flujo.fijar("directorios_consultados", directorios["consultas"])
+    return filas
 
 # 📄 Reporte final
+def resumir_auditoria():
+    # Los eventos ya están en disco: se informan solo los totales por estado
+    log.info(f"📄 Log de auditoría: {len(log_auditoria)} eventos en {log_auditoria.ruta or '-'}")
+    for estado, cantidad in sorted(log_auditoria.por_estado.items(), key=lambda e: str(e[0])):
+        log.info(f"   {estado}: {cantidad}")
+
+def resumir_integridad():
+    log.info(f"🔐 Raíz de integridad del archivo: {indice_integridad.raiz() or '-'}")
+
 def generar_reporte():
-    print("\n📄 Log de auditoría:")
-    for e in log_auditoria:
-        print(f"{e['fecha']} | {e['estado']} | {e['archivo']} → {e['cuenta']}/{e['categoria']}/{e['subrol']}")
+    resumir_auditoria()
+    resumir_integridad()
 
     inconsistencias = detectar_inconsistencias()
     if inconsistencias:
-        print("\n⚠️ Inconsistencias detectadas:")
+        log.warning("⚠️ Inconsistencias detectadas:")
         for i in inconsistencias:
-            print(f"🔍 Hash: {i['hash']} | Ruta esperada: {i['ruta_esperada']} | Estado: {i['estado']}")
+            log.info(f"🔍 Hash: {i['hash']} | Ruta esperada: {i['ruta_esperada']} | Estado: {i['estado']}")
     else:
-        print("\n✅ No se detectaron inconsistencias.")
+        log.info("✅ No se detectaron inconsistencias.")
 
 # 🧠 Ejecución
 if __name__ == "__main__":
+    configurar_registro()
     procesar_archivos()
     generar_reporte()
@@ -1,17 +1,38 @@
 # --- Importaciones ---
-import os, shutil, re, pandas as pd
+import os
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 import unicodedata
 
 from scripts.hash_checker import (
-    calcular_hash_archivo, cargar_hashes, guardar_hashes, es_duplicado
+    calcular_hash_archivo, cargar_hashes, guardar_hashes, es_duplicado, prefiltrar_candidatos
 )
+from scripts.registro_hashes import completar_legados
+from scripts.motor_hash import calcular_hash_parcial, mover_con_hash, mismo_volumen
+from scripts.config_loader import obtener_parametros_pipeline, obtener_rutas_metricas
+from scripts.cache_hash import registrar_hash, guardar_cache, estadisticas_cache
+from scripts.comitentes import cargar_comitentes
+from scripts.parser_nombres import tokenizar, subrol_de
+from scripts.bitacora_movimientos import BitacoraMovimientos
+from scripts.pipeline_etapas import Pipeline, Etapa
+from scripts.cache_directorios import (
+    precalentar, asegurar_directorio, existe as existe_directorio, olvidar, estadisticas_directorios
+)
+from scripts import metricas_flujo
+from scripts.registro_eventos import obtener_logger, configurar_registro
+from scripts.indice_merkle import IndiceMerkle
 
 # --- Configuración ---
-CARPETA_ORIGEN = Path("C:\Users\ALEJANDRA\Desktop\LEGAJOS\Docupen")
+CARPETA_ORIGEN = Path(r"C:\Users\ALEJANDRA\Desktop\LEGAJOS\Docupen")
 BASE_PATH = Path("C:/Legajos")
 EXCEL_CUENTAS = Path("config/cuentas.xlsx")
+RUTA_CONFIG = "config/config.ini"
+RUTA_MOVIMIENTOS = "scripts/movimientos_automatico.jsonl"
+
+metricas_pipeline = {}  # métricas por etapa de la última ejecución
+log = obtener_logger("automatico")
 
 ESTRUCTURA_CARPETAS = {
     "humana": [
@@ -32,66 +53,23 @@ def normalizar(texto):
     return unicodedata.normalize("NFKD", texto).encode("ASCII", "ignore").decode("ASCII").lower().strip()
 
 def cargar_cuentas_desde_excel(ruta_excel):
-    df = pd.read_excel(ruta_excel)
+    mapas = cargar_comitentes(ruta_excel)
     cuentas_dict = {}
-    for _, row in df.iterrows():
-        cuenta = str(row["Comitente  -Número"]).strip()
-        tipo_raw = str(row["Comitente  -Tipo de Comitente"])
-        tipo_normalizado = normalizar(tipo_raw)
-        if "juridica" in tipo_normalizado:
-            tipo = "juridica"
-        elif "fisica" in tipo_normalizado:
-            tipo = "humana"
-        else:
-            tipo = "desconocido"
-            print(f"⚠️ Tipo no reconocido para cuenta {cuenta}: '{tipo_raw}' → asignado como 'desconocido'")
-        cuentas_dict[cuenta] = tipo
+    for cuenta, tipo in mapas["tipo"].items():
+        if tipo == "desconocido":
+            log.warning(f"⚠️ Tipo no reconocido para cuenta {cuenta}: '{mapas['tipo_original'][cuenta]}' → asignado como 'desconocido'")
+        cuentas_dict[cuenta] = "humana" if tipo == "fisica" else tipo
     return cuentas_dict
 
 def extraer_datos_desde_nombre(nombre_archivo):
-    nombre_sin_ext = os.path.splitext(nombre_archivo)[0]
-    nombre_sin_ext = re.sub(r"[_\-]", " ", nombre_sin_ext)
-    nombre_sin_ext = re.sub(r"\s+", " ", nombre_sin_ext).strip()
-
-    match_prefijo = re.match(r"^(0[1-9]|1[0-4])\.(\-)?(\d+)", nombre_sin_ext)
-    if match_prefijo:
-        prefijo = f"{match_prefijo.group(1)}."
-        nro_cuenta = match_prefijo.group(3)
-        resto = nombre_sin_ext.replace(match_prefijo.group(0), "").strip()
-    else:
-        partes = nombre_sin_ext.split(" ")
-        prefijo = partes[0] if partes[0].endswith(".") or partes[0].endswith(".-") else None
-        offset = 1 if prefijo else 0
-        nro_cuenta = partes[offset] if len(partes) > offset and partes[offset].isdigit() else None
-        resto = " ".join(partes[offset+1:])
-
-    if not nro_cuenta:
-        return None, None, None, None
-
-    fecha_raw = re.search(r"\d{2}-\d{2}-\d{4}", nombre_sin_ext)
-    fecha_raw = fecha_raw.group() if fecha_raw else None
-    fecha = fecha_raw.replace("-", "") if fecha_raw else datetime.now().strftime("%d%m%Y")
-
-    if not re.match(r"^(0[1-9]|[12][0-9]|3[01])(0[1-9]|1[0-2])\d{4}$", fecha):
+    datos = tokenizar(nombre_archivo)
+    if not datos.cuenta:
         return None, None, None, None
-
-    tipo_doc = None
-    for parte in resto.split():
-        if re.search(r"T\.|C\d+\.", parte.upper()):
-            tipo_doc = re.sub(r"[^\w]", "", parte.upper())
-            break
-
-    nombre_doc = resto
-    for elemento in [fecha_raw, tipo_doc]:
-        if elemento:
-            nombre_doc = nombre_doc.replace(elemento, "")
-    nombre_doc = nombre_doc.strip()
-
-    return nro_cuenta, tipo_doc, nombre_doc, fecha
+    # Como antes: al normalizar "-" a espacio la fecha del nombre no se conserva y se usa la del día
+    return datos.cuenta, datos.rol, datos.descripcion, datetime.now().strftime("%d%m%Y")
 
 def obtener_prefijo(nombre_archivo):
-    partes = nombre_archivo.split()
-    return partes[0] if partes and (partes[0].endswith(".-") or partes[0].endswith(".")) else None
+    return tokenizar(nombre_archivo).prefijo
 
 def detectar_categoria_por_prefijo(prefijo, categorias_validas):
     if not isinstance(prefijo, str):
@@ -102,145 +80,333 @@ def detectar_categoria_por_prefijo(prefijo, categorias_validas):
     return None
 
 def extraer_anio(nombre):
-    match = re.search(r"\d{2}-\d{2}-\d{4}", nombre)
-    if match:
-        try:
-            fecha = datetime.strptime(match.group(), "%d-%m-%Y")
-            return str(fecha.year)
-        except:
-            pass
-    return "SIN_FECHA"
+    return tokenizar(nombre).anio
 
 def extraer_subrol_constancia(nombre):
-    nombre = nombre.upper()
-    if "SOCIEDAD" in nombre:
-        return "SOCIEDAD"
-    if re.search(r"CUIT[\s\-_]*RL", nombre) or "REPRESENTANTE LEGAL" in nombre:
-        return "REPRESENTANTE LEGAL"
-    if re.search(r"CUIT[\s\-_]*BF", nombre) or "BENEFICIARIO FINAL" in nombre or re.search(r"\bBF\b", nombre):
-        return "BENEFICIARIOS FINALES"
-    if re.search(r"\bT[\.\s_-]", nombre):
-        return "TITULAR"
-    match = re.search(r"\bC(\d+)(?=[.\s_-])", nombre)
-    if match:
-        return f"COTITULAR {match.group(1)}"
-    return "OTROS"
- 
+    return subrol_de(nombre)
+
 def asegurar_estructura(base_path, nro_cuenta, categorias_validas):
     carpeta_cuenta = base_path / nro_cuenta
-    if not carpeta_cuenta.exists():
-        carpeta_cuenta.mkdir(parents=True)
-        print(f"📁 Carpeta creada para cuenta: {nro_cuenta}")
+    if not existe_directorio(carpeta_cuenta):
+        asegurar_directorio(carpeta_cuenta)
+        log.info(f"📁 Carpeta creada para cuenta: {nro_cuenta}")
         for sub in categorias_validas:
-            (carpeta_cuenta / sub).mkdir(exist_ok=True)
-            print(f"📂 Subcarpeta creada: {sub}")
+            asegurar_directorio(carpeta_cuenta / sub)
+            log.debug("📂 Subcarpeta creada: %s", sub)
     return carpeta_cuenta
 
+# --- Registro de un movimiento (flujo normal y recuperación) ---
+def registrar_movimiento(hashes_existentes, entrada, indice=None):
+    registrar_hash(entrada["destino"], entrada["hash"])
+    hashes_existentes.registrar(entrada["archivo"], entrada["hash"], entrada.get("tamano"), entrada.get("parcial"))
+    guardar_hashes(hashes_existentes)
+    if indice is not None:
+        indice.agregar(entrada["destino"], entrada["hash"])
+
+def recuperar_movimientos(bitacora, hashes_existentes, indice=None):
+    """Completa los movimientos que quedaron a medias en una ejecución interrumpida."""
+    resultado = bitacora.recuperar(lambda entrada: registrar_movimiento(hashes_existentes, entrada, indice))
+    for clave in ("rehechos", "revertidos", "perdidos"):
+        if resultado[clave]:
+            log.info(f"🩹 Movimientos {clave} al recuperar: {len(resultado[clave])}")
+    for entrada in resultado["perdidos"]:
+        log.warning(f"⚠️ No se encontró ni origen ni destino: {entrada['origen']} → {entrada['destino']}")
+    return [{
+        "archivo": e["archivo"],
+        "origen": e["origen"],
+        "destino": e["destino"],
+        "cuenta": e.get("cuenta"),
+        "categoria": e.get("categoria"),
+        "subrol": e.get("subrol"),
+        "anio": e.get("anio"),
+        "hash": e["hash"],
+        "recuperado": True
+    } for e in resultado["rehechos"]]
+
 # --- Flujo principal ---
-def procesar_archivos():
+def procesar_archivos(hilos=None):
+    """
+    Archiva los documentos de Docupen con un pipeline por etapas:
+    escanear → clasificar → hashear → deduplicar → mover → registrar.
+    Las filas del resumen salen en el mismo orden y con el mismo contenido
+    que en el recorrido secuencial.
+    """
+    global metricas_pipeline
     resumen = []
     cuentas_dict = cargar_cuentas_desde_excel(EXCEL_CUENTAS)
 
+    # Primero se cierran los movimientos que una ejecución anterior dejó en vuelo
+    bitacora = BitacoraMovimientos(RUTA_MOVIMIENTOS)
+    hashes_existentes = cargar_hashes()
+    indice = IndiceMerkle(BASE_PATH)  # árbol de integridad junto al archivo
+    construidos = indice.construir_si_falta()
+    if construidos is not None:
+        log.info("🔐 Índice de integridad construido desde el disco: %s documentos", construidos)
+    resumen.extend(recuperar_movimientos(bitacora, hashes_existentes, indice))
+
     if not CARPETA_ORIGEN.exists():
-        print("❌ Carpeta de origen no encontrada.")
-        return []
+        log.error("❌ Carpeta de origen no encontrada.")
+        indice.cerrar()
+        return resumen
 
     archivos = list(CARPETA_ORIGEN.glob("*.*"))
     if not archivos:
-        print("⚠️ No se encontraron archivos en Docupen.")
-        return []
-
-    hashes_existentes = cargar_hashes()
+        log.warning("⚠️ No se encontraron archivos en Docupen.")
+        indice.cerrar()
+        return resumen
+    metricas_flujo.sumar("archivos_vistos", len(archivos))
+
+    # Directorios conocidos: un recorrido de las cuentas del lote, después cero consultas
+    precalentar(BASE_PATH, {tokenizar(a.name).cuenta for a in archivos} - {None})
+
+    if hashes_existentes.hay_legados():
+        completar_legados(hashes_existentes, BASE_PATH)
+    parametros = obtener_parametros_pipeline(RUTA_CONFIG)
+    if hilos:
+        parametros["hashear"] = hilos
+
+    # Prefiltro de duplicados: tamaño → hash parcial → SHA-256 solo para candidatos.
+    # Necesita el lote completo, por eso se resuelve antes de arrancar las etapas.
+    tamanos = {str(archivo): archivo.stat().st_size for archivo in archivos}
+    candidatos, parciales = prefiltrar_candidatos(tamanos, hashes_existentes)
+    log.info(f"🔎 Candidatos a duplicado: {len(candidatos)} de {len(archivos)}")
+
+    # Entre volúmenes el resto se hashea durante la copia; en el mismo volumen
+    # el movimiento es un rename y todos se hashean en la etapa de hash
+    a_hashear = set(tamanos) if mismo_volumen(CARPETA_ORIGEN, BASE_PATH) else candidatos
+
+    lock_estructura = threading.Lock()
+    en_vuelo = {}        # hash → resolución del movimiento aceptado con ese hash
+    cortado = []         # error de hash: los archivos siguientes no se tocan
+
+    def fila_error_movimiento(elemento, e):
+        log.error("❌ Error al mover %s: %s", elemento["archivo"].name, e)
+        metricas_flujo.sumar("errores")
+        if isinstance(e, FileNotFoundError):
+            olvidar(elemento["carpeta_cuenta"])  # se borró por fuera: se vuelve a consultar
+        elemento["fila"] = {
+            "archivo": elemento["archivo"].name,
+            "origen": elemento["origen"],
+            "error": str(e),
+            "cuenta": elemento["cuenta"],
+            "categoria": elemento["categoria"]
+        }
+
+    def fila_duplicado(elemento, hash_actual):
+        log.warning("🛑 Duplicado detectado por hash: %s", elemento["archivo"].name)
+        metricas_flujo.sumar("duplicados")
+        elemento["fila"] = {
+            "archivo": elemento["archivo"].name,
+            "origen": elemento["origen"],
+            "error": "Duplicado por hash",
+            "cuenta": elemento["cuenta"],
+            "categoria": elemento["categoria"],
+            "hash": hash_actual
+        }
 
-    for archivo in archivos:
-        print(f"\n➡️ Procesando: {archivo.name}")
+    # 🏷️ Etapa: nombre → cuenta, categoría y carpeta destino
+    def clasificar(archivo):
+        log.debug("➡️ Procesando: %s", archivo.name)
+        elemento = {"archivo": archivo, "origen": str(archivo), "fila": None, "inicio": time.perf_counter()}
+        datos = tokenizar(archivo.name)
         nro_cuenta, tipo_doc, nombre_doc, fecha = extraer_datos_desde_nombre(archivo.name)
-        origen_path = str(archivo)
 
         if not nro_cuenta or not nombre_doc:
-            print(f"❌ Nombre inválido: {archivo.name}")
-            resumen.append({
+            log.error("❌ Nombre inválido: %s", archivo.name)
+            metricas_flujo.sumar("errores")
+            elemento["fila"] = {
                 "archivo": archivo.name,
-                "origen": origen_path,
+                "origen": elemento["origen"],
                 "error": "Nombre inválido",
                 "cuenta": None,
                 "categoria": None
-            })
-            continue
+            }
+            return elemento
 
         tipo_cliente = cuentas_dict.get(nro_cuenta, "humana")
-        print(f"🔍 Cuenta {nro_cuenta} detectada como tipo: {tipo_cliente}")
+        log.debug("🔍 Cuenta %s detectada como tipo: %s", nro_cuenta, tipo_cliente)
         categorias_validas = ESTRUCTURA_CARPETAS.get(tipo_cliente, [])
-        carpeta_cuenta = asegurar_estructura(BASE_PATH, nro_cuenta, categorias_validas)
+        with lock_estructura:
+            carpeta_cuenta = asegurar_estructura(BASE_PATH, nro_cuenta, categorias_validas)
 
-        prefijo = obtener_prefijo(archivo.name)
-        print(f"🔎 Prefijo detectado: {prefijo}")
+        prefijo = datos.prefijo
+        log.debug("🔎 Prefijo detectado: %s", prefijo)
         categoria_match = detectar_categoria_por_prefijo(prefijo, categorias_validas)
-        anio = extraer_anio(archivo.name)
-        subrol = extraer_subrol_constancia(nombre_doc)
 
         if categoria_match:
-            destino_final = carpeta_cuenta / categoria_match / subrol / anio
+            destino_final = carpeta_cuenta / categoria_match / datos.subrol / datos.anio
         else:
             fallback = "14. OTROS" if tipo_cliente == "juridica" else "10. OTROS"
-            destino_final = carpeta_cuenta / fallback / subrol / anio
-
-        destino_final.mkdir(parents=True, exist_ok=True)
-
-        hash_actual = calcular_hash_archivo(str(archivo))
-        if es_duplicado(hash_actual, hashes_existentes):
-            print(f"🛑 Duplicado detectado por hash: {archivo.name}")
-            resumen.append({
-                "archivo": archivo.name,
-                "origen": origen_path,
-                "error": "Duplicado por hash",
-                "cuenta": nro_cuenta,
-                "categoria": categoria_match,
-                "hash": hash_actual
-            })
-            continue
+            destino_final = carpeta_cuenta / fallback / datos.subrol / datos.anio
 
+        asegurar_directorio(destino_final)
+        elemento.update({
+            "cuenta": nro_cuenta, "categoria": categoria_match, "tipo_cliente": tipo_cliente,
+            "tipo_doc": tipo_doc, "subrol": datos.subrol, "fecha": fecha, "anio": datos.anio,
+            "carpeta_cuenta": carpeta_cuenta, "destino_final": destino_final
+        })
+        return elemento
+
+    # 🔐 Etapa: SHA-256 de los que lo necesitan por delante del movimiento
+    def hashear(elemento):
+        if elemento["fila"] is None:
+            try:
+                ruta = elemento["origen"]
+                elemento["hash"] = calcular_hash_archivo(ruta) if ruta in a_hashear else None
+            except Exception as e:
+                elemento["error_hash"] = e  # se relanza al registrar, en su turno
+        return elemento
+
+    # 🛑 Etapa ordenada: duplicados contra el registro y contra el propio lote
+    def deduplicar(elemento):
+        if cortado:
+            elemento["omitido"] = True
+            return elemento
+        if "error_hash" in elemento:
+            cortado.append(elemento)
+            return elemento
+        if elemento["fila"] is not None:
+            return elemento
+        if elemento["origen"] not in candidatos:
+            # Ya hasheado (mismo volumen): solo puede coincidir con un heredado sin archivo
+            if elemento["hash"] is None or not hashes_existentes.hay_sin_archivo():
+                return elemento
+
+        hash_actual = elemento["hash"]
+        previo = en_vuelo.get(hash_actual)
+        if previo is not None:
+            # Otro archivo del lote con el mismo hash va delante: decide su movimiento
+            pipeline.esperar(previo["listo"])
+            duplicado = previo["movido"]
+        else:
+            duplicado = es_duplicado(hash_actual, hashes_existentes)
+
+        if duplicado:
+            fila_duplicado(elemento, hash_actual)
+            return elemento
+
+        elemento["resolucion"] = en_vuelo[hash_actual] = {"listo": threading.Event(), "movido": False}
+        return elemento
+
+    # 🚚 Etapa: movimiento con bitácora de intención
+    def mover(elemento):
+        if elemento["fila"] is not None or elemento.get("omitido") or "error_hash" in elemento:
+            return elemento
+        archivo = elemento["archivo"]
+        origen_path = elemento["origen"]
+        resolucion = elemento.get("resolucion")
         try:
-            shutil.move(str(archivo), str(destino_final / archivo.name))
-            print(f"📦 Movido: {archivo.name} → {destino_final}")
-            hashes_existentes[archivo.name] = hash_actual
-            guardar_hashes(hashes_existentes)
+            parcial = parciales.get(origen_path) or calcular_hash_parcial(origen_path)
+            entrada = {
+                "archivo": archivo.name, "origen": origen_path,
+                "destino": str(elemento["destino_final"] / archivo.name),
+                "tamano": tamanos[origen_path], "parcial": parcial,
+                "cuenta": elemento["cuenta"], "categoria": elemento["categoria"],
+                "subrol": elemento["subrol"], "anio": elemento["anio"]
+            }
+            # Sin hash previo (copia entre volúmenes) el de la copia se compara
+            # contra los heredados sin archivo antes de borrar el origen
+            aceptar = None
+            if elemento["hash"] is None and hashes_existentes.hay_sin_archivo():
+                def aceptar(h):
+                    elemento["hash"] = h
+                    return not es_duplicado(h, hashes_existentes)
+            id_movimiento = bitacora.planificar(**entrada)
+            inicio = time.perf_counter()
+            try:
+                hash_actual = mover_con_hash(origen_path, entrada["destino"], elemento["hash"], aceptar)
+            except Exception:
+                bitacora.descartar(id_movimiento)
+                raise
+            if hash_actual is None:
+                bitacora.descartar(id_movimiento)
+                fila_duplicado(elemento, elemento["hash"])
+                return elemento
+            metricas_flujo.observar("movimiento", time.perf_counter() - inicio)
+            bitacora.movido(id_movimiento, hash_actual)
+            log.info("📦 Movido: %s → %s", archivo.name, elemento["destino_final"])
+            elemento.update({"hash": hash_actual, "entrada": dict(entrada, hash=hash_actual),
+                             "id_movimiento": id_movimiento})
+            if resolucion:
+                resolucion["movido"] = True
         except Exception as e:
-            print(f"❌ Error al mover {archivo.name}: {e}")
-            resumen.append({
-                "archivo": archivo.name,
-                "origen": origen_path,
-                "error": str(e),
-                "cuenta": nro_cuenta,
-                "categoria": categoria_match
-            })
-            continue
-
-        resumen.append({
-            "archivo": archivo.name,
-            "origen": origen_path,
-            "destino": str(destino_final / archivo.name),
-            "cuenta": nro_cuenta,
-            "categoria": categoria_match,
-            "tipo_cliente": tipo_cliente,
-            "tipo_doc": tipo_doc,
-            "subrol": subrol,
-            "fecha": fecha,
-            "anio": anio,
-            "hash": hash_actual
-        })
-
+            fila_error_movimiento(elemento, e)
+        finally:
+            if resolucion:
+                resolucion["listo"].set()
+        return elemento
+
+    # 🗂️ Etapa final (hilo principal, SQLite): registro y fila del resumen
+    def registrar(elemento):
+        if "error_hash" in elemento:
+            raise elemento["error_hash"]
+        if elemento["fila"] is not None:
+            return elemento
+        try:
+            registrar_movimiento(hashes_existentes, elemento["entrada"], indice)
+            bitacora.registrado(elemento["id_movimiento"])
+        except Exception as e:
+            fila_error_movimiento(elemento, e)
+            return elemento
+
+        metricas_flujo.sumar("archivos_movidos")
+        metricas_flujo.sumar("bytes_movidos", elemento["entrada"]["tamano"])
+        metricas_flujo.observar("archivo", time.perf_counter() - elemento["inicio"])
+        elemento["fila"] = {
+            "archivo": elemento["archivo"].name,
+            "origen": elemento["origen"],
+            "destino": elemento["entrada"]["destino"],
+            "cuenta": elemento["cuenta"],
+            "categoria": elemento["categoria"],
+            "tipo_cliente": elemento["tipo_cliente"],
+            "tipo_doc": elemento["tipo_doc"],
+            "subrol": elemento["subrol"],
+            "fecha": elemento["fecha"],
+            "anio": elemento["anio"],
+            "hash": elemento["hash"]
+        }
+        return elemento
+
+    pipeline = Pipeline([
+        Etapa("clasificar", clasificar, parametros["clasificar"]),
+        Etapa("hashear", hashear, parametros["hashear"]),
+        Etapa("deduplicar", deduplicar, ordenada=True),
+        Etapa("mover", mover, parametros["mover"]),
+        Etapa("registrar", registrar, ordenada=True)
+    ], capacidad=parametros["capacidad"], nombre_fuente="escanear")
+    try:
+        resumen.extend(elemento["fila"] for elemento in pipeline.ejecutar(archivos))
+    finally:
+        bitacora.cerrar()
+        indice.cerrar()
+        metricas_pipeline = pipeline.metricas()
+        metricas_flujo.registrar_pipeline(metricas_pipeline)
+
+    guardar_cache()
+    cache = estadisticas_cache()
+    log.info(f"🗃️ Caché de hashes: {cache['aciertos']} aciertos, {cache['fallos']} lecturas")
+    directorios = estadisticas_directorios()
+    metricas_flujo.fijar("cache_hash_aciertos", cache["aciertos"])
+    metricas_flujo.fijar("directorios_creados", directorios["creados"])
+    metricas_flujo.fijar("directorios_consultados", directorios["consultas"])
+    log.info(f"📁 Caché de directorios: {directorios['evitadas']} consultas evitadas, {directorios['consultas']} realizadas")
+    for nombre, etapa in metricas_pipeline.items():
+        log.info(f"⏱️ Etapa {nombre}: {etapa['procesados']} en {etapa['ocupado']:.2f}s ocupados "
+                 f"({etapa['hilos']} hilos, cola máx. {etapa['max_en_cola']}, {etapa['por_segundo']}/s)")
     return resumen
 
 # --- Ejecución directa ---
 if __name__ == "__main__":
-    resumen = procesar_archivos()
-    print(f"\n✅ Archivos procesados: {len(resumen)}")
+    configurar_registro()
+    with metricas_flujo.medir("archivado"):
+        resumen = procesar_archivos()
+    log.info(f"✅ Archivos procesados: {len(resumen)}")
 
     errores = [r for r in resumen if "error" in r and r["error"]]
     if errores:
-        print(f"⚠️ Archivos con error: {len(errores)}")
+        log.warning(f"⚠️ Archivos con error: {len(errores)}")
         for err in errores:
-            print(f"   - {err['archivo']} → {err['error']}")
+            log.info(f"   - {err['archivo']} → {err['error']}")
     else:
-        print("🎉 Todos los archivos fueron archivados correctamente.")
+        log.info("🎉 Todos los archivos fueron archivados correctamente.")
+    metricas_flujo.exportar(*obtener_rutas_metricas(RUTA_CONFIG))
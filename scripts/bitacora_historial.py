@@ -0,0 +1,273 @@
+"""
+bitacora_historial.py
+
+Almacenamiento del historial como bitácora JSONL de solo agregado.
+
+- Una entrada por línea: agregar es O(1) y no reescribe lo existente
+- Recuperación ante caídas: una última línea cortada se descarta al reabrir
+- Lectura en streaming, sin cargar todo el historial en memoria
+- Compactación periódica (descarta líneas corruptas y eventos repetidos)
+- Migración única desde el historial JSON heredado; el archivo original no se toca
+- Índice persistente de claves (archivo, evento, hash) mantenido en forma incremental
+"""
+
+import json
+import os
+
+from scripts.registro_eventos import obtener_logger
+
+UMBRAL_COMPACTACION = 50_000  # entradas agregadas entre compactaciones
+BLOQUE_LECTURA = 64 * 1024
+log = obtener_logger("historial")
+
+# 📍 Rutas de la bitácora y sus metadatos
+def ruta_bitacora(ruta_historial):
+    return os.path.splitext(ruta_historial)[0] + ".jsonl"
+
+def ruta_meta(ruta_historial):
+    return ruta_bitacora(ruta_historial) + ".meta.json"
+
+def ruta_indice(ruta_historial):
+    return ruta_bitacora(ruta_historial) + ".idx"
+
+def _leer_meta(ruta_historial):
+    try:
+        with open(ruta_meta(ruta_historial), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def _guardar_meta(ruta_historial, meta):
+    ruta = ruta_meta(ruta_historial)
+    with open(f"{ruta}.tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(f"{ruta}.tmp", ruta)
+
+# ✍️ Escritura atómica completa (migración, compactación, guardado total)
+def _escribir_atomico(ruta_jsonl, entradas):
+    carpeta = os.path.dirname(ruta_jsonl)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    temporal = f"{ruta_jsonl}.tmp"
+    cantidad = 0
+    with open(temporal, "w", encoding="utf-8", newline="\n") as f:
+        for entrada in entradas:
+            f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+            cantidad += 1
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta_jsonl)
+    return cantidad
+
+# 📦 Migración desde el JSON heredado
+def _migrar_legado(ruta_historial):
+    ruta_jsonl = ruta_bitacora(ruta_historial)
+    if os.path.exists(ruta_jsonl):
+        return
+    entradas = []
+    if ruta_historial != ruta_jsonl and os.path.exists(ruta_historial):
+        try:
+            with open(ruta_historial, "r", encoding="utf-8") as f:
+                contenido = json.load(f)
+            if isinstance(contenido, list):
+                entradas = contenido
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            entradas = []
+    cantidad = _escribir_atomico(ruta_jsonl, entradas)
+    if cantidad:
+        log.info("📦 Historial migrado a bitácora JSONL: %s entradas → %s", cantidad, ruta_jsonl)
+
+# 🩹 Recuperación de una escritura interrumpida
+def _reparar_cola(ruta_jsonl):
+    """Trunca una última línea incompleta (sin salto final). Devuelve los bytes descartados."""
+    with open(ruta_jsonl, "r+b") as f:
+        tamano = f.seek(0, os.SEEK_END)
+        if tamano == 0:
+            return 0
+        f.seek(tamano - 1)
+        if f.read(1) == b"\n":
+            return 0
+
+        fin = tamano
+        while fin > 0:
+            inicio = max(0, fin - BLOQUE_LECTURA)
+            f.seek(inicio)
+            bloque = f.read(fin - inicio)
+            posicion = bloque.rfind(b"\n")
+            if posicion != -1:
+                corte = inicio + posicion + 1
+                break
+            fin = inicio
+        else:
+            corte = 0
+        f.truncate(corte)
+    log.warning("🩹 Bitácora reparada: %s bytes de una escritura incompleta descartados", tamano - corte)
+    return tamano - corte
+
+def abrir_bitacora(ruta_historial):
+    """Garantiza que la bitácora exista (migrando el JSON heredado) y tenga la cola sana."""
+    _migrar_legado(ruta_historial)
+    ruta_jsonl = ruta_bitacora(ruta_historial)
+    _reparar_cola(ruta_jsonl)
+    return ruta_jsonl
+
+# 📖 Lectura en streaming
+def leer_entradas(ruta_historial):
+    ruta_jsonl = ruta_bitacora(ruta_historial)
+    if not os.path.exists(ruta_jsonl):
+        _migrar_legado(ruta_historial)
+    with open(ruta_jsonl, "r", encoding="utf-8") as f:
+        for linea in f:
+            if not linea.endswith("\n"):
+                break  # cola incompleta: se repara en la próxima escritura
+            try:
+                yield json.loads(linea)
+            except json.JSONDecodeError:
+                continue
+
+# ➕ Agregado O(1)
+def agregar_entradas(ruta_historial, entradas):
+    """Agrega entradas al final con una única escritura y fsync. Devuelve cuántas agregó."""
+    lineas = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entradas)
+    if not lineas:
+        return 0
+    ruta_jsonl = abrir_bitacora(ruta_historial)
+    with open(ruta_jsonl, "a", encoding="utf-8", newline="\n") as f:
+        f.write(lineas)
+        f.flush()
+        os.fsync(f.fileno())
+
+    cantidad = lineas.count("\n")
+    meta = _leer_meta(ruta_historial)
+    meta["agregadas_desde_compactacion"] = meta.get("agregadas_desde_compactacion", 0) + cantidad
+    _guardar_meta(ruta_historial, meta)
+    if meta["agregadas_desde_compactacion"] >= UMBRAL_COMPACTACION:
+        compactar(ruta_historial)
+    return cantidad
+
+def generacion_actual(ruta_historial):
+    """Cambia con cada reescritura o compactación: invalida índices y acumulados derivados."""
+    return _leer_meta(ruta_historial).get("generacion", 0)
+
+# 🔄 Invalidar el índice tras una reescritura completa
+def _nueva_generacion(ruta_historial):
+    meta = _leer_meta(ruta_historial)
+    meta["generacion"] = meta.get("generacion", 0) + 1
+    meta["offset_indice"] = 0
+    meta["agregadas_desde_compactacion"] = 0
+    if os.path.exists(ruta_indice(ruta_historial)):
+        os.remove(ruta_indice(ruta_historial))
+    _guardar_meta(ruta_historial, meta)
+
+# 💾 Reemplazo total (compatibilidad con guardar_historial)
+def reescribir(ruta_historial, entradas):
+    _escribir_atomico(ruta_bitacora(ruta_historial), entradas)
+    _nueva_generacion(ruta_historial)
+
+# 🧹 Compactación
+def compactar(ruta_historial):
+    """
+    Reescribe la bitácora sin líneas corruptas ni eventos repetidos. La clave es
+    clave_evento (archivo, evento, hash), la misma que indexa historial_archivo:
+    con CLAVE_CON_HASH o sin él, solo se descartan entradas que ya estaban.
+    """
+    vistos = set()
+
+    def unicas():
+        for entrada in leer_entradas(ruta_historial):
+            clave = clave_evento(entrada)
+            if clave in vistos:
+                continue
+            vistos.add(clave)
+            yield entrada
+
+    ruta_jsonl = abrir_bitacora(ruta_historial)
+    cantidad = _escribir_atomico(ruta_jsonl, unicas())
+    _nueva_generacion(ruta_historial)
+    return cantidad
+
+# 🔑 Índice de eventos registrados
+def clave_evento(entrada):
+    return (entrada.get("archivo"), entrada.get("evento"), entrada.get("hash"))
+
+class IndiceEventos:
+    """
+    Claves de los eventos ya registrados, para deduplicar en O(1).
+    Se persiste como una clave JSON por línea en <bitácora>.idx; offset es la
+    posición de la bitácora hasta la que el índice está al día.
+    """
+
+    def __init__(self, generacion=0):
+        self.claves = set()
+        self.claves_hash = set()
+        self.offset = 0
+        self.generacion = generacion
+
+    def agregar(self, clave):
+        archivo, evento, h = clave
+        self.claves.add((archivo, evento))
+        self.claves_hash.add((archivo, evento, h))
+
+    def contiene(self, entrada, con_hash=False):
+        archivo, evento, h = clave_evento(entrada)
+        if con_hash:
+            return (archivo, evento, h) in self.claves_hash
+        return (archivo, evento) in self.claves
+
+    def __len__(self):
+        return len(self.claves_hash)
+
+_indices = {}
+
+# ⏩ Incorporar al índice lo agregado desde el último offset
+def _ponerse_al_dia(ruta_historial, indice, tamano):
+    with open(ruta_bitacora(ruta_historial), "rb") as bitacora, \
+            open(ruta_indice(ruta_historial), "a", encoding="utf-8", newline="\n") as salida:
+        bitacora.seek(indice.offset)
+        posicion = indice.offset
+        for linea in bitacora:
+            posicion += len(linea)
+            if posicion > tamano:
+                break
+            try:
+                clave = clave_evento(json.loads(linea))
+            except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+                continue
+            indice.agregar(clave)
+            salida.write(json.dumps(clave, ensure_ascii=False) + "\n")
+
+    indice.offset = tamano
+    meta = _leer_meta(ruta_historial)
+    meta["offset_indice"] = tamano
+    _guardar_meta(ruta_historial, meta)
+
+def cargar_indice(ruta_historial):
+    """
+    Devuelve el índice de eventos al día con la bitácora.
+    Se lee del archivo .idx una vez por proceso y luego solo se incorpora
+    lo agregado desde el último offset; tras una compactación se reconstruye.
+    """
+    ruta_jsonl = abrir_bitacora(ruta_historial)
+    tamano = os.path.getsize(ruta_jsonl)
+    meta = _leer_meta(ruta_historial)
+    generacion = meta.get("generacion", 0)
+
+    indice = _indices.get(ruta_jsonl)
+    if indice is None or indice.generacion != generacion or indice.offset > tamano:
+        indice = IndiceEventos(generacion)
+        offset = meta.get("offset_indice", 0)
+        if 0 < offset <= tamano and os.path.exists(ruta_indice(ruta_historial)):
+            with open(ruta_indice(ruta_historial), "r", encoding="utf-8") as f:
+                for linea in f:
+                    try:
+                        indice.agregar(tuple(json.loads(linea)))
+                    except (json.JSONDecodeError, TypeError, ValueError):
+                        continue
+            indice.offset = offset
+        elif os.path.exists(ruta_indice(ruta_historial)):
+            os.remove(ruta_indice(ruta_historial))
+        _indices[ruta_jsonl] = indice
+
+    if indice.offset < tamano:
+        _ponerse_al_dia(ruta_historial, indice, tamano)
+    return indice
@@ -0,0 +1,135 @@
+"""
+bitacora_movimientos.py
+
+Bitácora de intención (write-ahead) para los movimientos de archivado.
+
+- Cada movimiento pasa por: planificado → movido → registrado
+- "planificado" y "movido" se escriben con fsync antes de seguir; "registrado"
+  no lo necesita porque volver a registrar es idempotente
+- Sin movimientos en curso la bitácora se trunca: solo guarda lo que está en vuelo
+- Al arrancar, recuperar() rehace o revierte únicamente las entradas incompletas,
+  así que la recuperación cuesta O(archivos en vuelo), no O(Legajos)
+- "planificado" anota si el destino ya existía: la recuperación solo borra un
+  destino que haya creado el propio movimiento
+- Segura entre hilos: el pipeline de archivado mueve varios archivos a la vez
+"""
+
+import json
+import os
+import threading
+import uuid
+
+from scripts.motor_hash import calcular_sha256
+
+PLANIFICADO = "planificado"
+MOVIDO = "movido"
+REGISTRADO = "registrado"
+
+class BitacoraMovimientos:
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = None
+        self._abiertas = set()
+        self._lock = threading.Lock()
+
+    # ✍️ Escritura
+    def _escribir(self, registro, sincronizar=True):
+        if self._archivo is None:
+            carpeta = os.path.dirname(self.ruta)
+            if carpeta:
+                os.makedirs(carpeta, exist_ok=True)
+            self._archivo = open(self.ruta, "a", encoding="utf-8")
+        self._archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._archivo.flush()
+        if sincronizar:
+            os.fsync(self._archivo.fileno())
+
+    def planificar(self, origen, destino, **datos):
+        """Anota la intención de mover origen → destino. Devuelve el id del movimiento."""
+        id_movimiento = uuid.uuid4().hex
+        destino_existia = os.path.exists(destino)
+        with self._lock:
+            self._escribir(dict(datos, id=id_movimiento, estado=PLANIFICADO, origen=str(origen), destino=str(destino),
+                                destino_existia=destino_existia))
+            self._abiertas.add(id_movimiento)
+        return id_movimiento
+
+    def movido(self, id_movimiento, hash_archivo):
+        with self._lock:
+            self._escribir({"id": id_movimiento, "estado": MOVIDO, "hash": hash_archivo})
+
+    def registrado(self, id_movimiento):
+        with self._lock:
+            self._escribir({"id": id_movimiento, "estado": REGISTRADO}, sincronizar=False)
+            self._abiertas.discard(id_movimiento)
+            if not self._abiertas:
+                self._archivo.seek(0)
+                self._archivo.truncate()
+
+    def descartar(self, id_movimiento):
+        """El movimiento falló sin mover nada: se cierra como si no hubiera existido."""
+        self.registrado(id_movimiento)
+
+    def cerrar(self):
+        with self._lock:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
+
+    # 🩹 Recuperación al arrancar
+    def incompletas(self):
+        """Devuelve las entradas sin estado "registrado", con sus datos combinados."""
+        entradas = {}
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                for linea in f:
+                    try:
+                        registro = json.loads(linea)
+                    except json.JSONDecodeError:
+                        continue  # cola escrita a medias por el corte
+                    entradas.setdefault(registro["id"], {}).update(registro)
+        except FileNotFoundError:
+            return []
+        return [e for e in entradas.values() if e.get("estado") != REGISTRADO]
+
+    def recuperar(self, registrar):
+        """
+        Resuelve cada movimiento incompleto y llama a registrar(entrada) para los
+        que quedaron en destino. Devuelve un resumen con rehechos, revertidos y perdidos.
+        """
+        resultado = {"rehechos": [], "revertidos": [], "perdidos": []}
+        for entrada in self.incompletas():
+            origen, destino = entrada["origen"], entrada["destino"]
+            en_origen, en_destino = os.path.exists(origen), os.path.exists(destino)
+
+            if entrada["estado"] == PLANIFICADO:
+                if en_origen and en_destino:
+                    # Copia entre volúmenes interrumpida: se completa solo si es idéntica
+                    if calcular_sha256(origen) == calcular_sha256(destino):
+                        os.remove(origen)
+                        en_origen = False
+                    elif entrada.get("destino_existia") is False:
+                        os.remove(destino)  # copia parcial creada por este movimiento
+                        en_destino = False
+                    else:
+                        # El destino es un documento previo (o una entrada antigua sin el dato): no se toca
+                        resultado["revertidos"].append(entrada)
+                        continue
+                if not en_destino:
+                    (resultado["revertidos"] if en_origen else resultado["perdidos"]).append(entrada)
+                    continue
+                entrada["hash"] = entrada.get("hash") or calcular_sha256(destino)
+            elif not en_destino:
+                resultado["perdidos"].append(entrada)
+                continue
+
+            registrar(entrada)
+            resultado["rehechos"].append(entrada)
+
+        # Todo quedó resuelto: la bitácora vuelve a empezar vacía
+        self.cerrar()
+        if os.path.exists(self.ruta):
+            with open(self.ruta, "w", encoding="utf-8"):
+                pass
+        self._abiertas.clear()
+        return resultado
@@ -0,0 +1,128 @@
+"""
+cache_directorios.py
+
+Caché en proceso de directorios que se sabe que existen (Legajos sobre SMB).
+
+- Precalentado con un único recorrido (os.scandir) de las cuentas del lote
+- asegurar_directorio: sin llamadas al sistema si el directorio ya es conocido
+- Contadores de consultas evitadas, directorios creados y escaneados
+
+Si un directorio se borra por fuera durante la ejecución, llamar a olvidar()
+para que vuelva a crearse en el próximo uso.
+"""
+
+import os
+
+_conocidos = set()
+_escaneados = set()
+estadisticas = {"evitadas": 0, "consultas": 0, "creados": 0, "escaneados": 0}
+
+def _clave(ruta):
+    # Solo para indexar la caché: en Windows normcase pasa a minúsculas, así que
+    # las llamadas al sistema usan siempre la ruta original normalizada
+    return os.path.normcase(os.path.normpath(str(ruta)))
+
+def _registrar(clave):
+    # Si existe un directorio, existen también todos sus ancestros
+    while clave and clave not in _conocidos:
+        _conocidos.add(clave)
+        padre = os.path.dirname(clave)
+        if padre == clave:
+            break
+        clave = padre
+
+# 🔥 Precalentado: un recorrido por cuenta involucrada
+def _recorrer(clave):
+    pendientes = [clave]
+    while pendientes:
+        actual = pendientes.pop()
+        try:
+            with os.scandir(actual) as entradas:
+                estadisticas["escaneados"] += 1
+                for entrada in entradas:
+                    if entrada.is_dir(follow_symlinks=False):
+                        hijo = _clave(entrada.path)
+                        _conocidos.add(hijo)
+                        pendientes.append(hijo)
+        except OSError:
+            continue
+
+def precalentar(raiz, cuentas=None):
+    """
+    Registra los directorios existentes bajo raiz. Con cuentas, solo se recorren
+    los árboles de esas cuentas (las que trae el lote); cada árbol, una sola vez.
+    """
+    raiz = _clave(raiz)
+    if cuentas is None:
+        if raiz not in _escaneados and os.path.isdir(raiz):
+            _registrar(raiz)
+            _recorrer(raiz)
+            _escaneados.add(raiz)
+        return
+
+    if raiz not in _escaneados:
+        try:
+            with os.scandir(raiz) as entradas:
+                estadisticas["escaneados"] += 1
+                existentes = {e.name for e in entradas if e.is_dir(follow_symlinks=False)}
+        except OSError:
+            return
+        _registrar(raiz)
+    else:
+        existentes = None
+
+    for cuenta in cuentas:
+        clave = _clave(os.path.join(raiz, cuenta))
+        if clave in _escaneados or (existentes is not None and cuenta not in existentes):
+            continue
+        if existentes is None and clave not in _conocidos:
+            continue
+        _conocidos.add(clave)
+        _recorrer(clave)
+        _escaneados.add(clave)
+
+# 📁 Consultas
+def existe(ruta):
+    clave = _clave(ruta)
+    if clave in _conocidos:
+        estadisticas["evitadas"] += 1
+        return True
+    estadisticas["consultas"] += 1
+    if os.path.isdir(os.path.normpath(str(ruta))):
+        _registrar(clave)
+        return True
+    return False
+
+def asegurar_directorio(ruta):
+    """Crea ruta (con padres) si hace falta. Devuelve True si se creó."""
+    clave = _clave(ruta)
+    if clave in _conocidos:
+        estadisticas["evitadas"] += 1
+        return False
+    estadisticas["consultas"] += 1
+    ruta = os.path.normpath(str(ruta))
+    try:
+        os.makedirs(ruta)
+        creado = True
+        estadisticas["creados"] += 1
+    except FileExistsError:
+        if not os.path.isdir(ruta):
+            raise
+        creado = False
+    _registrar(clave)
+    return creado
+
+def olvidar(ruta=None):
+    """Descarta ruta y sus descendientes (o toda la caché si ruta es None)."""
+    if ruta is None:
+        _conocidos.clear()
+        _escaneados.clear()
+        return
+    clave = _clave(ruta)
+    prefijo = clave.rstrip(os.sep) + os.sep
+    for conjunto in (_conocidos, _escaneados):
+        for conocido in [c for c in list(conjunto) if c == clave or c.startswith(prefijo)]:
+            conjunto.discard(conocido)
+
+def estadisticas_directorios():
+    return dict(estadisticas, conocidos=len(_conocidos))
@@ -0,0 +1,110 @@
+"""
+cache_hash.py
+
+Caché persistente de hashes SHA-256 indexada por (dispositivo, inodo, tamaño, mtime_ns).
+
+- Un acierto devuelve el hash sin leer el archivo
+- Desalojo LRU con tope de entradas (MAX_ENTRADAS)
+- Persistencia atómica en JSON (archivo temporal + os.replace) y contadores de aciertos/fallos
+- Compartida por hash_checker, seguridad_v2 y archivado_auditable
+
+Nota: un archivo alterado que conserve tamaño, inodo y mtime_ns (p. ej. con os.utime)
+no se detecta por esta vía; para validaciones forenses usar config_loader.validar_hash.
+"""
+
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from scripts.motor_hash import calcular_sha256
+
+RUTA_CACHE = "scripts/cache_hashes.json"
+MAX_ENTRADAS = 100_000
+
+_lock = threading.Lock()
+_cache = None
+_modificada = False
+estadisticas = {"aciertos": 0, "fallos": 0, "desalojos": 0}
+
+# 🔑 Clave por metadatos del archivo
+def _clave(st):
+    return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+
+# 📥 Carga perezosa (una vez por proceso)
+def cargar_cache(ruta_cache=None):
+    global _cache
+    ruta_cache = ruta_cache or RUTA_CACHE
+    with _lock:
+        if _cache is not None:
+            return _cache
+        _cache = OrderedDict()
+        if os.path.exists(ruta_cache):
+            try:
+                with open(ruta_cache, "r", encoding="utf-8") as f:
+                    _cache.update(json.load(f).get("entradas", []))
+            except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+                _cache.clear()
+        atexit.register(guardar_cache, ruta_cache)
+        return _cache
+
+# 💾 Guardado atómico
+def guardar_cache(ruta_cache=None):
+    global _modificada
+    ruta_cache = ruta_cache or RUTA_CACHE
+    with _lock:
+        if _cache is None or not _modificada:
+            return
+        entradas = list(_cache.items())
+        _modificada = False
+    carpeta = os.path.dirname(ruta_cache)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    temporal = f"{ruta_cache}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "entradas": entradas}, f)
+    os.replace(temporal, ruta_cache)
+
+# ➕ Alta con desalojo LRU
+def _guardar_en_cache(clave, hash_archivo):
+    global _modificada
+    _cache[clave] = hash_archivo
+    _cache.move_to_end(clave)
+    while len(_cache) > MAX_ENTRADAS:
+        _cache.popitem(last=False)
+        estadisticas["desalojos"] += 1
+    _modificada = True
+
+# 🔐 Hash con caché
+def obtener_hash(ruta, funcion_hash=calcular_sha256):
+    """
+    Devuelve el SHA-256 del archivo, leyéndolo solo si no hay acierto en la caché.
+    Si el archivo cambia mientras se calcula, el resultado no se guarda.
+    """
+    cache = cargar_cache()
+    clave = _clave(os.stat(ruta))
+    with _lock:
+        hash_archivo = cache.get(clave)
+        if hash_archivo is not None:
+            cache.move_to_end(clave)
+            estadisticas["aciertos"] += 1
+            return hash_archivo
+        estadisticas["fallos"] += 1
+
+    hash_archivo = funcion_hash(ruta)
+    if _clave(os.stat(ruta)) == clave:
+        with _lock:
+            _guardar_en_cache(clave, hash_archivo)
+    return hash_archivo
+
+# 📝 Registrar un hash ya conocido (p. ej. calculado durante una copia)
+def registrar_hash(ruta, hash_archivo):
+    cargar_cache()
+    clave = _clave(os.stat(ruta))
+    with _lock:
+        _guardar_en_cache(clave, hash_archivo)
+
+def estadisticas_cache():
+    with _lock:
+        return dict(estadisticas, entradas=len(_cache) if _cache is not None else 0)
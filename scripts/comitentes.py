@@ -0,0 +1,125 @@
+"""
+comitentes.py
+
+Cargador único del maestro de comitentes (cuentas.xlsx y variantes).
+
+- Lectura del Excel con normalización vectorizada (sin iterrows)
+- Caché binaria (.pkl) junto al Excel, válida mientras no cambien su mtime y su hash
+- Mapas listos para usar: cuenta → tipo, cuenta → CUIT/nombre, CUIT → cuentas
+"""
+
+import os
+import pickle
+
+from scripts.motor_hash import calcular_sha256
+from scripts.registro_eventos import obtener_logger
+
+VERSION_CACHE = 1
+log = obtener_logger("comitentes")
+
+# Nombres de columna aceptados para cada campo (según la planilla de origen)
+COLUMNAS = {
+    "cuenta": ["Comitente  -Número", "Cuenta", "cuenta_comitente"],
+    "tipo": ["Comitente  -Tipo de Comitente", "Tipo", "tipo"],
+    "cuit": ["CUIT", "CUIT-CUIL", "Comitente  -CUIT"],
+    "nombre": ["Comitente  -Descripción", "Nombre", "nombre"],
+}
+
+_en_memoria = {}
+
+def ruta_cache(ruta_excel):
+    return os.path.splitext(str(ruta_excel))[0] + ".comitentes.pkl"
+
+# 🧮 Compilación desde el Excel
+def _columna(df, campo):
+    import pandas as pd
+    for nombre in COLUMNAS[campo]:
+        if nombre in df.columns:
+            return df[nombre].fillna("").astype(str).str.strip()
+    return pd.Series("", index=df.index)
+
+def compilar_comitentes(ruta_excel):
+    """Lee el Excel y arma los mapas de consulta."""
+    import pandas as pd  # solo hace falta si la caché no es válida
+
+    df = pd.read_excel(ruta_excel, dtype=str)
+    cuentas = _columna(df, "cuenta")
+    tipos = _columna(df, "tipo")
+    cuits = _columna(df, "cuit")
+    nombres = _columna(df, "nombre")
+
+    tipo_normalizado = (
+        tipos.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii").str.lower()
+    )
+    clase = pd.Series("desconocido", index=df.index)
+    clase[tipo_normalizado.str.contains("fisica")] = "fisica"
+    clase[tipo_normalizado.str.contains("juridica")] = "juridica"
+
+    tabla = pd.DataFrame({
+        "cuenta": cuentas, "tipo": clase, "tipo_original": tipos, "cuit": cuits, "nombre": nombres
+    })
+    tabla = tabla[tabla["cuenta"] != ""]
+    ultimas = tabla.drop_duplicates("cuenta", keep="last")  # condóminos: vale la última fila
+
+    cuit_cuentas = {}
+    con_cuit = tabla[tabla["cuit"] != ""].drop_duplicates(["cuit", "cuenta"])
+    for cuit, grupo in con_cuit.groupby("cuit", sort=False)["cuenta"]:
+        cuit_cuentas[cuit] = grupo.tolist()
+
+    return {
+        "tipo": dict(zip(ultimas["cuenta"], ultimas["tipo"])),
+        "tipo_original": dict(zip(ultimas["cuenta"], ultimas["tipo_original"])),
+        "datos": {
+            cuenta: {"CUIT": cuit, "Nombre": nombre}
+            for cuenta, cuit, nombre in zip(ultimas["cuenta"], ultimas["cuit"], ultimas["nombre"])
+        },
+        "cuit_cuentas": cuit_cuentas,
+    }
+
+# 💾 Caché binaria por mtime + hash
+def _leer_cache(ruta):
+    try:
+        with open(ruta, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+def _guardar_cache(ruta, contenido):
+    try:
+        with open(f"{ruta}.tmp", "wb") as f:
+            pickle.dump(contenido, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{ruta}.tmp", ruta)
+    except OSError as e:
+        log.warning("⚠️ No se pudo guardar la caché de comitentes: %s", e)
+
+def cargar_comitentes(ruta_excel):
+    """
+    Devuelve los mapas del maestro de comitentes. Si el Excel no cambió (mismo
+    mtime, o mismo hash si solo cambió el mtime) se usan la memoria o la caché.
+    """
+    ruta_excel = str(ruta_excel)
+    estado = os.stat(ruta_excel)
+    firma = (estado.st_mtime_ns, estado.st_size)
+
+    previo = _en_memoria.get(ruta_excel)
+    if previo and previo["firma"] == firma:
+        return previo["mapas"]
+
+    cache = _leer_cache(ruta_cache(ruta_excel))
+    if not isinstance(cache, dict) or cache.get("version") != VERSION_CACHE:
+        cache = None
+
+    if cache and cache["firma"] == firma:
+        mapas = cache["mapas"]
+    else:
+        hash_excel = calcular_sha256(ruta_excel)
+        if cache and cache["hash"] == hash_excel:
+            mapas = cache["mapas"]  # se tocó el archivo pero el contenido es el mismo
+        else:
+            mapas = compilar_comitentes(ruta_excel)
+        _guardar_cache(ruta_cache(ruta_excel), {
+            "version": VERSION_CACHE, "firma": firma, "hash": hash_excel, "mapas": mapas
+        })
+
+    _en_memoria[ruta_excel] = {"firma": firma, "mapas": mapas}
+    return mapas
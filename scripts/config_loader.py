@@ -4,9 +4,10 @@
 # • Lanza excepciones claras si el archivo no existe
 
 import configparser
-import hashlib
 import os
 
+from scripts.motor_hash import calcular_sha256
+
 def cargar_configuracion(ruta_config):
     """
     Carga y valida el archivo de configuración INI.
@@ -32,6 +33,64 @@ def cargar_configuracion(ruta_config):
 
     return config
 
+def obtener_hilos_hash(ruta_config="config/config.ini"):
+    """
+    Devuelve la cantidad de hilos para el cálculo de hash ([RENDIMIENTO] hilos_hash).
+    Si no está configurada o es 0, usa la cantidad de núcleos disponibles.
+    """
+    config = configparser.ConfigParser()
+    config.read(ruta_config, encoding="utf-8")
+    try:
+        hilos = config.getint("RENDIMIENTO", "hilos_hash", fallback=0)
+    except ValueError:
+        raise ValueError("Valor inválido en [RENDIMIENTO] hilos_hash: debe ser un entero.")
+    return hilos if hilos > 0 else (os.cpu_count() or 1)
+
+def obtener_parametros_pipeline(ruta_config="config/config.ini"):
+    """
+    Devuelve los hilos por etapa y la capacidad de las colas del pipeline de archivado.
+    El hash usa hilos_hash; clasificar y mover, 2 hilos por defecto; colas de 32 elementos.
+    """
+    config = configparser.ConfigParser()
+    config.read(ruta_config, encoding="utf-8")
+    try:
+        parametros = {
+            "clasificar": config.getint("RENDIMIENTO", "hilos_clasificar", fallback=2),
+            "hashear": obtener_hilos_hash(ruta_config),
+            "mover": config.getint("RENDIMIENTO", "hilos_mover", fallback=2),
+            "capacidad": config.getint("RENDIMIENTO", "capacidad_cola", fallback=32)
+        }
+    except ValueError:
+        raise ValueError("Valor inválido en [RENDIMIENTO]: hilos_clasificar, hilos_mover y capacidad_cola deben ser enteros.")
+    if min(parametros.values()) < 1:
+        raise ValueError("Valor inválido en [RENDIMIENTO]: hilos y capacidad deben ser mayores que 0.")
+    return parametros
+
+def obtener_parametros_vigilancia(ruta_config="config/config.ini"):
+    """
+    Devuelve (espera_estable, intervalo_sondeo) en segundos desde [VIGILANCIA].
+    Por defecto: 2 s sin cambios para considerar estable un archivo, sondeo cada 1 s.
+    """
+    config = configparser.ConfigParser()
+    config.read(ruta_config, encoding="utf-8")
+    try:
+        espera = config.getfloat("VIGILANCIA", "espera_estable", fallback=2.0)
+        intervalo = config.getfloat("VIGILANCIA", "intervalo_sondeo", fallback=1.0)
+    except ValueError:
+        raise ValueError("Valor inválido en [VIGILANCIA]: espera_estable e intervalo_sondeo deben ser números.")
+    return espera, intervalo
+
+def obtener_rutas_metricas(ruta_config="config/config.ini"):
+    """
+    Devuelve (ruta_json, ruta_prometheus) desde [METRICAS].
+    ruta_prometheus vacía desactiva el archivo para el textfile collector.
+    """
+    config = configparser.ConfigParser()
+    config.read(ruta_config, encoding="utf-8")
+    ruta_json = config.get("METRICAS", "ruta_json", fallback="logs/metricas_flujo.json")
+    ruta_prometheus = config.get("METRICAS", "ruta_prometheus", fallback="logs/metricas_flujo.prom")
+    return ruta_json, ruta_prometheus or None
+
 def calcular_hash_sha256(ruta_archivo):
     """
     Calcula el hash SHA-256 de un archivo dado.
@@ -40,9 +99,7 @@ def calcular_hash_sha256(ruta_archivo):
     if not os.path.exists(ruta_archivo):
         raise FileNotFoundError(f"Archivo no encontrado: {ruta_archivo}")
 
-    with open(ruta_archivo, "rb") as f:
-        contenido = f.read()
-        return hashlib.sha256(contenido).hexdigest()
+    return calcular_sha256(ruta_archivo)
     
 import os 
 
@@ -0,0 +1,314 @@
+"""
+despachador_alertas.py
+
+Despachador asíncrono de alertas por email: el archivado nunca espera al servidor SMTP.
+
+- Cola asyncio en un hilo propio: encolar() vuelve de inmediato, desde cualquier hilo
+- Una sola conexión SMTP reutilizada entre envíos; se cierra tras un rato sin alertas
+- Reintentos con espera exponencial ante errores de conexión o respuestas transitorias
+- Ráfagas agrupadas: las alertas de texto que llegan dentro de la ventana de agrupado
+  salen como un único resumen por destinatario
+- cerrar() / cerrar_despachadores() entregan lo pendiente antes de terminar
+
+smtplib es bloqueante: cada despachador le dedica un hilo propio para SMTP, así la
+conexión siempre se usa desde el mismo hilo y el bucle de eventos queda libre para
+agrupar. No se usa ThreadPoolExecutor porque no acepta tareas durante el cierre del
+intérprete, justo cuando atexit entrega lo pendiente.
+"""
+
+import asyncio
+import atexit
+import queue
+import smtplib
+import threading
+from datetime import datetime
+from email.message import EmailMessage
+
+from scripts.registro_eventos import obtener_logger
+
+# ⚙️ Parámetros de envío
+VENTANA_AGRUPADO = 2.0       # segundos que se esperan más alertas antes de enviar
+REINTENTOS = 5
+ESPERA_INICIAL = 1.0         # primera espera entre reintentos (se duplica en cada uno)
+ESPERA_MAXIMA = 60.0
+INACTIVIDAD_CONEXION = 60.0  # sin alertas durante este tiempo se cierra la conexión
+TIMEOUT_SMTP = 30
+ESPERA_CIERRE = 30.0         # tiempo máximo para entregar lo pendiente al salir
+
+log = obtener_logger("alertas")
+
+class DespachadorAlertas:
+    def __init__(self, servidor, puerto=25, usuario=None, contrasena=None, starttls=False,
+                 remitente="sistema@empresa.com", ventana_agrupado=VENTANA_AGRUPADO,
+                 reintentos=REINTENTOS, espera_inicial=ESPERA_INICIAL, espera_maxima=ESPERA_MAXIMA,
+                 inactividad=INACTIVIDAD_CONEXION, timeout=TIMEOUT_SMTP):
+        self.servidor = servidor
+        self.puerto = puerto
+        self.usuario = usuario
+        self.contrasena = contrasena
+        self.starttls = starttls
+        self.remitente = remitente
+        self.ventana_agrupado = ventana_agrupado
+        self.reintentos = reintentos
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.inactividad = inactividad
+        self.timeout = timeout
+        self.estadisticas = {"encoladas": 0, "enviados": 0, "agrupadas": 0,
+                             "reintentos": 0, "fallidas": 0, "conexiones": 0}
+
+        self._smtp = None
+        self._loop = None
+        self._cola = None
+        self._pedido = None
+        self._hilo = None
+        self._tareas = queue.Queue()
+        self._pendientes = 0
+        self._vacio = threading.Event()
+        self._vacio.set()
+        self._lock = threading.Lock()
+
+    # ▶️ Arranque perezoso del bucle de eventos
+    def _arrancar(self):
+        with self._lock:
+            if self._hilo is not None:
+                return
+            listo = threading.Event()
+
+            def correr():
+                self._loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self._loop)
+                self._cola = asyncio.Queue()
+                listo.set()
+                self._loop.run_until_complete(self._consumir())
+                self._loop.close()
+
+            self._hilo = threading.Thread(target=correr, name="despachador-alertas", daemon=True)
+            self._hilo.start()
+            threading.Thread(target=self._trabajar_smtp, name="despachador-smtp", daemon=True).start()
+            listo.wait()
+
+    def encolar(self, mensaje, destino, asunto="⚠️ Alerta de seguridad", adjuntos=(),
+                remitente=None, al_resultado=None):
+        """
+        Encola una alerta y vuelve de inmediato. adjuntos es una lista de
+        (nombre, contenido, maintype, subtype). al_resultado(alerta, error) se
+        llama desde el hilo del despachador (error es None si se envió).
+        """
+        alerta = {
+            "mensaje": mensaje,
+            "destino": destino,
+            "asunto": asunto,
+            "adjuntos": list(adjuntos),
+            "remitente": remitente or self.remitente,
+            "fecha": datetime.now(),
+            "al_resultado": al_resultado
+        }
+        self._arrancar()
+        with self._lock:
+            self._pendientes += 1
+            self.estadisticas["encoladas"] += 1
+            self._vacio.clear()
+        self._loop.call_soon_threadsafe(self._cola.put_nowait, alerta)
+
+    def vaciar(self, timeout=None):
+        """Espera a que se resuelvan las alertas encoladas. Devuelve False si venció el timeout."""
+        return self._vacio.wait(timeout)
+
+    def cerrar(self, timeout=ESPERA_CIERRE):
+        """Entrega lo pendiente (hasta timeout), cierra la conexión y detiene el hilo."""
+        if self._hilo is None:
+            return True
+        entregado = self.vaciar(timeout)
+        self._loop.call_soon_threadsafe(self._cola.put_nowait, None)
+        self._hilo.join(timeout)
+        with self._lock:
+            self._hilo = None
+        return entregado
+
+    # 🔁 Bucle de consumo: agrupa ráfagas y envía
+    async def _consumir(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                alerta = await self._tomar(self.inactividad)
+            except asyncio.TimeoutError:
+                await self._en_hilo(self._desconectar)
+                continue
+            if alerta is None:
+                break
+
+            lote = [alerta]
+            detener = False
+            limite = loop.time() + self.ventana_agrupado
+            while True:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    siguiente = await self._tomar(restante)
+                except asyncio.TimeoutError:
+                    break
+                if siguiente is None:
+                    detener = True
+                    break
+                lote.append(siguiente)
+
+            for mensaje, alertas in self._agrupar(lote):
+                await self._enviar_con_reintentos(mensaje, alertas)
+            with self._lock:
+                self._pendientes -= len(lote)
+                if self._pendientes == 0:
+                    self._vacio.set()
+            if detener:
+                break
+        await self._en_hilo(self._desconectar)
+        self._tareas.put(None)
+
+    async def _tomar(self, timeout):
+        # El get pendiente sobrevive al timeout (wait_for lo cancelaría y podría perder una alerta)
+        if self._pedido is None:
+            self._pedido = asyncio.ensure_future(self._cola.get())
+        hechos, _ = await asyncio.wait({self._pedido}, timeout=timeout)
+        if not hechos:
+            raise asyncio.TimeoutError
+        pedido, self._pedido = self._pedido, None
+        return pedido.result()
+
+    # 🧵 Hilo SMTP: ejecuta las llamadas bloqueantes y resuelve futuros del bucle
+    def _en_hilo(self, funcion, *args):
+        futuro = self._loop.create_future()
+        self._tareas.put((funcion, args, futuro))
+        return futuro
+
+    def _trabajar_smtp(self):
+        while True:
+            tarea = self._tareas.get()
+            if tarea is None:
+                return
+            funcion, args, futuro = tarea
+            try:
+                resultado, error = funcion(*args), None
+            except BaseException as e:
+                resultado, error = None, e
+            self._loop.call_soon_threadsafe(_resolver, futuro, resultado, error)
+
+    # 📨 Armado de mensajes: resumen por destinatario para las alertas de texto
+    def _agrupar(self, lote):
+        grupos = {}
+        for alerta in lote:
+            if alerta["adjuntos"]:
+                yield self._armar(alerta["asunto"], alerta["mensaje"], alerta), [alerta]
+            else:
+                grupos.setdefault((alerta["destino"], alerta["remitente"]), []).append(alerta)
+
+        for alertas in grupos.values():
+            primera = alertas[0]
+            if len(alertas) == 1:
+                yield self._armar(primera["asunto"], primera["mensaje"], primera), alertas
+                continue
+            self.estadisticas["agrupadas"] += len(alertas)
+            asunto = f"{primera['asunto']} ({len(alertas)} alertas)"
+            cuerpo = "\n".join(f"• [{a['fecha']:%H:%M:%S}] {a['mensaje']}" for a in alertas)
+            yield self._armar(asunto, f"Se registraron {len(alertas)} alertas:\n\n{cuerpo}", primera), alertas
+
+    def _armar(self, asunto, cuerpo, alerta):
+        msg = EmailMessage()
+        msg.set_content(cuerpo)
+        msg["Subject"] = asunto
+        msg["From"] = alerta["remitente"]
+        msg["To"] = alerta["destino"]
+        for nombre, contenido, maintype, subtype in alerta["adjuntos"]:
+            msg.add_attachment(contenido, maintype=maintype, subtype=subtype, filename=nombre)
+        return msg
+
+    # 🔌 Conexión SMTP reutilizable (solo desde el hilo ejecutor)
+    def _conectar(self):
+        smtp = smtplib.SMTP(self.servidor, self.puerto, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.usuario:
+                smtp.login(self.usuario, self.contrasena)
+        except BaseException:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self.estadisticas["conexiones"] += 1
+
+    def _desconectar(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+    def _enviar(self, mensaje):
+        reutilizada = self._smtp is not None
+        if not reutilizada:
+            self._conectar()
+        try:
+            self._smtp.send_message(mensaje)
+        except smtplib.SMTPServerDisconnected:
+            # El servidor cerró la conexión ociosa: se reabre una vez sin contar como reintento
+            self._smtp.close()
+            self._smtp = None
+            if not reutilizada:
+                raise
+            self._conectar()
+            self._smtp.send_message(mensaje)
+
+    async def _enviar_con_reintentos(self, mensaje, alertas):
+        espera = self.espera_inicial
+        error = None
+        for intento in range(self.reintentos + 1):
+            try:
+                await self._en_hilo(self._enviar, mensaje)
+                error = None
+                break
+            except (smtplib.SMTPException, OSError) as e:
+                error = e
+                await self._en_hilo(self._desconectar)
+                permanente = isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500
+                if permanente or isinstance(e, smtplib.SMTPRecipientsRefused) or intento == self.reintentos:
+                    break
+                self.estadisticas["reintentos"] += 1
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, self.espera_maxima)
+
+        self.estadisticas["enviados" if error is None else "fallidas"] += 1
+        for alerta in alertas:
+            if alerta["al_resultado"]:
+                try:
+                    alerta["al_resultado"](alerta, error)
+                except Exception as e:
+                    log.warning("⚠️ Error en el aviso de resultado de alerta: %s", e)
+
+def _resolver(futuro, resultado, error):
+    if futuro.cancelled():
+        return
+    if error is None:
+        futuro.set_result(resultado)
+    else:
+        futuro.set_exception(error)
+
+# 🗂️ Un despachador por servidor, compartido por todo el proceso
+_despachadores = {}
+_lock_despachadores = threading.Lock()
+
+def obtener_despachador(servidor, puerto=25, usuario=None, **opciones):
+    clave = (servidor, puerto, usuario)
+    with _lock_despachadores:
+        if clave not in _despachadores:
+            _despachadores[clave] = DespachadorAlertas(servidor, puerto, usuario=usuario, **opciones)
+        return _despachadores[clave]
+
+def cerrar_despachadores(timeout=ESPERA_CIERRE):
+    """Entrega las alertas pendientes de todos los despachadores. Devuelve False si alguna quedó sin resolver."""
+    with _lock_despachadores:
+        despachadores = list(_despachadores.values())
+    return all([d.cerrar(timeout) for d in despachadores])
+
+atexit.register(cerrar_despachadores)
@@ -1,5 +1,3 @@
-import os
-import re
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -9,34 +7,22 @@ ROOT_DIR = Path(__file__).resolve().parent.parent
 sys.path.append(str(ROOT_DIR))
 
 from estructura_subcarpetas import cargar_estructura  # Import corregido
+from scripts.parser_nombres import vista_diagnostico
 
-CARPETA_ORIGEN = Path("C:\Users\ALEJANDRA\Desktop\LEGAJOS\Docupen")
+CARPETA_ORIGEN = Path(r"C:\Users\ALEJANDRA\Desktop\LEGAJOS\Docupen")
 
 def extraer_datos_desde_nombre(nombre_archivo):
-    nombre_sin_ext = os.path.splitext(nombre_archivo)[0]
-    partes = nombre_sin_ext.strip().split(" ")
-
-    if len(partes) < 4:
+    datos = vista_diagnostico(nombre_archivo)
+    if datos is None:
         return None, None, None, None
-
-    nro_cuenta = partes[0]
-    tipo_raw = partes[1].replace(".", "").upper()
-    fecha_raw = partes[-1]
-
-    nombre_doc = " ".join(partes[2:-1]).strip()
+    nro_cuenta, tipo_raw, nombre_doc, fecha, valido = datos
 
     # Validar fecha en formato DD-MM-YYYY
-    if re.match(r"^\d{2}-\d{2}-\d{4}$", fecha_raw):
-        fecha = fecha_raw.replace("-", "")
-    else:
+    if fecha is None:
         fecha = datetime.now().strftime("%d%m%Y")
         print(f"🕒 Fecha asignada automáticamente para '{nombre_archivo}': {fecha}")
 
-    if not nro_cuenta.isdigit():
-        return None, None, None, None
-    if not re.match(r"^(T|C\d+)$", tipo_raw):
-        return None, None, None, None
-    if not re.match(r"^(0[1-9]|[12][0-9]|3[01])(0[1-9]|1[0-2])\d{4}$", fecha):
+    if not valido:
         return None, None, None, None
 
     return nro_cuenta, tipo_raw, nombre_doc, fecha
@@ -1,14 +1,17 @@
 import json
-import pandas as pd
 from pathlib import Path
 from datetime import datetime
 import logging
+import sys
 
 # Rutas absolutas
 BASE_DIR = Path(__file__).resolve().parent.parent
 CONFIG_DIR = BASE_DIR / "config"
 LOG_DIR = BASE_DIR / "logs"
 
+sys.path.append(str(BASE_DIR))
+from scripts.comitentes import cargar_comitentes
+
 BASE_ARCHIVADO = Path("Escritorio/Prueba_archivo/Archivados")
 ESTRUCTURA_JSON = CONFIG_DIR / "estructura_carpetas.json"
 EXCEL_CUENTAS = CONFIG_DIR / "datos_comitentes.xlsx"
@@ -31,15 +34,13 @@ def cargar_estructura(json_path=ESTRUCTURA_JSON):
         estructura = json.load(f)
     return estructura
 
-# Cargar cuentas desde Excel
+# Cargar cuentas desde Excel (vía caché compilada de comitentes)
 def cargar_cuentas(excel_path=EXCEL_CUENTAS):
-    df = pd.read_excel(excel_path, dtype=str)
-    df = df.dropna(subset=["cuenta_comitente", "tipo"])
-    cuentas_por_tipo = {
-        "fisica": df[df["tipo"].str.lower() == "fisica"]["cuenta_comitente"].tolist(),
-        "juridica": df[df["tipo"].str.lower() == "juridica"]["cuenta_comitente"].tolist(),
-        "desconocido": df[~df["tipo"].str.lower().isin(["fisica", "juridica"])]["cuenta_comitente"].tolist()
-    }
+    cuentas_por_tipo = {"fisica": [], "juridica": [], "desconocido": []}
+    mapas = cargar_comitentes(excel_path)
+    for cuenta, tipo in mapas["tipo"].items():
+        if mapas["tipo_original"][cuenta]:  # sin tipo informado no se crea estructura
+            cuentas_por_tipo[tipo].append(cuenta)
     return cuentas_por_tipo
 
 # Crear subcarpetas por cuenta
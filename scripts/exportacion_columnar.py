@@ -0,0 +1,197 @@
+"""
+exportacion_columnar.py
+
+Instantánea columnar del historial y de los eventos de archivado, para análisis.
+
+- Segmentos .npz (NumPy, sin pickle) con una columna por campo
+- Textos codificados por diccionario: códigos int32 + valores únicos por segmento
+- Exportación incremental: el historial se lee desde el último offset de la bitácora
+- Compactación de segmentos y carga como DataFrame de pandas con columnas categóricas
+"""
+
+import glob
+import json
+import os
+import shutil
+from itertools import islice
+
+import numpy as np
+
+from scripts.bitacora_historial import abrir_bitacora, generacion_actual
+from scripts.acumulados_historial import clasificar_estado
+
+DIR_COLUMNAR = "scripts/columnar"
+MAX_SEGMENTOS = 64  # al superarlo, los segmentos se compactan en uno
+EVENTOS_POR_SEGMENTO = 50_000
+
+COLUMNAS_HISTORIAL = {
+    "texto": ["evento", "archivo", "cuenta", "categoria", "host", "script", "error", "hash", "estado"],
+    "fecha": ["timestamp"],
+    "booleano": ["alerta_integridad"],
+}
+COLUMNAS_EVENTOS = {
+    "texto": ["archivo", "cuenta", "categoria", "subrol", "estado", "hash"],
+    "fecha": ["fecha"],
+    "booleano": [],
+}
+
+# 📍 Rutas y metadatos por conjunto de datos
+def _carpeta(conjunto, dir_columnar):
+    return os.path.join(dir_columnar or DIR_COLUMNAR, conjunto)
+
+def _leer_meta(carpeta):
+    try:
+        with open(os.path.join(carpeta, "meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {"segmentos": 0}
+
+def _guardar_meta(carpeta, meta):
+    ruta = os.path.join(carpeta, "meta.json")
+    with open(f"{ruta}.tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(f"{ruta}.tmp", ruta)
+
+def _segmentos(carpeta):
+    return sorted(glob.glob(os.path.join(carpeta, "seg_*.npz")))
+
+# 🔤 Codificación de columnas
+def _codificar_texto(valores):
+    diccionario = {}
+    codigos = np.fromiter(
+        (-1 if v is None else diccionario.setdefault(str(v), len(diccionario)) for v in valores),
+        dtype=np.int32, count=len(valores)
+    )
+    return codigos, np.array(list(diccionario), dtype=str)
+
+def _codificar_fecha(valores):
+    return np.array(
+        [str(v).replace(" ", "T")[:19] if v else "NaT" for v in valores], dtype="datetime64[s]"
+    )
+
+def _escribir_segmento(carpeta, registros, columnas):
+    meta = _leer_meta(carpeta)
+    arrays = {}
+    for columna in columnas["texto"]:
+        codigos, valores = _codificar_texto([r.get(columna) for r in registros])
+        arrays[f"{columna}__codigos"] = codigos
+        arrays[f"{columna}__valores"] = valores
+    for columna in columnas["fecha"]:
+        arrays[columna] = _codificar_fecha([r.get(columna) for r in registros])
+    for columna in columnas["booleano"]:
+        arrays[columna] = np.array([bool(r.get(columna)) for r in registros], dtype=bool)
+
+    meta["segmentos"] = meta.get("segmentos", 0) + 1
+    ruta = os.path.join(carpeta, f"seg_{meta['segmentos']:06d}.npz")
+    np.savez_compressed(ruta, **arrays)
+    return meta
+
+# 📤 Exportación incremental del historial
+def exportar_historial(ruta_historial, dir_columnar=None):
+    """Agrega un segmento con los eventos del historial posteriores al último offset exportado."""
+    carpeta = _carpeta("historial", dir_columnar)
+    ruta_jsonl = abrir_bitacora(ruta_historial)
+    tamano = os.path.getsize(ruta_jsonl)
+    generacion = generacion_actual(ruta_historial)
+
+    meta = _leer_meta(carpeta)
+    if meta.get("generacion") != generacion or meta.get("offset", 0) > tamano:
+        shutil.rmtree(carpeta, ignore_errors=True)
+        meta = {"segmentos": 0, "generacion": generacion, "offset": 0}
+    os.makedirs(carpeta, exist_ok=True)
+    if meta["offset"] == tamano:
+        return 0
+
+    registros = []
+    with open(ruta_jsonl, "rb") as f:
+        f.seek(meta["offset"])
+        posicion = meta["offset"]
+        for linea in f:
+            posicion += len(linea)
+            if posicion > tamano:
+                break
+            try:
+                entrada = json.loads(linea)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            entrada["estado"] = clasificar_estado(entrada)
+            registros.append(entrada)
+
+    if registros:
+        meta.update(_escribir_segmento(carpeta, registros, COLUMNAS_HISTORIAL))
+    meta["offset"] = tamano
+    meta["generacion"] = generacion
+    _guardar_meta(carpeta, meta)
+    if len(_segmentos(carpeta)) > MAX_SEGMENTOS:
+        compactar("historial", dir_columnar)
+    return len(registros)
+
+# 📤 Exportación de eventos de archivado (log de auditoría)
+def exportar_eventos_archivo(eventos, dir_columnar=None):
+    """
+    Agrega segmentos con los eventos de archivado de la ejecución actual.
+    eventos puede ser cualquier iterable (p. ej. el log de auditoría en disco):
+    se consume de a EVENTOS_POR_SEGMENTO.
+    """
+    carpeta = _carpeta("eventos_archivo", dir_columnar)
+    iterador = iter(eventos)
+    total = 0
+    while True:
+        lote = list(islice(iterador, EVENTOS_POR_SEGMENTO))
+        if not lote:
+            break
+        os.makedirs(carpeta, exist_ok=True)
+        _guardar_meta(carpeta, _escribir_segmento(carpeta, lote, COLUMNAS_EVENTOS))
+        total += len(lote)
+    if total and len(_segmentos(carpeta)) > MAX_SEGMENTOS:
+        compactar("eventos_archivo", dir_columnar)
+    return total
+
+# 📥 Carga como DataFrame
+def cargar_columnar(conjunto, dir_columnar=None):
+    """Devuelve un DataFrame de pandas con columnas categóricas para los textos."""
+    import pandas as pd  # solo se necesita para el análisis
+    from pandas.api.types import union_categoricals
+
+    columnas = COLUMNAS_HISTORIAL if conjunto == "historial" else COLUMNAS_EVENTOS
+    partes = {c: [] for grupo in columnas.values() for c in grupo}
+    for ruta in _segmentos(_carpeta(conjunto, dir_columnar)):
+        with np.load(ruta) as segmento:
+            for columna in columnas["texto"]:
+                partes[columna].append(pd.Categorical.from_codes(
+                    segmento[f"{columna}__codigos"], categories=pd.Index(segmento[f"{columna}__valores"], dtype=object)
+                ))
+            for columna in columnas["fecha"] + columnas["booleano"]:
+                partes[columna].append(segmento[columna])
+
+    datos = {}
+    for columna, trozos in partes.items():
+        if columna in columnas["texto"]:
+            datos[columna] = union_categoricals(trozos) if trozos else pd.Categorical([])
+        else:
+            datos[columna] = np.concatenate(trozos) if trozos else np.array([])
+    return pd.DataFrame(datos)
+
+# 🧹 Compactación de segmentos
+def compactar(conjunto, dir_columnar=None):
+    carpeta = _carpeta(conjunto, dir_columnar)
+    segmentos = _segmentos(carpeta)
+    if len(segmentos) <= 1:
+        return
+    columnas = COLUMNAS_HISTORIAL if conjunto == "historial" else COLUMNAS_EVENTOS
+    df = cargar_columnar(conjunto, dir_columnar)
+
+    arrays = {}
+    for columna in columnas["texto"]:
+        serie = df[columna]
+        arrays[f"{columna}__codigos"] = serie.cat.codes.to_numpy(dtype=np.int32)
+        arrays[f"{columna}__valores"] = np.array(serie.cat.categories, dtype=str)
+    for columna in columnas["fecha"] + columnas["booleano"]:
+        arrays[columna] = df[columna].to_numpy()
+
+    meta = _leer_meta(carpeta)
+    meta["segmentos"] = meta.get("segmentos", 0) + 1
+    np.savez_compressed(os.path.join(carpeta, f"seg_{meta['segmentos']:06d}.npz"), **arrays)
+    for ruta in segmentos:
+        os.remove(ruta)
+    _guardar_meta(carpeta, meta)
@@ -1,11 +1,44 @@
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
 from openpyxl.utils import get_column_letter
 
+from scripts.registro_eventos import obtener_logger
+
 ENCABEZADOS = [
     "Fecha de Archivo", "Cuenta", "CUIT-CUIL", "Nombre-Razón Social",
     "Tipo de Documento", "Subcarpeta", "Ruta Relativa", "Hash", "Estado"
 ]
+COLUMNA_RUTA = 7
+LARGO_MAXIMO_HIPERVINCULO = 2079  # límite de Excel para la dirección de un hipervínculo
+log = obtener_logger("resumen")
+
+# --- Fila de resumen a partir de un registro ---
+def _fila_resumen(fila, ruta_base_alternativa=None):
+    ruta_relativa = fila.get("ruta_relativa", "")
+    ruta_completa = (
+        ruta_base_alternativa.rstrip("/") + "/" + ruta_relativa.replace("\\", "/")
+        if ruta_base_alternativa else ruta_relativa
+    )
+
+    estado = (
+        "Archivado" if fila.get("destino") and not fila.get("error")
+        else "Duplicado" if fila.get("error") == "Duplicado por hash"
+        else "Error"
+    )
+
+    nueva_fila = [
+        fila.get("fecha_archivo", ""),
+        fila.get("cuenta", ""),
+        fila.get("cuit_cuil", ""),
+        fila.get("nombre", ""),
+        fila.get("tipo_documento", ""),
+        fila.get("subcarpeta", ""),
+        ruta_relativa,
+        fila.get("hash", ""),
+        estado
+    ]
+    return nueva_fila, ruta_completa
 
 def generar_resumen(datos, archivo_excel, ruta_base_alternativa=None):
     wb = openpyxl.Workbook()
@@ -18,34 +51,12 @@ def generar_resumen(datos, archivo_excel, ruta_base_alternativa=None):
         ws.cell(row=1, column=col).font = Font(bold=True)
 
     # Agregar filas con hipervínculos
-    for fila in datos:
-        ruta_relativa = fila.get("ruta_relativa", "")
-        ruta_completa = (
-            ruta_base_alternativa.rstrip("/") + "/" + ruta_relativa.replace("\\", "/")
-            if ruta_base_alternativa else ruta_relativa
-        )
-
-        estado = (
-            "Archivado" if fila.get("destino") and not fila.get("error")
-            else "Duplicado" if fila.get("error") == "Duplicado por hash"
-            else "Error"
-        )
-
-        nueva_fila = [
-            fila.get("fecha_archivo", ""),
-            fila.get("cuenta", ""),
-            fila.get("cuit_cuil", ""),
-            fila.get("nombre", ""),
-            fila.get("tipo_documento", ""),
-            fila.get("subcarpeta", ""),
-            ruta_relativa,
-            fila.get("hash", ""),
-            estado
-        ]
+    for numero_fila, fila in enumerate(datos, start=2):
+        nueva_fila, ruta_completa = _fila_resumen(fila, ruta_base_alternativa)
         ws.append(nueva_fila)
 
-        # Insertar hipervínculo en la celda de ruta
-        celda = ws.cell(row=ws.max_row, column=7)
+        # Insertar hipervínculo en la celda de ruta (ws.max_row recorre todas las celdas: O(n) por fila)
+        celda = ws.cell(row=numero_fila, column=COLUMNA_RUTA)
         celda.hyperlink = ruta_completa
         celda.font = Font(color="0000FF", underline="single")
 
@@ -54,4 +65,59 @@ def generar_resumen(datos, archivo_excel, ruta_base_alternativa=None):
         ws.column_dimensions[get_column_letter(col)].width = 20
 
     wb.save(archivo_excel)
-    print(f"📊 Resumen Excel generado con hash y estado en: {archivo_excel}")
\ No newline at end of file
+    log.info(f"📊 Resumen Excel generado con hash y estado en: {archivo_excel}")
+
+# --- Modo streaming (hojas write-only, memoria acotada) ---
+def _celda_hipervinculo(ws, texto, destino, fuente):
+    """
+    Celda con la ruta como valor y un hipervínculo real, igual que en
+    generar_resumen: leer la hoja devuelve la ruta, no una fórmula.
+    En write-only openpyxl retiene solo el vínculo (unos cientos de bytes
+    por fila) hasta el guardado; las celdas ya salieron al archivo.
+    """
+    celda = WriteOnlyCell(ws, value=texto)
+    if not destino:
+        return celda
+    if len(destino) > LARGO_MAXIMO_HIPERVINCULO:
+        log.warning("⚠️ Ruta de %s caracteres sin hipervínculo (máximo %s): %s",
+                    len(destino), LARGO_MAXIMO_HIPERVINCULO, texto)
+        return celda
+    celda.hyperlink = destino
+    celda.font = fuente
+    return celda
+
+def escribir_hoja_streaming(ws, filas, ruta_base_alternativa=None):
+    """Escribe encabezados y filas en una hoja write-only. Devuelve la cantidad de filas."""
+    for col in range(1, len(ENCABEZADOS) + 1):
+        ws.column_dimensions[get_column_letter(col)].width = 20
+
+    negrita = Font(bold=True)
+    encabezados = []
+    for titulo in ENCABEZADOS:
+        celda = WriteOnlyCell(ws, value=titulo)
+        celda.font = negrita
+        encabezados.append(celda)
+    ws.append(encabezados)
+
+    fuente_vinculo = Font(color="0000FF", underline="single")
+    cantidad = 0
+    for fila in filas:
+        nueva_fila, ruta_completa = _fila_resumen(fila, ruta_base_alternativa)
+        nueva_fila[COLUMNA_RUTA - 1] = _celda_hipervinculo(
+            ws, nueva_fila[COLUMNA_RUTA - 1], ruta_completa, fuente_vinculo
+        )
+        ws.append(nueva_fila)
+        cantidad += 1
+    return cantidad
+
+def generar_resumen_streaming(filas, archivo_excel, ruta_base_alternativa=None):
+    """
+    Igual que generar_resumen, pero acepta cualquier iterador de filas y las
+    escribe directo al archivo: la memoria no depende de la cantidad de filas.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Resumen Archivos")
+    cantidad = escribir_hoja_streaming(ws, filas, ruta_base_alternativa)
+    wb.save(archivo_excel)
+    log.info(f"📊 Resumen Excel (streaming, {cantidad} filas) generado en: {archivo_excel}")
+    return cantidad
@@ -1,28 +1,72 @@
-import hashlib
-import json
-import os
+from collections import Counter, defaultdict
 
-HASH_REGISTRO = "scripts/hashes_registrados.json"
+from scripts.motor_hash import calcular_hash_parcial
+from scripts.cache_hash import obtener_hash
+from scripts.registro_hashes import RegistroHashes, cargar_registro
+from scripts.registro_eventos import obtener_logger
+
+HASH_REGISTRO = "scripts/hashes_registrados.json"  # registro heredado, se migra una sola vez
+HASH_DB = "scripts/hashes_registrados.db"
+log = obtener_logger("hash_checker")
 
 def calcular_hash_archivo(ruta):
-    sha256 = hashlib.sha256()
-    with open(ruta, "rb") as f:
-        while chunk := f.read(8192):
-            sha256.update(chunk)
-    return sha256.hexdigest()
+    return obtener_hash(ruta)
 
 def cargar_hashes():
-    if os.path.exists(HASH_REGISTRO):
-        with open(HASH_REGISTRO, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return {}
-    return {}
+    return cargar_registro(HASH_DB, ruta_json=HASH_REGISTRO)
 
 def guardar_hashes(hashes):
-    with open(HASH_REGISTRO, "w", encoding="utf-8") as f:
-        json.dump(hashes, f, indent=2, ensure_ascii=False)
+    if not isinstance(hashes, RegistroHashes):
+        registro = cargar_hashes()
+        registro.update(hashes)
+        hashes = registro
+    hashes.guardar()
 
 def es_duplicado(hash_actual, hashes_existentes):
-    return hash_actual in hashes_existentes.values()
\ No newline at end of file
+    if isinstance(hashes_existentes, RegistroHashes):
+        return hashes_existentes.contiene_hash(hash_actual)
+    return hash_actual in hashes_existentes.values()
+
+def prefiltrar_candidatos(tamanos, hashes_existentes):
+    """
+    Prefiltro de duplicados por etapas: tamaño → hash parcial (inicio y fin).
+    tamanos es {ruta: tamaño}. Devuelve (candidatos, parciales): las rutas que
+    necesitan SHA-256 completo para decidir si son duplicado y los hashes
+    parciales ya calculados. El resto no puede coincidir con nada registrado
+    ni con otro archivo del lote.
+    Con legados sin completar todo el lote es candidato. Los heredados "sin
+    archivo" no cuentan para el prefiltro: el flujo los compara por SHA-256
+    completo con el hash que igual calcula al mover (ver mover_con_hash).
+    """
+    if not isinstance(hashes_existentes, RegistroHashes) or hashes_existentes.hay_legados():
+        return set(tamanos), {}
+    if hashes_existentes.hay_sin_archivo():
+        log.warning("⚠️ %s hashes heredados sin archivo: se comparan por SHA-256 completo "
+                    "(python -m scripts.registro_hashes --resolver BASE o --retirar)",
+                    len(hashes_existentes.sin_archivo()))
+
+    por_tamano = defaultdict(list)
+    for ruta, tamano in tamanos.items():
+        por_tamano[tamano].append(ruta)
+
+    candidatos = set()
+    parciales = {}
+    for tamano, rutas in por_tamano.items():
+        registrados = hashes_existentes.parciales_de_tamano(tamano)
+        if not registrados and len(rutas) == 1:
+            continue
+        if None in registrados:
+            candidatos.update(rutas)
+            continue
+
+        for ruta in rutas:
+            try:
+                parciales[ruta] = calcular_hash_parcial(ruta)
+            except OSError:
+                candidatos.add(ruta)  # el error se reporta al calcular el hash completo
+        repetidos = Counter(parciales[ruta] for ruta in rutas if ruta in parciales)
+        for ruta in rutas:
+            parcial = parciales.get(ruta)
+            if parcial is not None and (parcial in registrados or repetidos[parcial] > 1):
+                candidatos.add(ruta)
+    return candidatos, parciales
@@ -1,47 +1,47 @@
-import os
-import json
 from datetime import datetime
 
-HISTORIAL_PATH = "./historial_archivo.json"  # Usamos .json para coherencia con el formato
+from scripts.bitacora_historial import (
+    leer_entradas, agregar_entradas, reescribir, cargar_indice, clave_evento, IndiceEventos
+)
+from scripts.acumulados_historial import actualizar_acumulados
+
+HISTORIAL_PATH = "./historial_archivo.json"  # Se persiste como bitácora historial_archivo.jsonl
+CLAVE_CON_HASH = False  # True: el hash también forma parte de la clave de deduplicación
 
 # --- Cargar historial existente ---
 def cargar_historial(ruta_historial):
-    if os.path.exists(ruta_historial):
-        with open(ruta_historial, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return []
-    return []
+    return list(leer_entradas(ruta_historial))
 
-# --- Guardar historial actualizado ---
+# --- Guardar historial actualizado (reemplazo completo) ---
 def guardar_historial(historial, ruta_historial):
-    with open(ruta_historial, "w", encoding="utf-8") as f:
-        json.dump(historial, f, indent=2, ensure_ascii=False)
+    reescribir(ruta_historial, historial)
 
 # --- Verificar si un evento ya fue registrado ---
-def ya_registrado(historial, entrada):
+def ya_registrado(historial, entrada, con_hash=CLAVE_CON_HASH):
+    if isinstance(historial, IndiceEventos):
+        return historial.contiene(entrada, con_hash)
     return any(
         h["archivo"] == entrada["archivo"] and h["evento"] == entrada["evento"]
+        and (not con_hash or h.get("hash") == entrada.get("hash"))
         for h in historial
     )
 
 # --- Registrar un evento puntual ---
 def registrar_evento(ruta_historial, evento, archivo_afectado=None, hash_archivo=None):
-    historial = cargar_historial(ruta_historial)
     entrada = {
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "evento": evento,
         "archivo": archivo_afectado,
         "hash": hash_archivo
     }
-    if not ya_registrado(historial, entrada):
-        historial.append(entrada)
-        guardar_historial(historial, ruta_historial)
+    if not ya_registrado(cargar_indice(ruta_historial), entrada):
+        agregar_entradas(ruta_historial, [entrada])
 
 # --- Registrar múltiples eventos desde resumen_data ---
 def actualizar_historial(resumen_data, ruta_historial, entorno=None):
-    historial = cargar_historial(ruta_historial)
+    indice = cargar_indice(ruta_historial)
+    en_lote = IndiceEventos()
+    nuevas = []
 
     for item in resumen_data:
         entrada = {
@@ -59,7 +59,10 @@ def actualizar_historial(resumen_data, ruta_historial, entorno=None):
             "hash": item.get("hash"),
             "alerta_integridad": item.get("alerta_integridad", False)
         }
-        if not ya_registrado(historial, entrada):
-            historial.append(entrada)
+        if not ya_registrado(indice, entrada) and not ya_registrado(en_lote, entrada):
+            en_lote.agregar(clave_evento(entrada))
+            nuevas.append(entrada)
 
-    guardar_historial(historial, ruta_historial)
\ No newline at end of file
+    agregar_entradas(ruta_historial, nuevas)
+    cargar_indice(ruta_historial)  # incorpora al índice solo lo recién agregado
+    actualizar_acumulados(ruta_historial)
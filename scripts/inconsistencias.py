@@ -0,0 +1,112 @@
+"""
+inconsistencias.py
+
+Auditoría de inconsistencias (hash registrado sin archivo físico) por directorio.
+
+- Las rutas esperadas se agrupan por carpeta: un os.scandir por carpeta en lugar
+  de un os.path.exists por documento (cada uno es un viaje por la red en SMB)
+- Carpetas sin cambios: si su mtime y el conjunto de nombres esperados son los
+  de la última pasada verificada, se reutiliza el resultado sin listarla
+- Las carpetas se consultan en paralelo (la espera es de red, no de CPU)
+- Estado persistente en JSON con escritura atómica
+
+Una carpeta cuyo mtime cae dentro de MARGEN_MTIME de la verificación no se da
+por verificada: un cambio en el mismo instante podría no mover el mtime.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RUTA_ESTADO = "scripts/estado_inconsistencias.json"
+VERSION_ESTADO = 2
+HILOS_ESCANEO = 8
+CARPETAS_POR_TAREA = 64
+MARGEN_MTIME = 2 * 10**9  # nanosegundos
+
+estadisticas = {"carpetas": 0, "escaneadas": 0, "reutilizadas": 0, "ausentes": 0, "rutas": 0}
+
+def _cargar_estado(ruta_estado):
+    try:
+        with open(ruta_estado, "r", encoding="utf-8") as f:
+            estado = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if estado.get("version") != VERSION_ESTADO:
+        return {}
+    return estado.get("carpetas", {})
+
+def _guardar_estado(ruta_estado, carpetas):
+    carpeta = os.path.dirname(ruta_estado)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    contenido = json.dumps({"version": VERSION_ESTADO, "carpetas": carpetas}, separators=(",", ":"))
+    with open(f"{ruta_estado}.tmp", "w", encoding="utf-8") as f:
+        f.write(contenido)
+    os.replace(f"{ruta_estado}.tmp", ruta_estado)
+
+def _huella(nombres):
+    # Identifica el conjunto de nombres esperados sin guardarlos todos en el estado
+    return hashlib.blake2b("\n".join(sorted(nombres)).encode("utf-8"), digest_size=16).hexdigest()
+
+def _verificar_carpeta(carpeta, esperados, previo):
+    """
+    Devuelve (entrada de estado, nombres faltantes, "escaneada" | "reutilizada" | "ausente").
+    La entrada es [mtime_ns, huella, estable, faltantes].
+    """
+    huella = _huella(esperados)
+    try:
+        mtime = os.stat(carpeta).st_mtime_ns
+        if previo and previo[0] == mtime and previo[1] == huella and previo[2]:
+            return previo, previo[3], "reutilizada"
+        verificado = time.time_ns()
+        with os.scandir(carpeta) as entradas:
+            presentes = {os.path.normcase(e.name) for e in entradas}
+    except OSError:
+        # Igual que os.path.exists: una carpeta inaccesible cuenta como ausente
+        return None, sorted(esperados), "ausente"
+    faltantes = sorted(n for n in esperados if os.path.normcase(n) not in presentes)
+    return [mtime, huella, verificado - mtime > MARGEN_MTIME, faltantes], faltantes, "escaneada"
+
+def detectar_inconsistencias(registros, ruta_estado=RUTA_ESTADO, hilos=HILOS_ESCANEO):
+    """
+    registros: iterable de (hash, ruta). Devuelve las inconsistencias con el
+    mismo formato que el chequeo por archivo: {"hash", "ruta_esperada", "estado"}.
+    ruta_estado=None desactiva la reutilización entre pasadas.
+    """
+    por_carpeta = {}
+    for hash_registrado, ruta in registros:
+        carpeta, nombre = os.path.split(ruta)
+        por_carpeta.setdefault(carpeta, {}).setdefault(nombre, []).append((hash_registrado, ruta))
+
+    estado_previo = _cargar_estado(ruta_estado) if ruta_estado else {}
+    estado_nuevo = {}
+    inconsistencias = []
+    estadisticas.update(carpetas=len(por_carpeta), escaneadas=0, reutilizadas=0, ausentes=0,
+                        rutas=sum(len(r) for n in por_carpeta.values() for r in n.values()))
+
+    def verificar(carpetas):
+        return [(c, _verificar_carpeta(c, por_carpeta[c], estado_previo.get(c))) for c in carpetas]
+
+    carpetas = sorted(por_carpeta)
+    tareas = [carpetas[i:i + CARPETAS_POR_TAREA] for i in range(0, len(carpetas), CARPETAS_POR_TAREA)]
+    with ThreadPoolExecutor(max_workers=max(1, hilos), thread_name_prefix="inconsistencias") as pool:
+        for lote in pool.map(verificar, tareas):
+            for carpeta, (entrada, faltantes, resultado) in lote:
+                estadisticas[f"{resultado}s"] += 1
+                if entrada is not None:
+                    estado_nuevo[carpeta] = entrada
+                for nombre in faltantes:
+                    for hash_registrado, ruta in por_carpeta[carpeta][nombre]:
+                        inconsistencias.append({
+                            "hash": hash_registrado,
+                            "ruta_esperada": ruta,
+                            "estado": "Archivo no encontrado"
+                        })
+
+    # Si todo se reutilizó y no cambió el conjunto de carpetas, el estado es el mismo
+    if ruta_estado and not (estadisticas["reutilizadas"] == len(estado_previo) == len(estado_nuevo)):
+        _guardar_estado(ruta_estado, estado_nuevo)
+    return inconsistencias
@@ -0,0 +1,337 @@
+"""
+indice_merkle.py
+
+Índice de integridad del archivo (Legajos) como árbol de Merkle en SQLite.
+
+- Una hoja por documento (su SHA-256, el mismo que se calcula al moverlo)
+- Un nodo por carpeta: cuenta, categoría, subrol y año. El hash de la carpeta
+  resume el de sus hijos; la raíz atestigua el archivo completo
+- Construcción inicial desde el disco la primera vez que lo usa el flujo
+  (construir_si_falta), así los documentos previos al índice quedan dentro
+- Actualización incremental: cada movimiento marca sus carpetas ancestro y
+  guardar() recalcula solo esas, en una transacción
+- Probar una cuenta intacta rehashea solo esa cuenta; comparar dos instantáneas
+  baja únicamente por las carpetas cuyo hash cambió
+
+La base vive junto al archivo (NOMBRE_INDICE en la carpeta raíz) y se abre con
+la primera operación. Las carpetas sin documentos no tienen nodo.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from scripts.motor_hash import hashear_en_paralelo
+from scripts.registro_eventos import obtener_logger
+
+NOMBRE_INDICE = "_indice_integridad.db"
+GUARDAR_CADA = 1000  # movimientos pendientes antes de volcar al disco
+HILOS_VERIFICACION = 4
+
+log = obtener_logger("indice_merkle")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS archivos (
+    ruta TEXT PRIMARY KEY,
+    carpeta TEXT NOT NULL,
+    nombre TEXT NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_archivos_carpeta ON archivos (carpeta);
+CREATE TABLE IF NOT EXISTS nodos (
+    ruta TEXT PRIMARY KEY,
+    padre TEXT,
+    nombre TEXT NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_nodos_padre ON nodos (padre);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+# 🌳 Hashes de carpeta
+def _profundidad(carpeta):
+    return carpeta.count("/") + 1 if carpeta else 0
+
+def _hash_carpeta(hijos):
+    """hijos: (tipo, nombre, hash) con tipo "a" (archivo) o "d" (carpeta)."""
+    digesto = hashlib.sha256()
+    for tipo, nombre, h in sorted(hijos, key=lambda hijo: hijo[1]):
+        digesto.update(f"{tipo} {nombre} {h}\n".encode("utf-8"))
+    return digesto.hexdigest()
+
+def _hashes_de_carpetas(archivos):
+    """{ruta_relativa: hash} → {carpeta: hash} para todas las carpetas con documentos."""
+    hijos = {}
+    for ruta, h in archivos.items():
+        carpeta, _, nombre = ruta.rpartition("/")
+        hijos.setdefault(carpeta, []).append(("a", nombre, h))
+    for carpeta in list(hijos):
+        while carpeta:
+            carpeta = carpeta.rpartition("/")[0]
+            hijos.setdefault(carpeta, [])
+
+    hashes = {}
+    for carpeta in sorted(hijos, key=_profundidad, reverse=True):
+        hashes[carpeta] = _hash_carpeta(hijos[carpeta])
+        if carpeta:
+            padre, _, nombre = carpeta.rpartition("/")
+            hijos[padre].append(("d", nombre, hashes[carpeta]))
+    return hashes
+
+def _diferencias(antes, despues):
+    """Compara {ruta: hash} y devuelve [(ruta, "agregado" | "eliminado" | "modificado")]."""
+    cambios = [(ruta, "eliminado") for ruta in antes.keys() - despues.keys()]
+    cambios += [(ruta, "agregado") for ruta in despues.keys() - antes.keys()]
+    cambios += [(ruta, "modificado") for ruta in antes.keys() & despues.keys() if antes[ruta] != despues[ruta]]
+    return sorted(cambios)
+
+# 🗂️ Índice
+class IndiceMerkle:
+    """
+    Árbol de Merkle del archivo con raíz en base. Las rutas se guardan relativas
+    a base y con "/" como separador; la raíz es la carpeta "".
+    excluir: nombres del primer nivel que no son parte del archivo (p. ej. Docupen).
+    """
+
+    def __init__(self, base, ruta_db=None, excluir=()):
+        self.base = os.path.abspath(base)
+        self.ruta_db = ruta_db or os.path.join(self.base, NOMBRE_INDICE)
+        self.excluir = set(excluir)
+        self._conexion = None
+        self._pendientes = {}   # ruta → hash (None = quitar)
+        self._sucias = set()    # carpetas a recalcular en el próximo guardar()
+        self._lock = threading.RLock()
+
+    @property
+    def conexion(self):
+        if self._conexion is None:
+            carpeta = os.path.dirname(self.ruta_db)
+            if carpeta:
+                os.makedirs(carpeta, exist_ok=True)
+            self._conexion = sqlite3.connect(self.ruta_db, check_same_thread=False)
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute("PRAGMA synchronous=NORMAL")
+            self._conexion.executescript(ESQUEMA)
+        return self._conexion
+
+    def _relativa(self, ruta):
+        relativa = os.path.relpath(os.path.abspath(ruta), self.base)
+        if relativa == os.curdir:
+            return ""
+        if relativa == os.pardir or relativa.startswith(os.pardir + os.sep):
+            raise ValueError(f"Ruta fuera del archivo {self.base}: {ruta}")
+        return relativa.replace(os.sep, "/")
+
+    def _marcar(self, carpeta):
+        while True:
+            self._sucias.add(carpeta)
+            if not carpeta:
+                return
+            carpeta = carpeta.rpartition("/")[0]
+
+    # ✏️ Cambios incrementales
+    def agregar(self, ruta, h):
+        """Registra el documento movido a ruta con su SHA-256."""
+        relativa = self._relativa(ruta)
+        with self._lock:
+            self._pendientes[relativa] = h
+            self._marcar(relativa.rpartition("/")[0])
+            if len(self._pendientes) >= GUARDAR_CADA:
+                self.guardar()
+
+    def quitar(self, ruta):
+        relativa = self._relativa(ruta)
+        with self._lock:
+            self._pendientes[relativa] = None
+            self._marcar(relativa.rpartition("/")[0])
+
+    def guardar(self):
+        """Vuelca los cambios y recalcula las carpetas afectadas, de la más profunda a la raíz."""
+        with self._lock:
+            if not self._pendientes and not self._sucias:
+                return 0
+            cantidad = len(self._pendientes)
+            conexion = self.conexion
+            with conexion:
+                conexion.executemany("DELETE FROM archivos WHERE ruta = ?",
+                                     ((ruta,) for ruta, h in self._pendientes.items() if h is None))
+                conexion.executemany("INSERT OR REPLACE INTO archivos (ruta, carpeta, nombre, hash) "
+                                     "VALUES (?, ?, ?, ?)",
+                                     ((ruta, *ruta.rpartition("/")[::2], h)
+                                      for ruta, h in self._pendientes.items() if h is not None))
+                for carpeta in sorted(self._sucias, key=_profundidad, reverse=True):
+                    hijos = [("a", nombre, h) for nombre, h in conexion.execute(
+                        "SELECT nombre, hash FROM archivos WHERE carpeta = ?", (carpeta,))]
+                    hijos += [("d", nombre, h) for nombre, h in conexion.execute(
+                        "SELECT nombre, hash FROM nodos WHERE padre = ?", (carpeta,))]
+                    if hijos:
+                        padre, _, nombre = carpeta.rpartition("/")
+                        conexion.execute("INSERT OR REPLACE INTO nodos (ruta, padre, nombre, hash) "
+                                         "VALUES (?, ?, ?, ?)",
+                                         (carpeta, padre if carpeta else None, nombre, _hash_carpeta(hijos)))
+                    else:
+                        conexion.execute("DELETE FROM nodos WHERE ruta = ?", (carpeta,))
+            self._pendientes.clear()
+            self._sucias.clear()
+            return cantidad
+
+    # 🔎 Consultas
+    def hash_de(self, carpeta=""):
+        """Hash del nodo de la carpeta (relativa a base); None si no tiene documentos."""
+        self.guardar()
+        fila = self.conexion.execute("SELECT hash FROM nodos WHERE ruta = ?", (carpeta,)).fetchone()
+        return fila[0] if fila else None
+
+    def raiz(self):
+        """Hash raíz: atestigua el archivo completo."""
+        return self.hash_de("")
+
+    def hijos(self, carpeta=""):
+        """{nombre: (tipo, hash)} de los hijos directos de la carpeta."""
+        self.guardar()
+        hijos = {nombre: ("a", h) for nombre, h in self.conexion.execute(
+            "SELECT nombre, hash FROM archivos WHERE carpeta = ?", (carpeta,))}
+        hijos.update({nombre: ("d", h) for nombre, h in self.conexion.execute(
+            "SELECT nombre, hash FROM nodos WHERE padre = ?", (carpeta,))})
+        return hijos
+
+    def archivos_bajo(self, carpeta=""):
+        """{ruta: hash} de los documentos registrados dentro de la carpeta."""
+        self.guardar()
+        if not carpeta:
+            return dict(self.conexion.execute("SELECT ruta, hash FROM archivos"))
+        prefijo = carpeta.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "/%"
+        return dict(self.conexion.execute(
+            "SELECT ruta, hash FROM archivos WHERE ruta LIKE ? ESCAPE '\\'", (prefijo,)))
+
+    def comparar(self, otro, carpeta=""):
+        """
+        Cambios de self (antes) a otro (después), bajando solo por las carpetas
+        cuyo hash difiere. Devuelve [(ruta, "agregado" | "eliminado" | "modificado")].
+        """
+        if self.hash_de(carpeta) == otro.hash_de(carpeta):
+            return []
+        antes, despues = self.hijos(carpeta), otro.hijos(carpeta)
+        cambios = []
+        for nombre in sorted(antes.keys() | despues.keys()):
+            ruta = f"{carpeta}/{nombre}" if carpeta else nombre
+            previo, nuevo = antes.get(nombre), despues.get(nombre)
+            if previo == nuevo:
+                continue
+            if previo and nuevo and previo[0] == nuevo[0] == "d":
+                cambios += self.comparar(otro, ruta)
+            elif previo and nuevo and previo[0] == nuevo[0] == "a":
+                cambios.append((ruta, "modificado"))
+            else:
+                anteriores = self.archivos_bajo(ruta) if previo and previo[0] == "d" else {}
+                posteriores = otro.archivos_bajo(ruta) if nuevo and nuevo[0] == "d" else {}
+                if previo and previo[0] == "a":
+                    anteriores[ruta] = previo[1]
+                if nuevo and nuevo[0] == "a":
+                    posteriores[ruta] = nuevo[1]
+                cambios += _diferencias(anteriores, posteriores)
+        return sorted(cambios)
+
+    # 💽 Disco
+    def _archivos_en_disco(self, carpeta="", hilos=HILOS_VERIFICACION):
+        rutas = []
+        for raiz, carpetas, archivos in os.walk(os.path.join(self.base, carpeta)):
+            if os.path.abspath(raiz) == self.base:
+                carpetas[:] = [c for c in carpetas if c not in self.excluir]
+                archivos = [a for a in archivos if not a.startswith(NOMBRE_INDICE) and a not in self.excluir]
+            rutas.extend(os.path.join(raiz, nombre) for nombre in archivos)
+        return {self._relativa(ruta): futuro.result() for ruta, futuro in hashear_en_paralelo(rutas, hilos)}
+
+    def construir(self, hilos=HILOS_VERIFICACION):
+        """Reconstruye el índice completo desde el disco (rehashea todo el archivo)."""
+        archivos = self._archivos_en_disco("", hilos)
+        carpetas = _hashes_de_carpetas(archivos) if archivos else {}
+        with self._lock:
+            self._pendientes.clear()
+            self._sucias.clear()
+            with self.conexion:
+                self.conexion.execute("DELETE FROM archivos")
+                self.conexion.execute("DELETE FROM nodos")
+                self.conexion.executemany(
+                    "INSERT INTO archivos (ruta, carpeta, nombre, hash) VALUES (?, ?, ?, ?)",
+                    ((ruta, *ruta.rpartition("/")[::2], h) for ruta, h in archivos.items()))
+                self.conexion.executemany(
+                    "INSERT INTO nodos (ruta, padre, nombre, hash) VALUES (?, ?, ?, ?)",
+                    ((c, c.rpartition("/")[0] if c else None, c.rpartition("/")[2], h)
+                     for c, h in carpetas.items()))
+                self.conexion.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('construido', ?)",
+                                      (datetime.now().isoformat(timespec="seconds"),))
+        return len(archivos)
+
+    def construir_si_falta(self, hilos=HILOS_VERIFICACION):
+        """
+        Construye el índice desde el disco si nunca se construyó (base nueva o
+        creada solo con agregar()). Devuelve los documentos indexados o None.
+        """
+        with self._lock:
+            if self.conexion.execute("SELECT 1 FROM meta WHERE clave = 'construido'").fetchone():
+                return None
+            return self.construir(hilos)
+
+    def verificar(self, carpeta="", hilos=HILOS_VERIFICACION):
+        """
+        Rehashea solo los documentos de la carpeta (p. ej. una cuenta) y compara
+        el hash resultante con el del índice.
+        """
+        carpeta = carpeta.strip("/").replace(os.sep, "/")
+        en_disco = self._archivos_en_disco(carpeta, hilos)
+        actual = _hashes_de_carpetas(en_disco).get(carpeta) if en_disco else None
+        esperado = self.hash_de(carpeta)
+        resultado = {"carpeta": carpeta, "intacto": actual == esperado, "esperado": esperado,
+                     "actual": actual, "diferencias": []}
+        if not resultado["intacto"]:
+            resultado["diferencias"] = _diferencias(self.archivos_bajo(carpeta), en_disco)
+        return resultado
+
+    def instantanea(self, ruta_destino):
+        """Copia consistente del índice (para comparar más adelante con comparar())."""
+        self.guardar()
+        destino = sqlite3.connect(ruta_destino)
+        try:
+            self.conexion.backup(destino)
+        finally:
+            destino.close()
+        return IndiceMerkle(self.base, ruta_destino, self.excluir)
+
+    def cerrar(self):
+        with self._lock:
+            self.guardar()
+            if self._conexion is not None:
+                self._conexion.close()
+                self._conexion = None
+
+# 🧠 Ejecución directa: python -m scripts.indice_merkle BASE [--construir] [--verificar CARPETA]
+if __name__ == "__main__":
+    import sys
+
+    from scripts.registro_eventos import configurar_registro, detener_registro
+
+    argumentos = sys.argv[1:]
+    if not argumentos:
+        sys.exit("Uso: python -m scripts.indice_merkle BASE [--construir] [--verificar CARPETA]")
+    configurar_registro("info")
+    indice = IndiceMerkle(argumentos[0])
+    if "--construir" in argumentos or indice.raiz() is None:
+        log.info(f"🌳 Índice construido: {indice.construir()} documentos")
+    if "--verificar" in argumentos:
+        posicion = argumentos.index("--verificar") + 1
+        resultado = indice.verificar(argumentos[posicion] if posicion < len(argumentos) else "")
+        if resultado["intacto"]:
+            log.info(f"✅ {resultado['carpeta'] or 'Archivo'} intacto: {resultado['actual']}")
+        else:
+            log.warning(f"❌ {resultado['carpeta'] or 'Archivo'} con cambios:")
+            for ruta, estado in resultado["diferencias"]:
+                log.warning(f"   {estado}: {ruta}")
+    log.info(f"🔐 Raíz: {indice.raiz()}")
+    indice.cerrar()
+    detener_registro()
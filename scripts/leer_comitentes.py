@@ -1,5 +1,4 @@
-import pandas as pd
-from collections import defaultdict
+from scripts.comitentes import cargar_comitentes
 
 def leer_comitentes(path_excel):
     """
@@ -7,23 +6,16 @@ def leer_comitentes(path_excel):
     - cuentas_info: dict con info por cuenta comitente
     - cuit_to_cuentas: dict inverso con CUIT como clave y lista de cuentas asociadas
     """
-    df = pd.read_excel(path_excel, dtype=str).fillna("")
+    mapas = cargar_comitentes(path_excel)
 
-    cuentas_info = {}
-    cuit_to_cuentas = defaultdict(list)
-
-    for _, row in df.iterrows():
-        cuenta = row["Cuenta"]
-        cuit = row["CUIT"]
-        tipo = row["Tipo"]  # Físico / Jurídico
-        nombre = row["Nombre"]
-
-        cuentas_info[cuenta] = {
-            "CUIT": cuit,
-            "Tipo": tipo,
-            "Nombre": nombre
+    cuentas_info = {
+        cuenta: {
+            "CUIT": datos["CUIT"],
+            "Tipo": mapas["tipo_original"][cuenta],  # Físico / Jurídico
+            "Nombre": datos["Nombre"]
         }
+        for cuenta, datos in mapas["datos"].items()
+    }
+    cuit_to_cuentas = {cuit: list(cuentas) for cuit, cuentas in mapas["cuit_cuentas"].items()}
 
-        cuit_to_cuentas[cuit].append(cuenta)
-
-    return cuentas_info, dict(cuit_to_cuentas)
\ No newline at end of file
+    return cuentas_info, cuit_to_cuentas
\ No newline at end of file
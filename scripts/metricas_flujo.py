@@ -0,0 +1,184 @@
+"""
+metricas_flujo.py
+
+Métricas por etapa de cada ejecución, legibles por máquina.
+
+- Contadores (archivos vistos, bytes hasheados, duplicados, directorios creados...)
+- Tiempo por etapa del flujo (archivado, historial, resumen, inconsistencias...)
+- Histogramas de latencia por archivo (hash, movimiento, archivo completo)
+- Al terminar: un JSON con todo y un archivo .prom para el textfile collector
+  de node_exporter (escritura atómica: el collector nunca lee un archivo a medias)
+
+Todo se acumula en el proceso y es seguro entre hilos; reiniciar() arranca una
+ejecución nueva.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+
+from scripts.registro_eventos import obtener_logger
+
+PREFIJO = "archivado"
+LIMITES_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+DESCRIPCIONES = {
+    "ejecucion_fallida": "1 si la ejecución terminó con error",
+    "archivos_vistos": "Archivos encontrados en Docupen",
+    "archivos_movidos": "Archivos archivados en Legajos",
+    "duplicados": "Archivos descartados por hash duplicado",
+    "colisiones": "Colisiones de hash detectadas",
+    "errores": "Archivos con error al clasificar o mover",
+    "bytes_hasheados": "Bytes leídos para calcular SHA-256",
+    "bytes_movidos": "Bytes de los archivos archivados",
+    "directorios_creados": "Llamadas a mkdir en Legajos",
+    "directorios_consultados": "Consultas de directorio al sistema de archivos",
+    "cache_hash_aciertos": "Hashes obtenidos de la caché sin leer el archivo",
+    "filas_historial": "Filas procesadas por el historial",
+    "filas_resumen": "Filas escritas en el resumen",
+    "inconsistencias": "Hashes registrados sin archivo físico",
+    "carpetas_listadas": "Carpetas listadas al auditar inconsistencias",
+    "carpetas_sin_cambios": "Carpetas sin cambios desde la última auditoría (no se listan)",
+    "hash": "Latencia de SHA-256 por archivo",
+    "movimiento": "Latencia de movimiento por archivo",
+    "archivo": "Latencia total por archivo (clasificar a registrar)",
+}
+
+_lock = threading.Lock()
+_contadores = {}
+_etapas = {}        # etapa → segundos
+_histogramas = {}   # nombre → {"cubetas": [...], "suma": s, "cantidad": n}
+_pipeline = {}
+_inicio = time.time()
+log = obtener_logger("metricas")
+
+def reiniciar():
+    global _inicio
+    with _lock:
+        _contadores.clear()
+        _etapas.clear()
+        _histogramas.clear()
+        _pipeline.clear()
+        _inicio = time.time()
+
+# ➕ Registro
+def sumar(nombre, cantidad=1):
+    with _lock:
+        _contadores[nombre] = _contadores.get(nombre, 0) + cantidad
+
+def fijar(nombre, valor):
+    with _lock:
+        _contadores[nombre] = valor
+
+def observar(nombre, segundos):
+    """Agrega una latencia por archivo al histograma nombre."""
+    with _lock:
+        histograma = _histogramas.get(nombre)
+        if histograma is None:
+            histograma = _histogramas[nombre] = {
+                "cubetas": [0] * (len(LIMITES_LATENCIA) + 1), "suma": 0.0, "cantidad": 0
+            }
+        histograma["cubetas"][bisect_left(LIMITES_LATENCIA, segundos)] += 1
+        histograma["suma"] += segundos
+        histograma["cantidad"] += 1
+
+@contextmanager
+def medir(etapa):
+    """Suma al tiempo de la etapa lo que tarda el bloque (también si termina con error)."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracion = time.perf_counter() - inicio
+        with _lock:
+            _etapas[etapa] = _etapas.get(etapa, 0.0) + duracion
+
+def registrar_pipeline(metricas):
+    """Incorpora las métricas de Pipeline.metricas() (por etapa del pipeline de archivado)."""
+    with _lock:
+        _pipeline.update({nombre: dict(valores) for nombre, valores in metricas.items()})
+
+# 📊 Lectura y exportación
+def instantanea():
+    with _lock:
+        return {
+            "inicio": datetime.fromtimestamp(_inicio).isoformat(timespec="seconds"),
+            "duracion": round(time.time() - _inicio, 4),
+            "contadores": dict(_contadores),
+            "etapas": {etapa: round(segundos, 4) for etapa, segundos in _etapas.items()},
+            "histogramas": {
+                nombre: {
+                    "limites": list(LIMITES_LATENCIA),
+                    "cubetas": list(h["cubetas"]),
+                    "suma": round(h["suma"], 6),
+                    "cantidad": h["cantidad"]
+                }
+                for nombre, h in _histogramas.items()
+            },
+            "pipeline": {nombre: dict(valores) for nombre, valores in _pipeline.items()}
+        }
+
+def _escribir_atomico(ruta, contenido):
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(contenido)
+    os.replace(temporal, ruta)
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+def texto_prometheus(datos=None):
+    """Formato de exposición de Prometheus (valores de la última ejecución)."""
+    datos = datos or instantanea()
+    lineas = []
+
+    def metrica(nombre, tipo, ayuda, muestras):
+        lineas.append(f"# HELP {PREFIJO}_{nombre} {ayuda}")
+        lineas.append(f"# TYPE {PREFIJO}_{nombre} {tipo}")
+        for etiquetas, valor in muestras:
+            lineas.append(f"{PREFIJO}_{nombre}{etiquetas} {_numero(valor)}")
+
+    for nombre, valor in sorted(datos["contadores"].items()):
+        metrica(nombre, "gauge", DESCRIPCIONES.get(nombre, nombre), [("", valor)])
+
+    if datos["etapas"]:
+        metrica("etapa_segundos", "gauge", "Tiempo por etapa del flujo",
+                [(f'{{etapa="{etapa}"}}', segundos) for etapa, segundos in sorted(datos["etapas"].items())])
+
+    campos_pipeline = (("procesados", "Elementos procesados por etapa del pipeline"),
+                       ("ocupado", "Segundos ocupados por etapa del pipeline"),
+                       ("max_en_cola", "Profundidad máxima de la cola de entrada por etapa"))
+    for campo, ayuda in campos_pipeline if datos["pipeline"] else ():
+        metrica(f"pipeline_{campo}", "gauge", ayuda,
+                [(f'{{etapa="{etapa}"}}', valores[campo]) for etapa, valores in datos["pipeline"].items()])
+
+    for nombre, histograma in sorted(datos["histogramas"].items()):
+        lineas.append(f"# HELP {PREFIJO}_{nombre}_segundos {DESCRIPCIONES.get(nombre, nombre)}")
+        lineas.append(f"# TYPE {PREFIJO}_{nombre}_segundos histogram")
+        acumulado = 0
+        for limite, cantidad in zip(list(histograma["limites"]) + ["+Inf"], histograma["cubetas"]):
+            acumulado += cantidad
+            lineas.append(f'{PREFIJO}_{nombre}_segundos_bucket{{le="{limite}"}} {acumulado}')
+        lineas.append(f"{PREFIJO}_{nombre}_segundos_sum {_numero(histograma['suma'])}")
+        lineas.append(f"{PREFIJO}_{nombre}_segundos_count {histograma['cantidad']}")
+
+    metrica("duracion_segundos", "gauge", "Duración total de la ejecución", [("", datos["duracion"])])
+    metrica("ultima_ejecucion_timestamp_segundos", "gauge", "Fin de la última ejecución (epoch)",
+            [("", round(time.time(), 3))])
+    return "\n".join(lineas) + "\n"
+
+def exportar(ruta_json, ruta_prometheus=None):
+    """Escribe la instantánea como JSON y, si se indica, como textfile de Prometheus."""
+    datos = instantanea()
+    _escribir_atomico(ruta_json, json.dumps(datos, indent=2, ensure_ascii=False))
+    if ruta_prometheus:
+        _escribir_atomico(ruta_prometheus, texto_prometheus(datos))
+    log.info(f"📈 Métricas de la ejecución en {ruta_json}")
+    return datos
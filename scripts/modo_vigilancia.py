@@ -0,0 +1,231 @@
+"""
+modo_vigilancia.py
+
+Vigilancia continua de la bandeja de Docupen.
+
+- Linux: inotify vía ctypes (sin dependencias externas)
+- Otros sistemas o si inotify no está disponible: sondeo con os.scandir
+  que solo revisa las entradas nuevas o modificadas
+- Antirrebote: un archivo se entrega cuando su tamaño y mtime no cambian
+  durante espera_estable segundos (el escáner terminó de escribirlo)
+- Los archivos se entregan de a uno al callback, en orden de llegada
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from scripts.registro_eventos import obtener_logger
+
+ESPERA_ESTABLE = 2.0
+INTERVALO_SONDEO = 1.0
+IGNORAR_PREFIJOS = ("~$", ".")
+IGNORAR_SUFIJOS = (".tmp", ".part", ".crdownload")
+log = obtener_logger("vigilancia")
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENTO = struct.Struct("iIII")
+
+def _ignorado(nombre):
+    return nombre.startswith(IGNORAR_PREFIJOS) or nombre.lower().endswith(IGNORAR_SUFIJOS)
+
+def _firma(ruta):
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+# 🐧 Fuente de eventos: inotify
+class FuenteInotify:
+    """
+    Si el kernel desborda su cola (IN_Q_OVERFLOW) o se pierde la vigilancia
+    de la carpeta (IN_IGNORED), se relee la carpeta una vez con os.scandir
+    para no perder archivos.
+    """
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falló")
+        try:
+            self._agregar_vigilancia()
+        except OSError:
+            os.close(self.fd)
+            raise
+        self.activa = True
+
+    def _agregar_vigilancia(self):
+        mascara = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+        if self.libc.inotify_add_watch(self.fd, os.fsencode(self.carpeta), mascara) < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch falló para {self.carpeta}")
+
+    def _resincronizar(self):
+        try:
+            with os.scandir(self.carpeta) as entradas:
+                return {entrada.name for entrada in entradas if entrada.is_file()}
+        except OSError:
+            return set()
+
+    def _interpretar(self, datos):
+        nombres = set()
+        resincronizar = False
+        posicion = 0
+        while posicion + _EVENTO.size <= len(datos):
+            _, mascara, _, largo = _EVENTO.unpack_from(datos, posicion)
+            posicion += _EVENTO.size
+            nombre = datos[posicion:posicion + largo].rstrip(b"\0")
+            posicion += largo
+            if mascara & IN_Q_OVERFLOW:
+                log.warning("⚠️ Cola de inotify desbordada: se relee %s", self.carpeta)
+                resincronizar = True
+            elif mascara & IN_IGNORED:
+                log.warning("⚠️ Se perdió la vigilancia de %s; se vuelve a registrar", self.carpeta)
+                self.activa = False
+            elif nombre:
+                nombres.add(os.fsdecode(nombre))
+        if resincronizar:
+            nombres |= self._resincronizar()
+        return nombres
+
+    def esperar(self, timeout):
+        """Devuelve los nombres con actividad (puede volver vacío al vencer timeout)."""
+        if not self.activa:
+            time.sleep(max(timeout, 0))
+            try:
+                self._agregar_vigilancia()
+            except OSError:
+                return set()
+            self.activa = True
+            return self._resincronizar()
+        listos, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not listos:
+            return set()
+        try:
+            datos = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        return self._interpretar(datos)
+
+    def cerrar(self):
+        os.close(self.fd)
+
+# 🔁 Fuente de eventos: sondeo con os.scandir
+class FuenteSondeo:
+    def __init__(self, carpeta, intervalo=INTERVALO_SONDEO):
+        self.carpeta = carpeta
+        self.intervalo = intervalo
+        self.conocidos = {}
+
+    def esperar(self, timeout):
+        time.sleep(max(min(timeout, self.intervalo), 0))
+        actuales = {}
+        cambios = set()
+        with os.scandir(self.carpeta) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file():
+                    continue
+                st = entrada.stat()  # en Windows viene del listado, sin consulta extra
+                firma = (st.st_size, st.st_mtime_ns)
+                actuales[entrada.name] = firma
+                if self.conocidos.get(entrada.name) != firma:
+                    cambios.add(entrada.name)
+        self.conocidos = actuales
+        return cambios
+
+    def cerrar(self):
+        pass
+
+def crear_fuente(carpeta, intervalo=INTERVALO_SONDEO):
+    if sys.platform.startswith("linux"):
+        try:
+            return FuenteInotify(carpeta)
+        except (OSError, AttributeError) as e:
+            log.warning("⚠️ inotify no disponible (%s); se usa sondeo con os.scandir", e)
+    return FuenteSondeo(carpeta, intervalo)
+
+# 👀 Bucle de vigilancia con antirrebote
+def vigilar(carpeta, al_estabilizarse, espera_estable=ESPERA_ESTABLE, intervalo=INTERVALO_SONDEO,
+            detener=None, al_quedar_inactivo=None, fuente=None):
+    """
+    Entrega a al_estabilizarse(ruta) cada archivo de carpeta cuando deja de cambiar.
+    Los archivos presentes al arrancar se procesan primero. detener es un
+    threading.Event opcional; al_quedar_inactivo se llama al vaciarse la cola.
+    """
+    carpeta = str(carpeta)
+    fuente = fuente or crear_fuente(carpeta, intervalo)
+    pendientes = {}  # nombre → (firma, instante del último cambio)
+    fallidos = {}    # nombre → firma con la que falló (se reintenta si cambia)
+    procesados = 0
+
+    def anotar(nombre, ahora):
+        if _ignorado(nombre):
+            return
+        firma = _firma(os.path.join(carpeta, nombre))
+        if firma is None:
+            pendientes.pop(nombre, None)
+        elif nombre not in pendientes or pendientes[nombre][0] != firma:
+            pendientes[nombre] = (firma, ahora)
+
+    # Archivos que ya estaban: si su mtime es viejo, están listos de inmediato
+    ahora = time.monotonic()
+    with os.scandir(carpeta) as entradas:
+        for entrada in entradas:
+            if entrada.is_file() and not _ignorado(entrada.name):
+                st = entrada.stat()
+                antiguedad = time.time() - st.st_mtime_ns / 1e9
+                pendientes[entrada.name] = ((st.st_size, st.st_mtime_ns), ahora - max(antiguedad, 0))
+    if isinstance(fuente, FuenteSondeo):
+        fuente.conocidos = {n: f for n, (f, _) in pendientes.items()}
+
+    try:
+        while not (detener and detener.is_set()):
+            ahora = time.monotonic()
+            listos = [n for n, (_, desde) in pendientes.items() if ahora - desde >= espera_estable]
+            for nombre in sorted(listos, key=lambda n: pendientes[n][1]):
+                firma = _firma(os.path.join(carpeta, nombre))
+                if firma is None:
+                    pendientes.pop(nombre, None)
+                    continue
+                if firma != pendientes[nombre][0]:
+                    pendientes[nombre] = (firma, ahora)  # sigue escribiéndose
+                    continue
+                del pendientes[nombre]
+                if fallidos.get(nombre) == firma:
+                    continue
+                try:
+                    al_estabilizarse(os.path.join(carpeta, nombre))
+                    fallidos.pop(nombre, None)
+                    procesados += 1
+                except Exception as e:
+                    fallidos[nombre] = firma
+                    log.error("❌ Error al procesar %s: %s", nombre, e)
+
+            if procesados and not pendientes and al_quedar_inactivo:
+                al_quedar_inactivo()
+                procesados = 0
+
+            if pendientes:
+                proximo = min(desde for _, desde in pendientes.values()) + espera_estable
+                timeout = max(proximo - time.monotonic(), 0.05)
+            else:
+                timeout = intervalo
+            for nombre in fuente.esperar(timeout):
+                anotar(nombre, time.monotonic())
+    finally:
+        fuente.cerrar()
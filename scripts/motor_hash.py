@@ -0,0 +1,182 @@
+"""
+motor_hash.py
+
+Motor único de hash SHA-256 para todo el sistema documental.
+
+- Lectura por bloques grandes con readinto sobre un buffer preasignado y reutilizable
+- Archivos grandes vía mmap, digeridos por ventanas de memoryview (sin copias)
+- Memoria acotada: como máximo un buffer por hilo, sin importar el tamaño del archivo
+- Pool de hilos que calcula hashes por delante del flujo de clasificación y movimiento
+- Hash parcial (tamaño + bloque inicial + bloque final) para descartar duplicados sin leer todo
+- Movimiento entre volúmenes que calcula el SHA-256 durante la copia, con una sola lectura
+"""
+
+import hashlib
+import mmap
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts import metricas_flujo
+
+# ⚙️ Parámetros de lectura
+TAMANO_BUFFER = 1024 * 1024          # 1 MiB por lectura
+UMBRAL_MMAP = 64 * 1024 * 1024       # desde 64 MiB se usa mmap
+VENTANA_MMAP = 8 * 1024 * 1024       # bytes entregados a hashlib por paso en mmap
+ANTICIPACION_POR_HILO = 4            # archivos en vuelo por hilo del pool
+BLOQUE_PARCIAL = 64 * 1024           # bytes leídos al inicio y al final para el hash parcial
+
+_local = threading.local()
+
+# 🧠 Buffer reutilizable (uno por hilo)
+def _obtener_buffer(tamano):
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None or len(buffer) != tamano:
+        buffer = bytearray(tamano)
+        _local.buffer = buffer
+    return buffer
+
+# 📖 Lectura secuencial con readinto
+def _hash_por_bloques(f, sha256, tamano_buffer):
+    buffer = _obtener_buffer(tamano_buffer)
+    with memoryview(buffer) as vista:
+        while True:
+            leidos = f.readinto(buffer)
+            if not leidos:
+                break
+            sha256.update(vista[:leidos])
+
+# 🗺️ Lectura mapeada en memoria
+def _hash_mmap(f, sha256, tamano):
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+        with memoryview(mapa) as vista:
+            for inicio in range(0, tamano, VENTANA_MMAP):
+                sha256.update(vista[inicio:inicio + VENTANA_MMAP])
+
+# 🔐 Hash SHA-256 de un archivo
+def calcular_sha256(ruta, tamano_buffer=TAMANO_BUFFER, umbral_mmap=UMBRAL_MMAP):
+    """
+    Calcula el hash SHA-256 de un archivo con memoria acotada.
+    Usa mmap a partir de umbral_mmap bytes y lectura por bloques en el resto.
+    """
+    inicio = time.perf_counter()
+    sha256 = hashlib.sha256()
+    with open(ruta, "rb", buffering=0) as f:
+        tamano = os.fstat(f.fileno()).st_size
+        leido = False
+        if umbral_mmap and tamano >= umbral_mmap:
+            try:
+                _hash_mmap(f, sha256, tamano)
+                leido = True
+            except (OSError, ValueError):
+                # mmap no disponible (p. ej. algunos montajes de red): lectura normal
+                sha256 = hashlib.sha256()
+                f.seek(0)
+        if not leido:
+            _hash_por_bloques(f, sha256, tamano_buffer)
+    metricas_flujo.sumar("bytes_hasheados", tamano)
+    metricas_flujo.observar("hash", time.perf_counter() - inicio)
+    return sha256.hexdigest()
+
+# 🧩 Hash parcial: tamaño + bloque inicial + bloque final
+def calcular_hash_parcial(ruta, tamano_bloque=BLOQUE_PARCIAL):
+    """
+    Digest barato para descartar duplicados: dos archivos con distinto hash
+    parcial no pueden tener el mismo SHA-256. Lee como máximo 2 * tamano_bloque.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(ruta, "rb") as f:
+        tamano = os.fstat(f.fileno()).st_size
+        digest.update(tamano.to_bytes(8, "little"))
+        digest.update(f.read(tamano_bloque))
+        if tamano > 2 * tamano_bloque:
+            f.seek(-tamano_bloque, os.SEEK_END)
+            digest.update(f.read(tamano_bloque))
+        elif tamano > tamano_bloque:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+# 📦 Copia que calcula el hash en la misma lectura
+def copiar_con_hash(origen, destino, tamano_buffer=TAMANO_BUFFER):
+    sha256 = hashlib.sha256()
+    buffer = _obtener_buffer(tamano_buffer)
+    try:
+        with open(origen, "rb", buffering=0) as entrada, open(destino, "wb") as salida, \
+                memoryview(buffer) as vista:
+            total = 0
+            while True:
+                leidos = entrada.readinto(buffer)
+                if not leidos:
+                    break
+                sha256.update(vista[:leidos])
+                salida.write(vista[:leidos])
+                total += leidos
+        shutil.copystat(origen, destino)
+    except BaseException:
+        if os.path.exists(destino):
+            os.remove(destino)
+        raise
+    metricas_flujo.sumar("bytes_hasheados", total)
+    return sha256.hexdigest()
+
+# 💽 ¿Dos rutas en el mismo volumen? (rename sin copia)
+def mismo_volumen(ruta_a, ruta_b):
+    try:
+        return os.stat(ruta_a).st_dev == os.stat(ruta_b).st_dev
+    except OSError:
+        return False
+
+# 🚚 Mover y obtener el hash sin releer el archivo
+def mover_con_hash(origen, destino, hash_conocido=None, aceptar=None):
+    """
+    Mueve origen a destino y devuelve su SHA-256.
+    En el mismo volumen es un rename (el hash se calcula solo si no se conoce);
+    entre volúmenes el hash sale de la misma lectura de la copia.
+    Con aceptar, si aceptar(hash) es falso el movimiento se deshace (el archivo
+    queda en origen) y se devuelve None.
+    """
+    try:
+        os.rename(origen, destino)
+    except OSError:
+        hash_copia = copiar_con_hash(origen, destino)
+        if aceptar is not None and not aceptar(hash_copia):
+            os.remove(destino)
+            return None
+        os.remove(origen)
+        return hash_copia
+    hash_actual = hash_conocido or calcular_sha256(destino)
+    if aceptar is not None and not aceptar(hash_actual):
+        os.rename(destino, origen)
+        return None
+    return hash_actual
+
+# 🧵 Hash en paralelo por delante del consumidor
+def hashear_en_paralelo(rutas, hilos=1, funcion_hash=calcular_sha256):
+    """
+    Calcula hashes con un pool de hilos (hashlib libera el GIL) y entrega
+    pares (ruta, futuro) en el mismo orden de entrada.
+    futuro.result() devuelve el hash o relanza el error de lectura en el mismo
+    punto del flujo en que lo haría el cálculo secuencial.
+    La cantidad de archivos en vuelo está acotada a hilos * ANTICIPACION_POR_HILO.
+    Si el consumidor corta antes (o hay un error) se cancelan solo los futuros
+    que todavía no entregó; los entregados siempre terminan.
+    """
+    hilos = max(1, int(hilos or 1))
+    limite = hilos * ANTICIPACION_POR_HILO
+    pendientes = deque()
+
+    pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="hash")
+    try:
+        for ruta in rutas:
+            pendientes.append((ruta, pool.submit(funcion_hash, str(ruta))))
+            if len(pendientes) >= limite:
+                yield pendientes.popleft()
+        while pendientes:
+            yield pendientes.popleft()
+    finally:
+        for _, futuro in pendientes:
+            futuro.cancel()
+        pool.shutdown(wait=True)
@@ -0,0 +1,176 @@
+"""
+parser_nombres.py
+
+Tokenizador único de nombres de archivo de Docupen.
+
+- Patrones precompilados una sola vez por proceso
+- Una pasada por nombre: prefijo, cuenta, rol, descripción, año y subrol
+- Subrol con filtros literales: las expresiones solo corren si pueden coincidir
+- Memo LRU: los nombres repetidos no se vuelven a analizar
+- Vistas para los scripts que leen la convención con reglas propias
+  (auditoría, diagnóstico, renombrado y parser flexible), con el mismo resultado que antes
+"""
+
+import os
+import re
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+TAMANO_MEMO = 8192
+
+# 🧩 Patrones precompilados
+_PREFIJO_CUENTA = re.compile(r"^(0[1-9]|1[0-4])\.(\d+)")
+_ROL = re.compile(r"T\.|C\d+\.")
+_NO_PALABRA = re.compile(r"[^\w]")
+_FECHA = re.compile(r"\d{2}-\d{2}-\d{4}")
+_FECHA_SEPARADA = re.compile(r"(\d{2})[-_/](\d{2})[-_/](\d{4})")
+_FECHA_VALIDA = re.compile(r"^(0[1-9]|[12][0-9]|3[01])(0[1-9]|1[0-2])\d{4}$")
+_FECHA_COMPLETA = re.compile(r"^\d{2}-\d{2}-\d{4}$")
+_CUENTA_CORTA = re.compile(r"\b(\d{4,6})\b")
+_PREFIJO_NUMERICO = re.compile(r"^(\d{2,})[.\s_-]")
+_TIPO_DIAGNOSTICO = re.compile(r"^(T|C\d+)$")
+_CUIT_RL = re.compile(r"CUIT[\s\-_]*RL")
+_CUIT_BF = re.compile(r"CUIT[\s\-_]*BF")
+_BF = re.compile(r"\bBF\b")
+_TITULAR = re.compile(r"\bT[.\s_-]")
+_COTITULAR = re.compile(r"\bC(\d+)(?=[.\s_-])")
+_ESPACIOS = re.compile(r"\s+")
+_SEPARADORES = str.maketrans("_-", "  ")
+
+NombreArchivo = namedtuple("NombreArchivo", "prefijo cuenta rol descripcion anio subrol")
+
+# 🏷️ Subrol de constancias
+@lru_cache(maxsize=TAMANO_MEMO)
+def subrol_de(texto):
+    """
+    SOCIEDAD > REPRESENTANTE LEGAL > BENEFICIARIOS FINALES > TITULAR > COTITULAR n > OTROS.
+    Las búsquedas literales van primero: cada expresión corre solo si puede coincidir.
+    """
+    texto = texto.upper()
+    if "SOCIEDAD" in texto:
+        return "SOCIEDAD"
+    tiene_cuit = "CUIT" in texto
+    if (tiene_cuit and _CUIT_RL.search(texto)) or "REPRESENTANTE LEGAL" in texto:
+        return "REPRESENTANTE LEGAL"
+    if (tiene_cuit and _CUIT_BF.search(texto)) or "BENEFICIARIO FINAL" in texto or ("BF" in texto and _BF.search(texto)):
+        return "BENEFICIARIOS FINALES"
+    if "T" in texto and _TITULAR.search(texto):
+        return "TITULAR"
+    match = _COTITULAR.search(texto) if "C" in texto else None
+    if match:
+        return f"COTITULAR {match.group(1)}"
+    return "OTROS"
+
+# 📅 Año a partir de una fecha DD-MM-YYYY
+def _anio(nombre):
+    match = _FECHA.search(nombre)
+    if match:
+        try:
+            return str(datetime.strptime(match.group(), "%d-%m-%Y").year)
+        except ValueError:
+            pass
+    return "SIN_FECHA"
+
+# 🔎 Tokenizador principal (archivado automático)
+@lru_cache(maxsize=TAMANO_MEMO)
+def tokenizar(nombre):
+    """
+    Analiza un nombre tipo "01. 14959 T. CAC 10-09-2025.pdf" en una pasada.
+    Devuelve NombreArchivo; cuenta es None si el nombre no la trae.
+    """
+    partes_originales = nombre.split()
+    prefijo = partes_originales[0] if partes_originales and partes_originales[0].endswith((".", ".-")) else None
+
+    base = " ".join(os.path.splitext(nombre)[0].translate(_SEPARADORES).split())
+    match = _PREFIJO_CUENTA.match(base)
+    if match:
+        cuenta = match.group(2)
+        resto = base.replace(match.group(0), "").strip()
+    else:
+        partes = base.split(" ")
+        desplazamiento = 1 if partes[0].endswith(".") else 0
+        cuenta = partes[desplazamiento] if len(partes) > desplazamiento and partes[desplazamiento].isdigit() else None
+        resto = " ".join(partes[desplazamiento + 1:])
+
+    rol = None
+    for parte in resto.split():
+        parte = parte.upper()
+        if _ROL.search(parte):
+            rol = _NO_PALABRA.sub("", parte)
+            break
+    descripcion = (resto.replace(rol, "") if rol else resto).strip()
+
+    return NombreArchivo(prefijo, cuenta, rol, descripcion, _anio(nombre), subrol_de(descripcion))
+
+# 🔍 Vista de auditoría: cuenta de 4 a 6 dígitos, prefijo numérico, subrol y año
+@lru_cache(maxsize=TAMANO_MEMO)
+def vista_auditoria(nombre):
+    nombre = nombre.upper()
+    cuenta = _CUENTA_CORTA.search(nombre)
+    prefijo = _PREFIJO_NUMERICO.match(nombre)
+    fecha = _FECHA_SEPARADA.search(nombre)
+    return (
+        cuenta.group(1) if cuenta else "SIN_CUENTA",
+        prefijo.group(1) if prefijo else None,
+        subrol_de(nombre),
+        fecha.group(3) if fecha else "SIN_FECHA"
+    )
+
+# 🩺 Vista de diagnóstico: "CUENTA ROL. DESCRIPCION DD-MM-YYYY"
+@lru_cache(maxsize=TAMANO_MEMO)
+def vista_diagnostico(nombre):
+    """
+    Devuelve (cuenta, rol, descripcion, fecha, valido) o None si faltan partes.
+    fecha es None cuando el nombre no la trae (se completa con la fecha del día).
+    """
+    partes = os.path.splitext(nombre)[0].strip().split(" ")
+    if len(partes) < 4:
+        return None
+    cuenta = partes[0]
+    rol = partes[1].replace(".", "").upper()
+    fecha = partes[-1].replace("-", "") if _FECHA_COMPLETA.match(partes[-1]) else None
+    valido = (
+        cuenta.isdigit() and bool(_TIPO_DIAGNOSTICO.match(rol))
+        and (fecha is None or bool(_FECHA_VALIDA.match(fecha)))
+    )
+    return cuenta, rol, " ".join(partes[2:-1]).strip(), fecha, valido
+
+# ✏️ Vista de renombrado: partes para proponer un nombre corregido
+@lru_cache(maxsize=TAMANO_MEMO)
+def vista_renombrado(nombre):
+    """Devuelve (cuenta, rol, descripcion, fecha, extension) o None si faltan partes."""
+    base, extension = os.path.splitext(nombre)
+
+    partes = base.strip().split(" ")
+    if len(partes) < 2:
+        return None
+    descripcion = " ".join(partes[2:]) if len(partes) > 2 else ""
+    fecha = _FECHA.search(descripcion)
+    descripcion = _FECHA.sub("", descripcion).strip() or "SIN_DESCRIPCION"
+    return partes[0], partes[1].replace(".", "").upper(), descripcion, fecha.group() if fecha else None, extension
+
+# 🧷 Vista flexible: prefijo opcional y fecha en cualquier posición
+@lru_cache(maxsize=TAMANO_MEMO)
+def vista_flexible(nombre):
+    """
+    Devuelve (cuenta, resto, prefijo, fecha) o None si no hay cuenta numérica.
+    resto son las partes que siguen a la cuenta; fecha (DDMMYYYY) es None si el
+    nombre no la trae. Lanza IndexError si después del prefijo no hay nada.
+    """
+    partes = _ESPACIOS.sub(" ", os.path.splitext(nombre)[0]).strip().split(" ")
+    prefijo = partes[0] if partes[0].endswith((".", ".-")) else None
+    desplazamiento = 1 if prefijo else 0
+
+    cuenta = partes[desplazamiento]
+    if not cuenta.isdigit():
+        return None
+    fecha = None
+    for parte in reversed(partes):
+        if _FECHA.match(parte):
+            fecha = parte.replace("-", "")
+            break
+    return cuenta, " ".join(partes[desplazamiento + 1:]), prefijo, fecha
+
+def estadisticas_memo():
+    return {funcion.__name__: funcion.cache_info()._asdict() for funcion in (tokenizar, subrol_de, vista_auditoria)}
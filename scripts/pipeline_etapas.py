@@ -0,0 +1,201 @@
+"""
+pipeline_etapas.py
+
+Pipeline productor/consumidor por etapas conectadas con colas acotadas.
+
+- Cada etapa corre con su propia cantidad de hilos
+- Las colas acotadas dan contrapresión: una etapa lenta frena a las anteriores
+  en lugar de acumular archivos en memoria
+- Una etapa "ordenada" recibe los elementos en el orden de entrada (un hilo con
+  buffer de reordenamiento), para decisiones que dependen del orden
+- La última etapa corre en el hilo que llama a ejecutar() (p. ej. escrituras en SQLite)
+- Métricas por etapa: procesados, profundidad de cola, tiempo ocupado y rendimiento
+- Un error no controlado en cualquier etapa detiene el pipeline y se relanza en ejecutar()
+"""
+
+import queue
+import threading
+import time
+
+CAPACIDAD_COLA = 32
+ESPERA_CONTROL = 0.1  # segundos entre chequeos de detención mientras se bloquea
+_FIN = object()
+
+class Etapa:
+    def __init__(self, nombre, funcion, hilos=1, ordenada=False):
+        hilos = max(1, int(hilos or 1))
+        if ordenada and hilos != 1:
+            raise ValueError(f"La etapa ordenada '{nombre}' debe correr con un solo hilo.")
+        self.nombre = nombre
+        self.funcion = funcion
+        self.hilos = hilos
+        self.ordenada = ordenada
+        self.cola = None
+        self.procesados = 0
+        self.ocupado = 0.0
+        self.max_en_cola = 0
+        self._activos = 0
+        self._lock = threading.Lock()
+
+    def _medir(self, inicio):
+        with self._lock:
+            self.procesados += 1
+            self.ocupado += time.perf_counter() - inicio
+
+class Pipeline:
+    def __init__(self, etapas, capacidad=CAPACIDAD_COLA, nombre_fuente="fuente"):
+        if not etapas:
+            raise ValueError("El pipeline necesita al menos una etapa.")
+        if etapas[-1].hilos != 1:
+            raise ValueError("La última etapa corre en el hilo que llama: debe tener un solo hilo.")
+        self.fuente = Etapa(nombre_fuente, None)
+        self.etapas = list(etapas)
+        self.capacidad = max(1, int(capacidad or 1))
+        self._detener = threading.Event()
+        self._error = None
+        self._inicio = None
+        self._fin = None
+
+    # 🚦 Colas con contrapresión (bloquean, pero atienden la detención)
+    def _poner(self, etapa, elemento):
+        while not self._detener.is_set():
+            try:
+                etapa.cola.put(elemento, timeout=ESPERA_CONTROL)
+            except queue.Full:
+                continue
+            etapa.max_en_cola = max(etapa.max_en_cola, etapa.cola.qsize())
+            return True
+        return False
+
+    def _tomar(self, cola):
+        while not self._detener.is_set():
+            try:
+                return cola.get(timeout=ESPERA_CONTROL)
+            except queue.Empty:
+                continue
+        return _FIN
+
+    def _fallar(self, error):
+        if self._error is None:
+            self._error = error
+        self._detener.set()
+
+    def esperar(self, evento):
+        """Espera un evento desde una etapa sin trabar el pipeline si se detiene. Devuelve si ocurrió."""
+        while not evento.wait(ESPERA_CONTROL):
+            if self._detener.is_set():
+                return False
+        return True
+
+    # 🔁 Recepción: en orden de llegada o reordenada por número de secuencia
+    def _recibir(self, etapa):
+        siguiente = 0
+        buffer = {}
+        while True:
+            elemento = self._tomar(etapa.cola)
+            if elemento is _FIN:
+                if not etapa.ordenada and not self._detener.is_set():
+                    etapa.cola.put(_FIN)  # para los demás hilos de la etapa
+                return
+            if not etapa.ordenada:
+                yield elemento
+                continue
+            buffer[elemento[0]] = elemento[1]
+            while siguiente in buffer:
+                yield siguiente, buffer.pop(siguiente)
+                siguiente += 1
+
+    def _procesar(self, etapa, siguiente_etapa=None, resultados=None):
+        for secuencia, elemento in self._recibir(etapa):
+            inicio = time.perf_counter()
+            salida = etapa.funcion(elemento)
+            etapa._medir(inicio)
+            if resultados is not None:
+                resultados[secuencia] = salida
+            elif not self._poner(siguiente_etapa, (secuencia, salida)):
+                return
+
+    def _trabajar(self, etapa, siguiente_etapa):
+        try:
+            self._procesar(etapa, siguiente_etapa)
+        except BaseException as e:
+            self._fallar(e)
+            return
+        with etapa._lock:
+            etapa._activos -= 1
+            ultimo = etapa._activos == 0
+        if ultimo:
+            self._poner(siguiente_etapa, _FIN)
+
+    def _producir(self, elementos):
+        try:
+            iterador = iter(elementos)
+            secuencia = 0
+            while True:
+                inicio = time.perf_counter()
+                try:
+                    elemento = next(iterador)
+                except StopIteration:
+                    break
+                self.fuente._medir(inicio)
+                if not self._poner(self.etapas[0], (secuencia, elemento)):
+                    return
+                secuencia += 1
+        except BaseException as e:
+            self._fallar(e)
+            return
+        self._poner(self.etapas[0], _FIN)
+
+    # ▶️ Ejecución
+    def ejecutar(self, elementos):
+        """
+        Pasa cada elemento por todas las etapas y devuelve las salidas de la
+        última, en el orden de entrada.
+        """
+        for etapa in self.etapas:
+            etapa.cola = queue.Queue(maxsize=self.capacidad)
+            etapa._activos = etapa.hilos
+        self._inicio = time.perf_counter()
+
+        hilos = [threading.Thread(target=self._producir, args=(elementos,),
+                                  name=f"pipeline-{self.fuente.nombre}", daemon=True)]
+        for etapa, siguiente_etapa in zip(self.etapas, self.etapas[1:]):
+            for i in range(etapa.hilos):
+                hilos.append(threading.Thread(target=self._trabajar, args=(etapa, siguiente_etapa),
+                                              name=f"pipeline-{etapa.nombre}-{i}", daemon=True))
+        for hilo in hilos:
+            hilo.start()
+
+        resultados = {}
+        try:
+            self._procesar(self.etapas[-1], resultados=resultados)
+        except BaseException as e:
+            self._fallar(e)
+        finally:
+            self._detener.set()  # libera a los hilos que sigan bloqueados
+            for hilo in hilos:
+                hilo.join()
+            self._fin = time.perf_counter()
+
+        if self._error is not None:
+            raise self._error
+        return [resultados[secuencia] for secuencia in sorted(resultados)]
+
+    # 📊 Métricas por etapa
+    def metricas(self):
+        """Devuelve {etapa: {hilos, procesados, en_cola, max_en_cola, ocupado, por_segundo}}."""
+        if self._inicio is None:
+            transcurrido = 0
+        else:
+            transcurrido = (self._fin or time.perf_counter()) - self._inicio
+        metricas = {}
+        for etapa in [self.fuente] + self.etapas:
+            metricas[etapa.nombre] = {
+                "hilos": etapa.hilos,
+                "procesados": etapa.procesados,
+                "en_cola": etapa.cola.qsize() if etapa.cola is not None else 0,
+                "max_en_cola": etapa.max_en_cola,
+                "ocupado": round(etapa.ocupado, 4),
+                "por_segundo": round(etapa.procesados / transcurrido, 2) if transcurrido else 0.0
+            }
+        return metricas
@@ -1,8 +1,14 @@
-import os
 import re
+import sys
 from datetime import datetime
 from pathlib import Path
 
+# Agregar la raíz del proyecto al path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from scripts.parser_nombres import vista_renombrado
+
 CARPETA_ORIGEN = Path("C:/Legajos/Docupen")
 EXTENSIONES_VALIDAS = {".pdf", ".xlsx", ".docx", ".jpg", ".png", ".txt"}
 
@@ -19,22 +25,13 @@ def detectar_fecha(nombre):
     return datetime.now().strftime("%d-%m-%Y"), False
 
 def proponer_nombre_corregido(nombre_archivo):
-    nombre_limpio = limpiar_extension(nombre_archivo)
-    nombre_sin_ext, ext = os.path.splitext(nombre_limpio)
-
-    partes = nombre_sin_ext.strip().split(" ")
-    if len(partes) < 2:
+    partes = vista_renombrado(nombre_archivo)
+    if partes is None:
         return None
 
-    nro_cuenta = partes[0]
-    tipo_raw = partes[1].replace(".", "").upper()
-    nombre_doc = " ".join(partes[2:]) if len(partes) > 2 else ""
-
-    fecha_detectada, tiene_fecha = detectar_fecha(nombre_doc)
-    nombre_doc = re.sub(r"\d{2}-\d{2}-\d{4}", "", nombre_doc).strip()
-
-    if not nombre_doc:
-        nombre_doc = "SIN_DESCRIPCION"
+    nro_cuenta, tipo_raw, nombre_doc, fecha, ext = partes
+    tiene_fecha = fecha is not None
+    fecha_detectada = fecha if tiene_fecha else datetime.now().strftime("%d-%m-%Y")
 
     nuevo_nombre = f"{nro_cuenta} {tipo_raw}. {nombre_doc} {fecha_detectada}{ext}"
     return nuevo_nombre, tiene_fecha
@@ -0,0 +1,169 @@
+"""
+registro_eventos.py
+
+Registro del archivado sin frenar el flujo y con memoria constante.
+
+- logging con QueueHandler: los hilos del flujo solo encolan el mensaje; un
+  QueueListener en segundo plano escribe en consola y en logs/archivado.log
+- LogAuditoria: cada evento de auditoría se escribe en JSONL en el momento en
+  que se produce; en memoria quedan solo los contadores por estado
+- detener_registro() (también al salir) vacía la cola antes de terminar
+
+Los módulos piden su logger con obtener_logger("modulo"). Mientras nadie llama a
+configurar_registro() (tests, uso como biblioteca) los mensajes no se muestran.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+NOMBRE_LOGGER = "archivado"
+RUTA_LOG = "logs/archivado.log"
+CARPETA_AUDITORIA = "logs/auditoria"
+FORMATO_CONSOLA = "%(message)s"
+FORMATO_ARCHIVO = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+_listener = None
+_lock = threading.Lock()
+logging.getLogger(NOMBRE_LOGGER).addHandler(logging.NullHandler())
+
+def obtener_logger(nombre=None):
+    return logging.getLogger(f"{NOMBRE_LOGGER}.{nombre}" if nombre else NOMBRE_LOGGER)
+
+def _nivel(nivel):
+    if isinstance(nivel, int):
+        return nivel
+    valor = logging.getLevelName(str(nivel).upper())
+    if not isinstance(valor, int):
+        raise ValueError(f"Nivel de log inválido: {nivel}")
+    return valor
+
+# ▶️ Arranque y cierre del hilo de escritura
+def configurar_registro(nivel="info", ruta_log=RUTA_LOG, consola=True):
+    """
+    Conecta el logger del archivado a una cola atendida por un QueueListener.
+    Si ya estaba configurado solo actualiza el nivel.
+    """
+    global _listener
+    logger = obtener_logger()
+    with _lock:
+        logger.setLevel(_nivel(nivel))
+        if _listener is not None:
+            return logger
+
+        destinos = []
+        if consola:
+            salida = logging.StreamHandler(sys.stdout)
+            salida.setFormatter(logging.Formatter(FORMATO_CONSOLA))
+            destinos.append(salida)
+        if ruta_log:
+            carpeta = os.path.dirname(ruta_log)
+            if carpeta:
+                os.makedirs(carpeta, exist_ok=True)
+            archivo = logging.FileHandler(ruta_log, encoding="utf-8")
+            archivo.setFormatter(logging.Formatter(FORMATO_ARCHIVO))
+            destinos.append(archivo)
+
+        cola = queue.SimpleQueue()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.addHandler(QueueHandler(cola))
+        logger.propagate = False
+        _listener = QueueListener(cola, *destinos, respect_handler_level=True)
+        _listener.start()
+        return logger
+
+def detener_registro():
+    """Escribe lo que quede en la cola y cierra los destinos."""
+    global _listener
+    logger = obtener_logger()
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.addHandler(logging.NullHandler())
+        logger.propagate = True
+
+atexit.register(detener_registro)
+
+# 🧾 Log de auditoría en disco
+class LogAuditoria:
+    """
+    Eventos de auditoría en JSONL de solo agregado (un archivo por ejecución,
+    creado con el primer evento). Iterarlo lee el archivo: la memoria no crece
+    con la cantidad de eventos.
+    """
+
+    def __init__(self, carpeta=CARPETA_AUDITORIA):
+        self.carpeta = carpeta
+        self.ruta = None
+        self.por_estado = Counter()
+        self._cantidad = 0
+        self._archivo = None
+        self._lock = threading.Lock()
+        self._logger = obtener_logger("auditoria")
+
+    def _abrir(self):
+        if self.ruta is None:
+            os.makedirs(self.carpeta, exist_ok=True)
+            self.ruta = os.path.join(self.carpeta, f"auditoria_{datetime.now():%Y%m%d_%H%M%S_%f}.jsonl")
+        self._archivo = open(self.ruta, "a", encoding="utf-8")
+
+    def append(self, evento):
+        linea = json.dumps(evento, ensure_ascii=False)
+        with self._lock:
+            if self._archivo is None:
+                self._abrir()
+            self._archivo.write(linea + "\n")
+            self._archivo.flush()  # cada evento queda en disco aunque el proceso muera
+            self._cantidad += 1
+            self.por_estado[evento.get("estado")] += 1
+        self._logger.debug("%s | %s | %s → %s/%s/%s", evento.get("fecha"), evento.get("estado"),
+                           evento.get("archivo"), evento.get("cuenta"), evento.get("categoria"),
+                           evento.get("subrol"))
+
+    def __len__(self):
+        return self._cantidad
+
+    def posicion(self):
+        """Offset en bytes del final del archivo (para leer solo lo nuevo después)."""
+        with self._lock:
+            if self._archivo is None:
+                return os.path.getsize(self.ruta) if self.ruta else 0
+            self._archivo.flush()
+            return self._archivo.tell()
+
+    def leer(self, desde=0, hasta=None):
+        """Recorre los eventos escritos entre los offsets desde y hasta."""
+        hasta = self.posicion() if hasta is None else hasta
+        if self.ruta is None or desde >= hasta:
+            return
+        with open(self.ruta, "rb") as f:
+            f.seek(desde)
+            posicion = desde
+            for linea in f:
+                posicion += len(linea)
+                if posicion > hasta:
+                    break
+                yield json.loads(linea)
+
+    def __iter__(self):
+        return self.leer()
+
+    def cerrar(self):
+        with self._lock:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
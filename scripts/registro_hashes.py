@@ -0,0 +1,280 @@
+"""
+registro_hashes.py
+
+Registro persistente de hashes en SQLite con índice hash → archivos.
+
+- Consulta de duplicados en O(1) (índice en memoria y en la base)
+- Inserciones pendientes volcadas en una sola transacción por guardado
+- Migración única desde el registro JSON heredado (hashes_registrados.json)
+- Tamaño y hash parcial por entrada para el prefiltro de duplicados
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from scripts.motor_hash import calcular_hash_parcial, calcular_sha256
+from scripts.registro_eventos import obtener_logger
+
+RUTA_DB = "scripts/hashes_registrados.db"
+log = obtener_logger("registro_hashes")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    archivo TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    registrado TEXT,
+    tamano INTEGER,
+    hash_parcial TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_hashes_hash ON hashes (hash);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+# 🔌 Conexión y esquema
+def conectar(ruta_db=RUTA_DB):
+    carpeta = os.path.dirname(ruta_db)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    conexion = sqlite3.connect(ruta_db)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    conexion.executescript(ESQUEMA)
+    columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(hashes)")}
+    with conexion:
+        for columna, tipo in (("tamano", "INTEGER"), ("hash_parcial", "TEXT")):
+            if columna not in columnas:
+                conexion.execute(f"ALTER TABLE hashes ADD COLUMN {columna} {tipo}")
+        conexion.execute("CREATE INDEX IF NOT EXISTS idx_hashes_tamano ON hashes (tamano)")
+    return conexion
+
+# 📦 Migración desde el JSON heredado
+def migrar_desde_json(conexion, ruta_json):
+    """
+    Importa {archivo: hash} desde el JSON heredado una sola vez.
+    La migración queda marcada en la tabla meta; el JSON no se modifica.
+    """
+    if conexion.execute("SELECT 1 FROM meta WHERE clave = 'migrado_json'").fetchone():
+        return 0
+    if not ruta_json or not os.path.exists(ruta_json):
+        return 0
+
+    with open(ruta_json, "r", encoding="utf-8") as f:
+        try:
+            hashes = json.load(f)
+        except json.JSONDecodeError:
+            hashes = {}
+
+    ahora = datetime.now().isoformat()
+    with conexion:
+        conexion.executemany(
+            "INSERT OR IGNORE INTO hashes (archivo, hash, registrado) VALUES (?, ?, ?)",
+            ((archivo, h, ahora) for archivo, h in hashes.items())
+        )
+        conexion.execute(
+            "INSERT INTO meta (clave, valor) VALUES ('migrado_json', ?)", (ahora,)
+        )
+    log.info("📦 Registro de hashes migrado desde %s: %s entradas", ruta_json, len(hashes))
+    return len(hashes)
+
+# 🗂️ Registro en memoria respaldado por SQLite
+class RegistroHashes(dict):
+    """
+    dict {archivo: hash} compatible con el registro JSON anterior.
+    Mantiene un índice inverso hash → archivos, el conjunto de hashes
+    parciales por tamaño y las altas pendientes hasta el próximo guardar().
+    Las entradas sin tamaño conocido (heredadas del JSON) son "legados"; las
+    heredadas cuyo archivo no se encontró (tamaño -1) quedan "sin archivo".
+    """
+
+    def __init__(self, conexion):
+        super().__init__()
+        self.conexion = conexion
+        self._indice = {}
+        self._por_tamano = {}
+        self._legados = set()
+        self._sin_archivo = set()
+        self._pendientes = {}
+        consulta = "SELECT archivo, hash, tamano, hash_parcial FROM hashes"
+        for archivo, h, tamano, parcial in conexion.execute(consulta):
+            super().__setitem__(archivo, h)
+            self._indexar(archivo, h, tamano, parcial)
+
+    def _indexar(self, archivo, h, tamano, parcial):
+        self._indice.setdefault(h, set()).add(archivo)
+        if tamano is None:
+            self._legados.add(archivo)
+        elif tamano < 0:
+            self._sin_archivo.add(archivo)
+        else:
+            self._por_tamano.setdefault(tamano, set()).add(parcial)
+
+    def __setitem__(self, archivo, h):
+        self.registrar(archivo, h)
+
+    def registrar(self, archivo, h, tamano=None, hash_parcial=None):
+        anterior = self.get(archivo)
+        if anterior is not None and anterior != h:
+            self._quitar_del_indice(anterior, archivo)
+        super().__setitem__(archivo, h)
+        self._legados.discard(archivo)
+        self._sin_archivo.discard(archivo)
+        self._indexar(archivo, h, tamano, hash_parcial)
+        self._pendientes[archivo] = (h, tamano, hash_parcial)
+
+    def __delitem__(self, archivo):
+        h = self[archivo]
+        super().__delitem__(archivo)
+        self._quitar_del_indice(h, archivo)
+        self._legados.discard(archivo)
+        self._sin_archivo.discard(archivo)
+        self._pendientes.pop(archivo, None)
+        with self.conexion:
+            self.conexion.execute("DELETE FROM hashes WHERE archivo = ?", (archivo,))
+
+    def update(self, *args, **kwargs):
+        for archivo, h in dict(*args, **kwargs).items():
+            self[archivo] = h
+
+    def _quitar_del_indice(self, h, archivo):
+        archivos = self._indice.get(h)
+        if archivos:
+            archivos.discard(archivo)
+            if not archivos:
+                del self._indice[h]
+
+    def contiene_hash(self, h):
+        return h in self._indice
+
+    def archivos_con_hash(self, h):
+        return sorted(self._indice.get(h, ()))
+
+    def hay_legados(self):
+        return bool(self._legados)
+
+    def hay_sin_archivo(self):
+        """Hashes heredados sin tamaño: solo se detectan con el SHA-256 completo."""
+        return bool(self._sin_archivo)
+
+    def sin_archivo(self):
+        return sorted(self._sin_archivo)
+
+    def retirar_sin_archivo(self):
+        """Da de baja los heredados sin archivo (dejan de contar como duplicados)."""
+        retirados = self.sin_archivo()
+        for archivo in retirados:
+            del self[archivo]
+        return len(retirados)
+
+    def tamano_registrado(self, tamano):
+        return tamano in self._por_tamano
+
+    def parciales_de_tamano(self, tamano):
+        """Hashes parciales registrados para un tamaño (None = parcial desconocido)."""
+        return self._por_tamano.get(tamano, set())
+
+    def guardar(self):
+        """Vuelca las altas pendientes en una única transacción."""
+        if not self._pendientes:
+            return 0
+        ahora = datetime.now().isoformat()
+        with self.conexion:
+            self.conexion.executemany(
+                "INSERT OR REPLACE INTO hashes (archivo, hash, registrado, tamano, hash_parcial) "
+                "VALUES (?, ?, ?, ?, ?)",
+                ((archivo, h, ahora, tamano, parcial)
+                 for archivo, (h, tamano, parcial) in self._pendientes.items())
+            )
+        cantidad = len(self._pendientes)
+        self._pendientes.clear()
+        return cantidad
+
+# 📥 Carga del registro
+def cargar_registro(ruta_db=RUTA_DB, ruta_json=None):
+    conexion = conectar(ruta_db)
+    migrar_desde_json(conexion, ruta_json)
+    return RegistroHashes(conexion)
+
+# 🧭 Completar tamaño y hash parcial de las entradas heredadas
+def _completar(registro, archivo, ruta):
+    # Solo se acepta el archivo si su contenido es el registrado: otro documento
+    # con el mismo nombre no puede aportar su tamaño ni su hash parcial
+    try:
+        if calcular_sha256(ruta) != registro[archivo]:
+            return False
+        tamano = os.path.getsize(ruta)
+        parcial = calcular_hash_parcial(ruta)
+    except OSError:
+        return False
+    registro.registrar(archivo, registro[archivo], tamano, parcial)
+    return True
+
+def completar_legados(registro, base_path):
+    """
+    Completa tamaño y hash parcial de las entradas heredadas del JSON. Si la
+    clave es una ruta se usa esa ruta; si es solo un nombre (el JSON heredado
+    guarda nombres) se recorre una vez el árbol archivado y se acepta el archivo
+    con ese nombre cuyo SHA-256 coincide con el registrado.
+    Las que no se encuentran quedan con tamaño -1 ("sin archivo"): el prefiltro
+    las compara por hash completo contra todos los archivos.
+    """
+    legados = set(registro._legados)
+    if not legados:
+        return 0
+
+    completados = 0
+    por_nombre = set()
+    for archivo in legados:
+        if not os.path.dirname(archivo):
+            por_nombre.add(archivo)
+        elif _completar(registro, archivo, archivo):
+            completados += 1
+
+    if por_nombre:
+        for carpeta, _, archivos in os.walk(base_path):
+            for nombre in archivos:
+                if nombre in por_nombre and _completar(registro, nombre, os.path.join(carpeta, nombre)):
+                    por_nombre.discard(nombre)
+                    completados += 1
+
+    sin_archivo = legados & registro._legados
+    for archivo in sin_archivo:
+        registro.registrar(archivo, registro[archivo], -1, None)
+    registro.guardar()
+    log.info("🧭 Registro heredado completado: %s con tamaño, %s sin archivo", completados, len(sin_archivo))
+    return completados
+
+def resolver_sin_archivo(registro, base_path):
+    """Vuelve a buscar los heredados sin archivo (p. ej. tras restaurar documentos)."""
+    for archivo in registro.sin_archivo():
+        registro._sin_archivo.discard(archivo)
+        registro._legados.add(archivo)
+    return completar_legados(registro, base_path)
+
+# --- Ejecución directa ---
+if __name__ == "__main__":
+    import sys
+
+    from scripts.registro_eventos import configurar_registro, detener_registro
+
+    argumentos = sys.argv[1:]
+    base = None
+    if "--resolver" in argumentos:
+        posicion = argumentos.index("--resolver") + 1
+        if posicion >= len(argumentos):
+            sys.exit("Uso: python -m scripts.registro_hashes [--resolver BASE] [--retirar]")
+        base = argumentos[posicion]
+    configurar_registro("info")
+    registro = cargar_registro()
+    if base:
+        resolver_sin_archivo(registro, base)
+    if "--retirar" in argumentos:
+        log.info("🗑️ Hashes heredados sin archivo retirados: %s", registro.retirar_sin_archivo())
+    log.info("📋 Hashes heredados sin archivo: %s", len(registro.sin_archivo()))
+    for archivo in registro.sin_archivo():
+        log.info("   %s → %s", archivo, registro[archivo])
+    detener_registro()
@@ -0,0 +1,80 @@
+"""
+reporte_importaciones.py
+
+Reporte del tiempo de importación al arrancar (python -X importtime en un proceso limpio).
+
+- Lista lo que importa directamente el módulo, con tiempo propio y acumulado
+- Señala los módulos pesados que no deberían cargarse al arrancar
+  (pandas, numpy, openpyxl, selenium, asyncio): se importan en la etapa que los usa
+
+Uso: python scripts/reporte_importaciones.py [modulo] [cantidad]
+     python main.py --reporte-importacion
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+MODULOS_PESADOS = ("pandas", "numpy", "openpyxl", "selenium", "asyncio")
+
+def medir_importacion(modulo="main"):
+    """
+    Importa modulo en un intérprete nuevo y devuelve
+    {"total_ms", "arranque_ms", "modulo_ms", "directos": [(nombre, propio_ms, acumulado_ms)], "pesados": [...]}.
+    directos son las importaciones que hace modulo, de la más lenta a la más rápida.
+    """
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"❌ No se pudo importar {modulo}: {proceso.stderr.strip().splitlines()[-1]}")
+
+    primer_nivel = {}
+    directos = []   # -X importtime lista a los hijos antes que al padre
+    hijos = {}
+    cargados = set()
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        if not propio.strip().isdigit():
+            continue  # encabezado
+        nivel = (len(nombre) - len(nombre.lstrip()) - 1) // 2  # sangría de 2 espacios por nivel
+        nombre = nombre.strip()
+        cargados.add(nombre.split(".")[0])
+        if nivel == 1:
+            directos.append((nombre, int(propio) / 1000, int(acumulado) / 1000))
+        elif nivel == 0:
+            primer_nivel[nombre] = int(acumulado) / 1000
+            hijos[nombre], directos = directos, []
+
+    total = sum(primer_nivel.values())
+    modulo_ms = primer_nivel.get(modulo, 0.0)
+    return {
+        "total_ms": round(total, 1),
+        "arranque_ms": round(total - modulo_ms, 1),
+        "modulo_ms": round(modulo_ms, 1),
+        "directos": sorted(hijos.get(modulo, []), key=lambda m: m[2], reverse=True),
+        "pesados": [m for m in MODULOS_PESADOS if m in cargados]
+    }
+
+def imprimir_reporte(modulo="main", cantidad=15):
+    reporte = medir_importacion(modulo)
+    print(f"⏱️ Importar {modulo}: {reporte['modulo_ms']:.1f} ms "
+          f"(+ {reporte['arranque_ms']:.1f} ms de arranque del intérprete)")
+    print(f"{'importado por ' + modulo:<40} {'propio':>9} {'acumulado':>10}")
+    for nombre, propio, acumulado in reporte["directos"][:cantidad]:
+        print(f"{nombre:<40} {propio:7.1f}ms {acumulado:8.1f}ms")
+    if reporte["pesados"]:
+        print(f"⚠️ Módulos pesados cargados al arrancar: {', '.join(reporte['pesados'])}")
+    else:
+        print("✅ Ningún módulo pesado se carga al arrancar")
+    return reporte
+
+if __name__ == "__main__":
+    imprimir_reporte(
+        sys.argv[1] if len(sys.argv) > 1 else "main",
+        int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    )
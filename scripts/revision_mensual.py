@@ -13,47 +13,84 @@
 #6. 	Programala para que se ejecute el primer día de cada mes o cuando prefieras
 # Con esto el sistema se revisa solo, genera métricas, y permite detectar problemas antes de que escalen
 
-import json
-from collections import Counter
+import sys
 from datetime import datetime
+from pathlib import Path
+
+# Agregar la raíz del proyecto al path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from scripts.bitacora_historial import leer_entradas
+from scripts.acumulados_historial import acumulado_vacio, acumular, acumulado_periodo
+from scripts.exportacion_columnar import exportar_historial, cargar_columnar
+
+RUTA_HISTORIAL = "scripts/historial_archivo.json"
 
 def cargar_historial(ruta):
     try:
-        with open(ruta, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return list(leer_entradas(ruta))
     except:
         print("⚠️ No se pudo cargar el historial.")
         return []
 
-def generar_reporte(historial):
-    total = len(historial)
-    estados = Counter(
-        "Archivado" if h.get("evento") == "Archivo archivado" and not h.get("error")
-        else "Duplicado" if h.get("error") == "Duplicado por hash"
-        else "Error"
-        for h in historial
-    )
-    cuentas = Counter(h.get("cuenta") for h in historial if h.get("cuenta"))
-    sin_categoria = sum(1 for h in historial if not h.get("categoria"))
-    alertas = sum(1 for h in historial if h.get("alerta_integridad"))
-
-    print(f"\n📋 Reporte de cumplimiento ({datetime.now().strftime('%Y-%m-%d')}):")
-    print(f" - Total procesados: {total}")
-    print(f" - Archivados: {estados['Archivado']}")
-    print(f" - Duplicados: {estados['Duplicado']}")
-    print(f" - Errores: {estados['Error']}")
-    print(f" - Archivos sin categoría: {sin_categoria}")
-    print(f" - Alertas de integridad: {alertas}")
+def calcular_acumulado(historial):
+    acumulado = acumulado_vacio()
+    for h in historial:
+        acumular(acumulado, h)
+    return acumulado
+
+def imprimir_reporte(acumulado, periodo=None):
+    titulo = datetime.now().strftime('%Y-%m-%d') + (f", período {periodo}" if periodo else "")
+    print(f"\n📋 Reporte de cumplimiento ({titulo}):")
+    print(f" - Total procesados: {acumulado['total']}")
+    print(f" - Archivados: {acumulado['estados']['Archivado']}")
+    print(f" - Duplicados: {acumulado['estados']['Duplicado']}")
+    print(f" - Errores: {acumulado['estados']['Error']}")
+    print(f" - Archivos sin categoría: {acumulado['sin_categoria']}")
+    print(f" - Alertas de integridad: {acumulado['alertas']}")
     print(f" - Cuentas con más actividad:")
-    for cuenta, cantidad in cuentas.most_common(5):
+    for cuenta, cantidad in acumulado["cuentas"].most_common(5):
         print(f"   • {cuenta}: {cantidad} archivos")
 
-def ejecutar_revision_mensual():
-    historial = cargar_historial("scripts/historial_archivo.json")
-    if historial:
-        generar_reporte(historial)
+def generar_reporte(historial):
+    imprimir_reporte(calcular_acumulado(historial))
+
+# --- Reporte desde los acumulados precalculados (sin recorrer todo el historial) ---
+def ejecutar_revision_mensual(desde=None, hasta=None, ruta_historial=RUTA_HISTORIAL):
+    try:
+        acumulado = acumulado_periodo(ruta_historial, desde, hasta)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ No se pudo cargar el historial: {e}")
+        return
+    if acumulado["total"]:
+        periodo = f"{desde or '...'} a {hasta or '...'}" if desde or hasta else None
+        imprimir_reporte(acumulado, periodo)
     else:
         print("❌ No se encontró historial para generar el reporte.")
 
+# --- Análisis ad-hoc sobre la instantánea columnar ---
+def reporte_columnar(ruta_historial=RUTA_HISTORIAL, dir_columnar=None):
+    """Duplicados por cuenta y trimestre, y alertas de integridad por host."""
+    exportar_historial(ruta_historial, dir_columnar)
+    df = cargar_columnar("historial", dir_columnar)
+    if df.empty:
+        print("❌ No hay datos columnares para analizar.")
+        return None, None
+
+    df["trimestre"] = df["timestamp"].dt.to_period("Q")
+    duplicados = (
+        df[df["estado"] == "Duplicado"]
+        .groupby(["cuenta", "trimestre"], observed=True).size()
+        .rename("duplicados")
+    )
+    alertas = df[df["alerta_integridad"]].groupby("host", observed=True).size().rename("alertas")
+
+    print("\n📊 Duplicados por cuenta y trimestre:")
+    print(duplicados.to_string() if not duplicados.empty else " - Sin duplicados")
+    print("\n🚨 Alertas de integridad por host:")
+    print(alertas.to_string() if not alertas.empty else " - Sin alertas")
+    return duplicados, alertas
+
 if __name__ == "__main__":
-    ejecutar_revision_mensual()
\ No newline at end of file
+    ejecutar_revision_mensual()
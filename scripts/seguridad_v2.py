@@ -1,14 +1,15 @@
 import os
-import hashlib
 import logging
-import smtplib
-from email.message import EmailMessage
+from importlib.util import find_spec
+
+from scripts.cache_hash import obtener_hash
 
 # Configuración
 LOG_PATH = "logs/seguridad.log"
 HASH_REGISTRO = "config/hashes_validos.txt"
 CORREO_ALERTA = "soporte@empresa.com"
 SMTP_SERVER = "smtp.empresa.com"
+DEPENDENCIAS_CRITICAS = ("pandas", "openpyxl", "numpy")
 
 # Inicializar logging seguro
 def inicializar_logging():
@@ -41,24 +42,20 @@ def verificar_permisos(path):
         logging.error(f"Permisos insuficientes en: {path}")
     return lectura and escritura
 
-# Verificar dependencias críticas
+# Verificar dependencias críticas (solo si están instaladas: importarlas tarda segundos)
 def verificar_dependencias():
-    try:
-        import pandas, openpyxl, selenium
-        logging.info("Dependencias críticas OK")
-        return True
-    except ImportError as e:
-        logging.critical(f"Falta dependencia: {e.name}")
-        enviar_alerta(f"Dependencia faltante: {e.name}")
+    faltantes = [nombre for nombre in DEPENDENCIAS_CRITICAS if find_spec(nombre) is None]
+    for nombre in faltantes:
+        logging.critical(f"Falta dependencia: {nombre}")
+        enviar_alerta(f"Dependencia faltante: {nombre}")
+    if faltantes:
         return False
+    logging.info("Dependencias críticas OK")
+    return True
 
 # Calcular hash SHA256
 def calcular_hash(path):
-    sha256 = hashlib.sha256()
-    with open(path, "rb") as f:
-        while chunk := f.read(8192):
-            sha256.update(chunk)
-    return sha256.hexdigest()
+    return obtener_hash(path)
 
 # Verificar hash contra registro
 def verificar_hash(path):
@@ -78,17 +75,15 @@ def verificar_hash(path):
         enviar_alerta(f"⚠️ Archivo alterado: {path}")
         return False
 
-# Enviar alerta por correo
+# Enviar alerta por correo (en segundo plano: agrupada, con reintentos y conexión reutilizada)
 def enviar_alerta(mensaje, destino=CORREO_ALERTA):
-    try:
-        msg = EmailMessage()
-        msg.set_content(mensaje)
-        msg["Subject"] = "⚠️ Alerta de seguridad"
-        msg["From"] = "sistema@empresa.com"
-        msg["To"] = destino
+    from scripts.despachador_alertas import obtener_despachador  # asyncio solo si hay alertas
 
-        with smtplib.SMTP(SMTP_SERVER) as server:
-            server.send_message(msg)
-        logging.info(f"Alerta enviada a {destino}")
-    except Exception as e:
-        logging.error(f"No se pudo enviar alerta: {e}")
\ No newline at end of file
+    despachador = obtener_despachador(SMTP_SERVER, remitente="sistema@empresa.com")
+    despachador.encolar(mensaje, destino, asunto="⚠️ Alerta de seguridad", al_resultado=registrar_resultado_alerta)
+
+def registrar_resultado_alerta(alerta, error):
+    if error is None:
+        logging.info(f"Alerta enviada a {alerta['destino']}")
+    else:
+        logging.error(f"No se pudo enviar alerta: {error}")
@@ -1,55 +1,75 @@
 import os
 import sys
-import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Agregar la raíz del proyecto al path
 ROOT_DIR = Path(__file__).resolve().parent.parent
 sys.path.append(str(ROOT_DIR))
 
-from archivado_automatico import procesar_archivos
-from estructura_subcarpetas import cargar_estructura
-from scripts.preprocesar_nombres import preprocesar_archivos  # ✅ Renombrado automático integrado
-
-# --- Configuración de logging ---
-logging.basicConfig(
-    filename="./logs/registro.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    encoding="utf-8"
-)
+from scripts.registro_eventos import obtener_logger
 
+# El flujo de archivado se importa al ejecutar la verificación: las funciones de
+# chequeo se pueden usar sin cargarlo ni configurar el logging
 RESUMEN_PATH = "./resumen_archivo.xlsx"
 HISTORIAL_PATH = "./historial_archivo.xlsx"
 LOG_PATH = "./logs/registro.log"
 BASE_PATH = "./Legajos/Archivados"
 CARPETA_ORIGEN = Path("C:/Legajos/Docupen")
+MARCA_LOG = "Inicio del flujo principal"
+HILOS_ESCANEO = 8
+log = obtener_logger("verificacion")
+
+# --- Árbol de Legajos/Archivados en una sola pasada ---
+def _escanear_cuenta(carpeta_cuenta):
+    # {categoria: entradas}; claves con normcase, como compara os.path.exists
+    categorias = {}
+    with os.scandir(carpeta_cuenta) as entradas:
+        for entrada in entradas:
+            if entrada.is_dir():
+                with os.scandir(entrada.path) as contenido:
+                    categorias[os.path.normcase(entrada.name)] = sum(1 for _ in contenido)
+    return categorias
+
+def escanear_arbol(base=BASE_PATH, hilos=HILOS_ESCANEO):
+    """
+    Recorre base una sola vez con os.scandir y devuelve {cuenta: {categoria: entradas}}.
+    Las cuentas se listan en paralelo: en el share de red la espera es de E/S.
+    """
+    if not os.path.isdir(base):
+        return {}
+    with os.scandir(base) as entradas:
+        cuentas = sorted(e.name for e in entradas if e.is_dir())
+    with ThreadPoolExecutor(max_workers=max(1, hilos), thread_name_prefix="verificacion") as pool:
+        categorias = pool.map(_escanear_cuenta, (os.path.join(base, c) for c in cuentas))
+        return {os.path.normcase(c): cats for c, cats in zip(cuentas, categorias)}
 
 # --- Verificación de estructura por cuenta ---
-def verificar_estructura(cuentas, categorias):
+def verificar_estructura(cuentas, categorias, arbol=None):
+    arbol = escanear_arbol() if arbol is None else arbol
     for cuenta in cuentas:
         carpeta_cuenta = os.path.join(BASE_PATH, cuenta)
-        print(f"🔍 Verificando carpeta de cuenta: {carpeta_cuenta}")
-        assert os.path.exists(carpeta_cuenta), f"❌ Carpeta de cuenta no encontrada: {cuenta}"
+        log.info(f"🔍 Verificando carpeta de cuenta: {carpeta_cuenta}")
+        subcarpetas = arbol.get(os.path.normcase(cuenta))
+        assert subcarpetas is not None, f"❌ Carpeta de cuenta no encontrada: {cuenta}"
 
         for categoria in categorias:
-            subcarpeta = os.path.join(carpeta_cuenta, categoria)
-            assert os.path.exists(subcarpeta), f"❌ Falta subcarpeta: {categoria} en cuenta {cuenta}"
-    print("✅ Estructura de carpetas OK")
+            assert os.path.normcase(categoria) in subcarpetas, f"❌ Falta subcarpeta: {categoria} en cuenta {cuenta}"
+    log.info("✅ Estructura de carpetas OK")
 
 # --- Verificación de archivos movidos ---
-def verificar_archivos_movidos(cuentas, categorias):
+def verificar_archivos_movidos(cuentas, categorias, arbol=None):
+    arbol = escanear_arbol() if arbol is None else arbol
+    categorias = {os.path.normcase(c) for c in categorias}
     total_archivos = 0
     for cuenta in cuentas:
-        for categoria in categorias:
-            subcarpeta = os.path.join(BASE_PATH, cuenta, categoria)
-            if os.path.exists(subcarpeta):
-                archivos = os.listdir(subcarpeta)
-                total_archivos += len(archivos)
+        subcarpetas = arbol.get(os.path.normcase(cuenta), {})
+        total_archivos += sum(entradas for categoria, entradas in subcarpetas.items() if categoria in categorias)
     if total_archivos == 0:
-        print("⚠️ No se movió ningún archivo. Verificá el formato y las categorías.")
+        log.warning("⚠️ No se movió ningún archivo. Verificá el formato y las categorías.")
     else:
-        print(f"✅ Archivos movidos: {total_archivos} encontrados")
+        log.info(f"✅ Archivos movidos: {total_archivos} encontrados")
+    return total_archivos
 
 # --- Verificación de archivos pendientes en Docupen ---
 def verificar_archivos_pendientes():
@@ -59,79 +79,90 @@ def verificar_archivos_pendientes():
             pendientes.append(archivo.name)
 
     if pendientes:
-        print(f"\n⚠️ Archivos que quedaron sin mover ({len(pendientes)}):")
+        log.warning(f"⚠️ Archivos que quedaron sin mover ({len(pendientes)}):")
         for nombre in pendientes:
-            print(f"   ⏸️ {nombre}")
+            log.info(f"   ⏸️ {nombre}")
     else:
-        print("\n✅ No quedaron archivos pendientes en Docupen.")
+        log.info("✅ No quedaron archivos pendientes en Docupen.")
 
 # --- Verificación de resumen ---
 def verificar_resumen():
     if os.path.exists(RESUMEN_PATH):
-        print("✅ Resumen generado correctamente")
+        log.info("✅ Resumen generado correctamente")
     else:
-        print("⚠️ No se generó el resumen Excel")
+        log.warning("⚠️ No se generó el resumen Excel")
 
 # --- Verificación de historial ---
 def verificar_historial():
     if os.path.exists(HISTORIAL_PATH):
-        print("✅ Historial actualizado")
+        log.info("✅ Historial actualizado")
     else:
-        print("⚠️ No se generó el historial")
+        log.warning("⚠️ No se generó el historial")
 
 # --- Verificación de log ---
 def verificar_log():
     if not os.path.exists(LOG_PATH):
-        print("⚠️ No se generó el log")
+        log.warning("⚠️ No se generó el log")
         return
+    # Línea por línea: corta en la primera coincidencia sin cargar el log entero
     with open(LOG_PATH, "r", encoding="utf-8") as f:
-        contenido = f.read()
-    if "Inicio del flujo principal" in contenido:
-        print("✅ Log generado correctamente")
+        completo = any(MARCA_LOG in linea for linea in f)
+    if completo:
+        log.info("✅ Log generado correctamente")
     else:
-        print("⚠️ Log incompleto")
+        log.warning("⚠️ Log incompleto")
+    return completo
 
 # --- Verificación de archivado automático con logging ---
 def verificar_archivado(estructura):
-    logging.info("🔍 Iniciando verificación de archivado automático post-ejecución")
+    from archivado_automatico import procesar_archivos
+
+    log.info("🔍 Iniciando verificación de archivado automático post-ejecución")
     resumen = procesar_archivos(estructura)
 
     errores = [r for r in resumen if "error" in r]
     exitosos = [r for r in resumen if "destino" in r]
 
-    print(f"✅ Archivos archivados correctamente: {len(exitosos)}")
-    print(f"⚠️ Archivos con errores: {len(errores)}")
+    log.info(f"✅ Archivos archivados correctamente: {len(exitosos)}")
+    (log.warning if errores else log.info)(f"⚠️ Archivos con errores: {len(errores)}")
 
     for r in exitosos:
-        logging.info(f"Archivo archivado: {r['archivo']} → {r['destino']} (Cuenta: {r['cuenta']}, Categoría: {r['categoria']}, Fecha: {r['fecha']})")
+        log.info(f"Archivo archivado: {r['archivo']} → {r['destino']} (Cuenta: {r['cuenta']}, Categoría: {r['categoria']}, Fecha: {r['fecha']})")
 
     for r in errores:
-        logging.warning(f"Error al archivar: {r['archivo']} → {r['error']} (Cuenta: {r.get('cuenta')}, Categoría: {r.get('categoria')})")
+        log.warning(f"Error al archivar: {r['archivo']} → {r['error']} (Cuenta: {r.get('cuenta')}, Categoría: {r.get('categoria')})")
 
 # --- Punto de entrada ---
 if __name__ == "__main__":
-    print("🧪 Iniciando verificación post-ejecución...\n")
+    from estructura_subcarpetas import cargar_estructura
+    from scripts.preprocesar_nombres import preprocesar_archivos  # ✅ Renombrado automático integrado
+    from scripts.registro_eventos import configurar_registro, detener_registro
+
+    # --- Configuración de logging (consola y el mismo registro.log de siempre) ---
+    configurar_registro("info", ruta_log=LOG_PATH)
+
+    log.info("🧪 Iniciando verificación post-ejecución...")
 
     estructura = cargar_estructura()
     categorias = set(cat for lista in estructura.values() for cat in lista)
 
-    print("🧼 Ejecutando renombrado automático...")
+    log.info("🧼 Ejecutando renombrado automático...")
     preprocesar_archivos()
 
-    print("\n📦 Ejecutando archivado automático...")
+    log.info("📦 Ejecutando archivado automático...")
     verificar_archivado(estructura)
 
-    cuentas_detectadas = [
-        nombre for nombre in os.listdir(BASE_PATH)
-        if os.path.isdir(os.path.join(BASE_PATH, nombre))
-    ]
+    # Un único recorrido de Legajos/Archivados responde todos los chequeos
+    arbol = escanear_arbol()
+    cuentas_detectadas = list(arbol)
 
-    print("\n🔍 Verificando estructura y resultados...")
-    verificar_estructura(cuentas_detectadas, categorias)
-    verificar_archivos_movidos(cuentas_detectadas, categorias)
+    log.info("🔍 Verificando estructura y resultados...")
+    verificar_estructura(cuentas_detectadas, categorias, arbol)
+    verificar_archivos_movidos(cuentas_detectadas, categorias, arbol)
     verificar_archivos_pendientes()
     verificar_resumen()
     verificar_historial()
     verificar_log()
 
-    print("\n🎉 Verificación completa: todo está en orden.")
\ No newline at end of file
+    log.info("🎉 Verificación completa: todo está en orden.")
+    detener_registro()
@@ -0,0 +1,1389 @@
+#• 	Motor de hash (motor_hash.py)
+#• 	Hash en paralelo por delante del flujo
+#• 	Registro de hashes en SQLite (registro_hashes.py)
+#• 	Prefiltro de duplicados por tamaño y hash parcial
+#• 	Caché de hashes por metadatos (cache_hash.py)
+#• 	Bitácora JSONL del historial (bitacora_historial.py)
+#• 	Índice persistente de eventos para deduplicar en O(1)
+#• 	Acumulados mensuales/diarios del historial (acumulados_historial.py)
+#• 	Resumen Excel en modo streaming (generar_resumen_excel.py)
+#• 	Resumen particionado por mes (actualizar_resumen.py)
+#• 	Exportación columnar incremental (exportacion_columnar.py)
+#• 	Maestro de comitentes con caché compilada (comitentes.py)
+#• 	Tokenizador de nombres y paridad con los parsers anteriores (parser_nombres.py)
+#• 	Caché de directorios existentes (cache_directorios.py)
+#• 	Modo vigilancia con antirrebote (modo_vigilancia.py)
+#• 	Bitácora de movimientos y recuperación tras un corte (bitacora_movimientos.py)
+#• 	Pipeline por etapas con colas acotadas (pipeline_etapas.py)
+#• 	Despacho de alertas en segundo plano contra un SMTP local (despachador_alertas.py)
+#• 	Arranque liviano: sin DNS ni módulos pesados al importar main (reporte_importaciones.py)
+#• 	Generador Docupen sintético reproducible para el benchmark del flujo (generador_docupen.py)
+#• 	Métricas por ejecución en JSON y formato Prometheus (metricas_flujo.py)
+#• 	Logging por cola y log de auditoría en disco (registro_eventos.py)
+#• 	Inconsistencias por carpeta con reutilización entre pasadas (inconsistencias.py)
+#• 	Verificación post-ejecución con un solo recorrido del árbol (verificar_resultados.py)
+#• 	Índice de integridad Merkle del archivo (indice_merkle.py)
+#• 	Flujo principal: historial y resumen tras archivar (main.py)
+
+import io
+import os
+import sys
+import shutil
+import tempfile
+import hashlib
+import json
+import glob
+import unittest
+import threading
+import time
+import socketserver
+import subprocess
+from contextlib import redirect_stdout
+from email import message_from_bytes
+from scripts.motor_hash import calcular_sha256, hashear_en_paralelo, copiar_con_hash, mover_con_hash
+from scripts.registro_hashes import cargar_registro, completar_legados, resolver_sin_archivo
+from scripts.hash_checker import prefiltrar_candidatos, es_duplicado
+from scripts import cache_hash
+from scripts import bitacora_historial
+from scripts.bitacora_historial import (
+    ruta_bitacora, ruta_indice, leer_entradas, agregar_entradas, compactar, cargar_indice
+)
+from scripts.historial_archivo import actualizar_historial, registrar_evento, ya_registrado
+from scripts.acumulados_historial import acumulado_periodo, ruta_acumulados
+from scripts.generar_resumen_excel import generar_resumen, generar_resumen_streaming
+from scripts import actualizar_resumen as resumen_particionado
+from scripts import exportacion_columnar
+from scripts import comitentes
+from scripts.leer_comitentes import leer_comitentes
+from scripts.parser_nombres import tokenizar
+from benchmarks.bench_parser_nombres import verificar_paridad
+from scripts import cache_directorios
+from scripts import modo_vigilancia
+from scripts.bitacora_movimientos import BitacoraMovimientos
+from scripts.pipeline_etapas import Pipeline, Etapa
+from scripts.despachador_alertas import DespachadorAlertas
+from scripts.reporte_importaciones import medir_importacion, MODULOS_PESADOS
+from benchmarks.generador_docupen import generar_docupen
+from benchmarks.bench_flujo import comparar
+from scripts import metricas_flujo
+from scripts import registro_eventos
+from scripts.registro_eventos import LogAuditoria
+from scripts import inconsistencias
+from scripts import verificar_resultados
+from scripts.indice_merkle import IndiceMerkle
+from scripts import archivado_auditable
+import main
+
+class TestMotorHash(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def crear_archivo(self, nombre, contenido):
+        ruta = os.path.join(self.test_dir, nombre)
+        with open(ruta, "wb") as f:
+            f.write(contenido)
+        return ruta
+
+    def test_hash_archivo_vacio(self):
+        ruta = self.crear_archivo("vacio.pdf", b"")
+        self.assertEqual(calcular_sha256(ruta), hashlib.sha256(b"").hexdigest())
+
+    def test_hash_por_bloques(self):
+        contenido = os.urandom(300_000)
+        ruta = self.crear_archivo("bloques.pdf", contenido)
+        self.assertEqual(
+            calcular_sha256(ruta, tamano_buffer=4096, umbral_mmap=0),
+            hashlib.sha256(contenido).hexdigest()
+        )
+
+    def test_hash_mmap(self):
+        contenido = os.urandom(300_000)
+        ruta = self.crear_archivo("mmap.pdf", contenido)
+        self.assertEqual(
+            calcular_sha256(ruta, umbral_mmap=1),
+            hashlib.sha256(contenido).hexdigest()
+        )
+
+    def test_hash_en_paralelo_respeta_orden(self):
+        rutas = [self.crear_archivo(f"{i:03d}.pdf", os.urandom(1000 + i)) for i in range(40)]
+        resultados = [(r, f.result()) for r, f in hashear_en_paralelo(rutas, hilos=4)]
+        self.assertEqual([r for r, _ in resultados], rutas)
+        for ruta, hash_real in resultados:
+            self.assertEqual(hash_real, calcular_sha256(ruta))
+
+    def test_hash_en_paralelo_error_diferido(self):
+        rutas = [os.path.join(self.test_dir, "no_existe.pdf"), self.crear_archivo("ok.pdf", b"ok")]
+        resultados = list(hashear_en_paralelo(rutas, hilos=2))
+        with self.assertRaises(FileNotFoundError):
+            resultados[0][1].result()
+        self.assertEqual(resultados[1][1].result(), hashlib.sha256(b"ok").hexdigest())
+
+    def test_hash_en_paralelo_no_cancela_lo_entregado(self):
+        def lento(ruta):
+            time.sleep(0.005)
+            return ruta
+
+        rutas = [f"{i}.pdf" for i in range(12)]
+        resultados = list(hashear_en_paralelo(rutas, hilos=1, funcion_hash=lento))
+        self.assertEqual([f.result() for _, f in resultados], rutas)
+
+        generador = hashear_en_paralelo(rutas, hilos=1, funcion_hash=lento)
+        ruta, futuro = next(generador)
+        generador.close()
+        self.assertEqual(futuro.result(), ruta)
+    def test_mover_con_hash_rechazado_queda_en_origen(self):
+        origen = self.crear_archivo("origen.pdf", b"contenido")
+        destino = os.path.join(self.test_dir, "destino.pdf")
+        vistos = []
+
+        def rechazar(h):
+            vistos.append(h)
+            return False
+
+        self.assertIsNone(mover_con_hash(origen, destino, aceptar=rechazar))
+        original = os.rename
+
+        def sin_rename(*args):
+            raise OSError("otro volumen")
+
+        os.rename = sin_rename  # fuerza la copia entre volúmenes
+        try:
+            self.assertIsNone(mover_con_hash(origen, destino, aceptar=rechazar))
+            self.assertEqual(mover_con_hash(origen, destino, aceptar=lambda h: True), vistos[0])
+        finally:
+            os.rename = original
+        self.assertEqual(vistos, [hashlib.sha256(b"contenido").hexdigest()] * 2)
+        self.assertFalse(os.path.exists(origen))
+        self.assertTrue(os.path.exists(destino))
+
+    def test_copia_con_hash(self):
+        contenido = os.urandom(50_000)
+        origen = self.crear_archivo("origen.pdf", contenido)
+        destino = os.path.join(self.test_dir, "destino.pdf")
+        self.assertEqual(copiar_con_hash(origen, destino), hashlib.sha256(contenido).hexdigest())
+        with open(destino, "rb") as f:
+            self.assertEqual(f.read(), contenido)
+
+class TestRegistroHashes(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.ruta_db = os.path.join(self.test_dir, "hashes.db")
+        self.ruta_json = os.path.join(self.test_dir, "hashes.json")
+        with open(self.ruta_json, "w", encoding="utf-8") as f:
+            json.dump({"01. 14959 CAC 13-03-2025.pdf": "aaa", "07. 14959 DNI 04-09-2025.pdf": "bbb"}, f)
+
+    def tearDown(self):
+        registro = getattr(self, "registro", None)
+        if registro is not None:
+            registro.conexion.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_migracion_unica_desde_json(self):
+        self.registro = cargar_registro(self.ruta_db, ruta_json=self.ruta_json)
+        self.assertEqual(self.registro["01. 14959 CAC 13-03-2025.pdf"], "aaa")
+        self.assertTrue(self.registro.contiene_hash("bbb"))
+        del self.registro["07. 14959 DNI 04-09-2025.pdf"]
+        self.registro.conexion.close()
+
+        self.registro = cargar_registro(self.ruta_db, ruta_json=self.ruta_json)
+        self.assertFalse(self.registro.contiene_hash("bbb"))
+
+    def test_altas_persisten_tras_guardar(self):
+        self.registro = cargar_registro(self.ruta_db)
+        self.registro["nuevo.pdf"] = "ccc"
+        self.assertTrue(self.registro.contiene_hash("ccc"))
+        self.assertEqual(self.registro.guardar(), 1)
+        self.registro.conexion.close()
+
+        self.registro = cargar_registro(self.ruta_db)
+        self.assertEqual(self.registro.archivos_con_hash("ccc"), ["nuevo.pdf"])
+    def test_prefiltro_solo_marca_candidatos_reales(self):
+        self.registro = cargar_registro(self.ruta_db)
+        rutas = {}
+        for nombre, contenido in [("unico.pdf", b"u" * 10), ("a.pdf", b"x" * 500),
+                                  ("b.pdf", b"x" * 500), ("c.pdf", b"y" * 500)]:
+            rutas[nombre] = os.path.join(self.test_dir, nombre)
+            with open(rutas[nombre], "wb") as f:
+                f.write(contenido)
+        tamanos = {ruta: os.path.getsize(ruta) for ruta in rutas.values()}
+
+        candidatos, _ = prefiltrar_candidatos(tamanos, self.registro)
+        self.assertEqual(candidatos, {rutas["a.pdf"], rutas["b.pdf"]})
+
+    def test_legado_sin_archivo_sigue_detectando_duplicados(self):
+        contenido = b"documento archivado antes del registro SQLite" * 100
+        with open(self.ruta_json, "w", encoding="utf-8") as f:
+            json.dump({"01. 14959 CAC 13-03-2025.pdf": hashlib.sha256(contenido).hexdigest()}, f)
+        self.registro = cargar_registro(self.ruta_db, ruta_json=self.ruta_json)
+
+        # En el archivo hay otro documento con el mismo nombre: no aporta su tamaño
+        archivados = os.path.join(self.test_dir, "Legajos", "14959", "01. CAC")
+        os.makedirs(archivados)
+        with open(os.path.join(archivados, "01. 14959 CAC 13-03-2025.pdf"), "wb") as f:
+            f.write(b"otro contenido")
+        self.assertEqual(completar_legados(self.registro, os.path.join(self.test_dir, "Legajos")), 0)
+        self.assertFalse(self.registro.hay_legados())
+        self.assertTrue(self.registro.hay_sin_archivo())
+        self.assertFalse(self.registro.tamano_registrado(len(b"otro contenido")))
+
+        entrante = os.path.join(self.test_dir, "entrante.pdf")
+        with open(entrante, "wb") as f:
+            f.write(contenido)
+        # El prefiltro sigue activo para el resto; el heredado se compara por hash completo
+        with self.assertLogs("archivado.hash_checker", "WARNING"):
+            candidatos, _ = prefiltrar_candidatos({entrante: len(contenido)}, self.registro)
+        self.assertEqual(candidatos, set())
+        self.assertTrue(es_duplicado(calcular_sha256(entrante), self.registro))
+        self.registro.conexion.close()
+
+        self.registro = cargar_registro(self.ruta_db)
+        self.assertTrue(self.registro.hay_sin_archivo())
+
+        # Restaurado el documento, se resuelve; si no, se puede retirar
+        restaurado = os.path.join(self.test_dir, "Legajos", "14959", "restaurado")
+        os.makedirs(restaurado)
+        shutil.copy(entrante, os.path.join(restaurado, "01. 14959 CAC 13-03-2025.pdf"))
+        self.assertEqual(resolver_sin_archivo(self.registro, os.path.join(self.test_dir, "Legajos")), 1)
+        self.assertFalse(self.registro.hay_sin_archivo())
+        self.assertTrue(self.registro.tamano_registrado(len(contenido)))
+
+    def test_retirar_sin_archivo(self):
+        with open(self.ruta_json, "w", encoding="utf-8") as f:
+            json.dump({"perdido.pdf": "h" * 64, "otro.pdf": "g" * 64}, f)
+        self.registro = cargar_registro(self.ruta_db, ruta_json=self.ruta_json)
+        completar_legados(self.registro, self.test_dir)
+        self.assertEqual(self.registro.sin_archivo(), ["otro.pdf", "perdido.pdf"])
+        self.assertEqual(self.registro.retirar_sin_archivo(), 2)
+        self.assertFalse(self.registro.contiene_hash("h" * 64))
+        self.registro.conexion.close()
+        self.registro = cargar_registro(self.ruta_db)
+        self.assertEqual(len(self.registro), 0)
+
+    def test_legado_completado_por_contenido(self):
+        contenido = b"x" * 700
+        with open(self.ruta_json, "w", encoding="utf-8") as f:
+            json.dump({"a.pdf": hashlib.sha256(contenido).hexdigest()}, f)
+        self.registro = cargar_registro(self.ruta_db, ruta_json=self.ruta_json)
+        for carpeta, datos in (("1", b"distinto"), ("2", contenido)):
+            os.makedirs(os.path.join(self.test_dir, "Legajos", carpeta))
+            with open(os.path.join(self.test_dir, "Legajos", carpeta, "a.pdf"), "wb") as f:
+                f.write(datos)
+        self.assertEqual(completar_legados(self.registro, os.path.join(self.test_dir, "Legajos")), 1)
+        self.assertTrue(self.registro.tamano_registrado(700))
+        self.assertFalse(self.registro.hay_sin_archivo())
+
+    def test_prefiltro_con_legados_hashea_todo(self):
+        self.registro = cargar_registro(self.ruta_db, ruta_json=self.ruta_json)
+        ruta = os.path.join(self.test_dir, "hashes.json")
+        candidatos, _ = prefiltrar_candidatos({ruta: 10}, self.registro)
+        self.assertEqual(candidatos, {ruta})
+
+class TestCacheHash(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.ruta_cache_original = cache_hash.RUTA_CACHE
+        cache_hash.RUTA_CACHE = os.path.join(self.test_dir, "cache.json")
+        cache_hash._cache = None
+        self.lecturas = []
+
+    def tearDown(self):
+        cache_hash._cache = None
+        cache_hash.RUTA_CACHE = self.ruta_cache_original
+        shutil.rmtree(self.test_dir)
+
+    def hash_contado(self, ruta):
+        self.lecturas.append(ruta)
+        return calcular_sha256(ruta)
+
+    def test_acierto_no_relee_y_persiste(self):
+        ruta = os.path.join(self.test_dir, "doc.pdf")
+        with open(ruta, "wb") as f:
+            f.write(b"contenido")
+        primero = cache_hash.obtener_hash(ruta, self.hash_contado)
+        segundo = cache_hash.obtener_hash(ruta, self.hash_contado)
+        self.assertEqual(primero, segundo)
+        self.assertEqual(len(self.lecturas), 1)
+
+        cache_hash.guardar_cache()
+        cache_hash._cache = None
+        cache_hash.obtener_hash(ruta, self.hash_contado)
+        self.assertEqual(len(self.lecturas), 1)
+
+    def test_archivo_modificado_invalida(self):
+        ruta = os.path.join(self.test_dir, "doc.pdf")
+        with open(ruta, "wb") as f:
+            f.write(b"v1")
+        cache_hash.obtener_hash(ruta, self.hash_contado)
+        with open(ruta, "wb") as f:
+            f.write(b"version 2")
+        self.assertEqual(cache_hash.obtener_hash(ruta, self.hash_contado), hashlib.sha256(b"version 2").hexdigest())
+        self.assertEqual(len(self.lecturas), 2)
+
+class TestBitacoraHistorial(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.ruta_historial = os.path.join(self.test_dir, "historial_archivo.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_migracion_desde_json_heredado(self):
+        with open(self.ruta_historial, "w", encoding="utf-8") as f:
+            json.dump([{"archivo": "a.pdf", "evento": "Archivo archivado"}], f)
+        registrar_evento(self.ruta_historial, "Alerta enviada correctamente", "resumen.xlsx")
+        entradas = list(leer_entradas(self.ruta_historial))
+        self.assertEqual([e["archivo"] for e in entradas], ["a.pdf", "resumen.xlsx"])
+
+    def test_cola_cortada_se_descarta(self):
+        agregar_entradas(self.ruta_historial, [{"archivo": "a.pdf", "evento": "x"}])
+        with open(ruta_bitacora(self.ruta_historial), "a", encoding="utf-8") as f:
+            f.write('{"archivo": "cortado')
+        self.assertEqual(len(list(leer_entradas(self.ruta_historial))), 1)
+        agregar_entradas(self.ruta_historial, [{"archivo": "b.pdf", "evento": "x"}])
+        self.assertEqual([e["archivo"] for e in leer_entradas(self.ruta_historial)], ["a.pdf", "b.pdf"])
+
+    def test_actualizar_historial_no_duplica(self):
+        resumen = [{"archivo": "a.pdf", "destino": "Legajos/a.pdf"}, {"archivo": "a.pdf", "destino": "Legajos/a.pdf"}]
+        actualizar_historial(resumen, self.ruta_historial)
+        actualizar_historial(resumen, self.ruta_historial)
+        self.assertEqual(len(list(leer_entradas(self.ruta_historial))), 1)
+
+    def test_compactacion_elimina_repetidos(self):
+        agregar_entradas(self.ruta_historial, [{"archivo": "a.pdf", "evento": "x"}] * 3)
+        self.assertEqual(compactar(self.ruta_historial), 1)
+
+    def test_compactacion_conserva_mismo_nombre_con_otro_hash(self):
+        # Con CLAVE_CON_HASH = True ambas entradas son eventos distintos
+        entradas = [{"archivo": "a.pdf", "evento": "Archivo archivado", "hash": "h1"},
+                    {"archivo": "a.pdf", "evento": "Archivo archivado", "hash": "h2"}]
+        agregar_entradas(self.ruta_historial, entradas + entradas[:1])
+        self.assertEqual(compactar(self.ruta_historial), 2)
+        self.assertEqual(list(leer_entradas(self.ruta_historial)), entradas)
+        indice = cargar_indice(self.ruta_historial)
+        self.assertTrue(ya_registrado(indice, entradas[1], con_hash=True))
+
+    def test_indice_persistente_e_incremental(self):
+        actualizar_historial([{"archivo": "a.pdf", "destino": "x", "hash": "h1"}], self.ruta_historial)
+        bitacora_historial._indices.clear()
+        with open(ruta_indice(self.ruta_historial), "r", encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+        agregar_entradas(self.ruta_historial, [{"archivo": "b.pdf", "evento": "Error al archivar", "hash": None}])
+        indice = cargar_indice(self.ruta_historial)
+        self.assertEqual(len(indice), 2)
+        self.assertTrue(ya_registrado(indice, {"archivo": "b.pdf", "evento": "Error al archivar"}))
+        self.assertTrue(ya_registrado(indice, {"archivo": "a.pdf", "evento": "Archivo archivado", "hash": "h1"}, con_hash=True))
+        self.assertFalse(ya_registrado(indice, {"archivo": "a.pdf", "evento": "Archivo archivado", "hash": "h2"}, con_hash=True))
+
+    def test_indice_se_reconstruye_tras_compactar(self):
+        agregar_entradas(self.ruta_historial, [{"archivo": "a.pdf", "evento": "x"}] * 2)
+        cargar_indice(self.ruta_historial)
+        compactar(self.ruta_historial)
+        self.assertEqual(len(cargar_indice(self.ruta_historial)), 1)
+
+class TestAcumuladosHistorial(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.ruta_historial = os.path.join(self.test_dir, "historial_archivo.json")
+        agregar_entradas(self.ruta_historial, [
+            {"timestamp": "2025-08-31 10:00:00", "evento": "Archivo archivado", "archivo": "a.pdf", "cuenta": "7560", "categoria": "01. CAC"},
+            {"timestamp": "2025-09-01 10:00:00", "evento": "Error al archivar", "archivo": "b.pdf", "cuenta": "7560", "error": "Duplicado por hash"},
+            {"timestamp": "2025-09-15 10:00:00", "evento": "Archivo archivado", "archivo": "c.pdf", "cuenta": "14959", "categoria": "07. DNI", "alerta_integridad": True},
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_rango_combina_meses_y_dias(self):
+        total = acumulado_periodo(self.ruta_historial)
+        self.assertEqual(total["total"], 3)
+        self.assertEqual(total["cuentas"]["7560"], 2)
+
+        septiembre = acumulado_periodo(self.ruta_historial, "2025-09-01", "2025-09-30")
+        self.assertEqual(septiembre["estados"]["Duplicado"], 1)
+        self.assertEqual(septiembre["alertas"], 1)
+
+        borde = acumulado_periodo(self.ruta_historial, "2025-08-31", "2025-09-01")
+        self.assertEqual(borde["total"], 2)
+        self.assertEqual(borde["sin_categoria"], 1)
+
+    def test_actualizacion_incremental(self):
+        acumulado_periodo(self.ruta_historial)
+        offset_previo = json.load(open(ruta_acumulados(self.ruta_historial), encoding="utf-8"))["offset"]
+        actualizar_historial([{"archivo": "d.pdf", "destino": "x", "cuenta": "8021"}], self.ruta_historial)
+        datos = json.load(open(ruta_acumulados(self.ruta_historial), encoding="utf-8"))
+        self.assertGreater(datos["offset"], offset_previo)
+        self.assertEqual(acumulado_periodo(self.ruta_historial)["total"], 4)
+
+class TestResumenStreaming(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_streaming_coincide_con_modo_normal(self):
+        import openpyxl
+        datos = [
+            {"cuenta": "14959", "ruta_relativa": "14959\\01. CAC\\a.pdf", "destino": "x", "hash": "h1"},
+            {"cuenta": "7560", "ruta_relativa": "7560\\b.pdf", "error": "Duplicado por hash"},
+        ]
+        normal = os.path.join(self.test_dir, "normal.xlsx")
+        streaming = os.path.join(self.test_dir, "streaming.xlsx")
+        generar_resumen(datos, normal, "C:/Legajos")
+        self.assertEqual(generar_resumen_streaming(iter(datos), streaming, "C:/Legajos"), 2)
+
+        hoja_normal = openpyxl.load_workbook(normal).active
+        hoja_streaming = openpyxl.load_workbook(streaming).active
+        self.assertTrue(hoja_streaming["A1"].font.bold)
+        for fila_n, fila_s in zip(hoja_normal.iter_rows(values_only=True), hoja_streaming.iter_rows(values_only=True)):
+            self.assertEqual(fila_n[:6] + fila_n[7:], fila_s[:6] + fila_s[7:])
+        self.assertEqual(hoja_streaming["G2"].value, "14959\\01. CAC\\a.pdf")
+        self.assertEqual(hoja_streaming["G2"].hyperlink.target, hoja_normal["G2"].hyperlink.target)
+        self.assertEqual(hoja_streaming["G2"].hyperlink.target, "C:/Legajos/14959/01. CAC/a.pdf")
+
+    def test_streaming_ruta_larga_sin_vinculo(self):
+        import openpyxl
+        ruta = "14959\\" + "x" * 2100 + ".pdf"
+        streaming = os.path.join(self.test_dir, "streaming.xlsx")
+        with self.assertLogs("archivado.resumen", "WARNING"):
+            generar_resumen_streaming(iter([{"ruta_relativa": ruta, "destino": "x"}]), streaming, "C:/Legajos")
+        hoja = openpyxl.load_workbook(streaming).active
+        self.assertEqual(hoja["G2"].value, ruta)
+        self.assertIsNone(hoja["G2"].hyperlink)
+    def test_resumen_particionado_no_reescribe_legado(self):
+        legado = os.path.join(self.test_dir, "resumen_archivo.xlsx")
+        generar_resumen([{"cuenta": "1", "hash": "h0"}], legado)
+        mtime_legado = os.path.getmtime(legado)
+
+        original = resumen_particionado.MAX_FILAS_PARTICION
+        resumen_particionado.MAX_FILAS_PARTICION = 2
+        try:
+            escritas = resumen_particionado.actualizar_resumen([{"hash": f"h{i}"} for i in range(1, 4)], legado)
+        finally:
+            resumen_particionado.MAX_FILAS_PARTICION = original
+        self.assertEqual(len(escritas), 2)
+        resumen_particionado.actualizar_resumen([{"hash": "h4"}], legado)
+
+        self.assertEqual(os.path.getmtime(legado), mtime_legado)
+        filas = list(resumen_particionado.leer_resumen_completo(legado))
+        self.assertEqual(len(filas), 5)
+        self.assertEqual(filas[-1][-1], "h4")
+        self.assertEqual(len(resumen_particionado.cargar_indice(legado)["particiones"]), 4)
+
+    def test_resumen_particionado_compacta_el_mes_cerrado(self):
+        excel = os.path.join(self.test_dir, "historial_archivo.xlsx")
+        carpeta = resumen_particionado.carpeta_particiones(excel)
+        libros = lambda: sorted(n for n in os.listdir(carpeta) if n.endswith(".xlsx"))
+        primero = resumen_particionado.actualizar_resumen([{"hash": f"h0{i}"} for i in range(3)], excel)[0]
+        mtime_primero = os.path.getmtime(primero)
+        for corrida in range(1, 4):
+            escritas = resumen_particionado.actualizar_resumen([{"hash": f"h{corrida}{i}"} for i in range(3)], excel)
+            self.assertEqual(len(escritas), 1)
+        # Un libro por ejecución: los anteriores no se reescriben
+        self.assertEqual(len(libros()), 4)
+        self.assertEqual(os.path.getmtime(primero), mtime_primero)
+
+        # Cambio de mes: el mes cerrado se compacta una vez en libros de hasta MAX_FILAS_PARTICION
+        indice = resumen_particionado.cargar_indice(excel)
+        for particion in indice["particiones"]:
+            particion["periodo"] = "2000-01"
+        resumen_particionado.guardar_indice(excel, indice)
+        original = resumen_particionado.MAX_FILAS_PARTICION
+        resumen_particionado.MAX_FILAS_PARTICION = 5
+        try:
+            escritas = resumen_particionado.actualizar_resumen([{"hash": "nuevo"}], excel)
+        finally:
+            resumen_particionado.MAX_FILAS_PARTICION = original
+        self.assertEqual(len(escritas), 1)
+        particiones = resumen_particionado.cargar_indice(excel)["particiones"]
+        self.assertEqual([(p["periodo"], p["filas"], p.get("compactado", False)) for p in particiones][:3],
+                         [("2000-01", 5, True), ("2000-01", 5, True), ("2000-01", 2, True)])
+        self.assertEqual(len(libros()), 4)
+        filas = list(resumen_particionado.leer_resumen_completo(excel))
+        self.assertEqual([f[-1] for f in filas], [f"h{c}{i}" for c in range(4) for i in range(3)] + ["nuevo"])
+
+        # Ya compactado: la ejecución siguiente no lo vuelve a tocar
+        compactos = libros()
+        resumen_particionado.actualizar_resumen([{"hash": "otro"}], excel)
+        self.assertTrue(set(compactos) <= set(libros()))
+        self.assertEqual(len(libros()), 5)
+
+class TestExportacionColumnar(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.test_dir, "historial_archivo.json")
+        self.columnar = os.path.join(self.test_dir, "columnar")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_exportacion_incremental_y_carga(self):
+        actualizar_historial([{"archivo": "a.pdf", "cuenta": "100", "destino": "x", "hash": "h1"}], self.ruta)
+        self.assertEqual(exportacion_columnar.exportar_historial(self.ruta, self.columnar), 1)
+        self.assertEqual(exportacion_columnar.exportar_historial(self.ruta, self.columnar), 0)
+        actualizar_historial([
+            {"archivo": "b.pdf", "cuenta": "100", "error": "Duplicado por hash", "hash": "h1"},
+            {"archivo": "c.pdf", "cuenta": "200", "destino": "y", "alerta_integridad": True}
+        ], self.ruta, entorno={"host": "pc1"})
+        self.assertEqual(exportacion_columnar.exportar_historial(self.ruta, self.columnar), 2)
+
+        df = exportacion_columnar.cargar_columnar("historial", self.columnar)
+        self.assertEqual(list(df["archivo"]), ["a.pdf", "b.pdf", "c.pdf"])
+        self.assertEqual(str(df["cuenta"].dtype), "category")
+        self.assertEqual(list(df["estado"]), ["Archivado", "Duplicado", "Archivado"])
+        self.assertTrue(df["hash"].isna().iloc[2])
+        self.assertEqual(list(df.loc[df["alerta_integridad"], "host"]), ["pc1"])
+
+        exportacion_columnar.compactar("historial", self.columnar)
+        compactado = exportacion_columnar.cargar_columnar("historial", self.columnar)
+        self.assertEqual(len(glob.glob(os.path.join(self.columnar, "historial", "seg_*.npz"))), 1)
+        self.assertEqual(list(compactado["archivo"]), list(df["archivo"]))
+        self.assertTrue((compactado["timestamp"] == df["timestamp"]).all())
+
+    def test_eventos_archivo(self):
+        eventos = [{"fecha": "2025-09-10T15:48:46.123456", "archivo": "a.pdf", "cuenta": "1",
+                    "categoria": "CAC", "subrol": None, "estado": "Archivado", "hash": "h"}]
+        self.assertEqual(exportacion_columnar.exportar_eventos_archivo(eventos, self.columnar), 1)
+        df = exportacion_columnar.cargar_columnar("eventos_archivo", self.columnar)
+        self.assertEqual(str(df["fecha"].iloc[0]), "2025-09-10 15:48:46")
+
+class TestComitentes(unittest.TestCase):
+    def setUp(self):
+        import pandas as pd
+        self.test_dir = tempfile.mkdtemp()
+        self.excel = os.path.join(self.test_dir, "datos_comitentes.xlsx")
+        pd.DataFrame({
+            "Cuenta": ["100", "200", "300", "100"],
+            "CUIT": ["20-1", "30-2", "20-1", "20-1"],
+            "Tipo": ["Física", "Jurídica", "Otro", "Física"],
+            "Nombre": ["Ana", "SA", "X", "Ana"]
+        }).to_excel(self.excel, index=False)
+        comitentes._en_memoria.clear()
+
+    def tearDown(self):
+        comitentes._en_memoria.clear()
+        shutil.rmtree(self.test_dir)
+
+    def test_mapas_y_compatibilidad(self):
+        mapas = comitentes.cargar_comitentes(self.excel)
+        self.assertEqual(mapas["tipo"], {"100": "fisica", "200": "juridica", "300": "desconocido"})
+        self.assertEqual(mapas["cuit_cuentas"]["20-1"], ["100", "300"])
+
+        cuentas_info, cuit_to_cuentas = leer_comitentes(self.excel)
+        self.assertEqual(cuentas_info["200"], {"CUIT": "30-2", "Tipo": "Jurídica", "Nombre": "SA"})
+        self.assertEqual(cuit_to_cuentas["30-2"], ["200"])
+
+    def test_cache_por_mtime_y_hash(self):
+        comitentes.cargar_comitentes(self.excel)
+        self.assertTrue(os.path.exists(comitentes.ruta_cache(self.excel)))
+
+        original = comitentes.compilar_comitentes
+        llamadas = []
+        comitentes.compilar_comitentes = lambda ruta: llamadas.append(ruta) or original(ruta)
+        try:
+            comitentes._en_memoria.clear()
+            comitentes.cargar_comitentes(self.excel)
+            estado = os.stat(self.excel)
+            os.utime(self.excel, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10**9))
+            comitentes._en_memoria.clear()
+            comitentes.cargar_comitentes(self.excel)  # mismo contenido: no recompila
+            self.assertEqual(llamadas, [])
+
+            import pandas as pd
+            pd.DataFrame({"Cuenta": ["900"], "Tipo": ["Jurídica"]}).to_excel(self.excel, index=False)
+            self.assertEqual(comitentes.cargar_comitentes(self.excel)["tipo"], {"900": "juridica"})
+            self.assertEqual(len(llamadas), 1)
+        finally:
+            comitentes.compilar_comitentes = original
+
+class TestParserNombres(unittest.TestCase):
+    def test_tokenizar(self):
+        datos = tokenizar("03.- 20577 C1. CUIT RL 15-06-2025.pdf")
+        self.assertEqual(datos.prefijo, "03.-")
+        self.assertEqual(datos.cuenta, "20577")
+        self.assertEqual(datos.rol, "C1")
+        self.assertEqual(datos.anio, "2025")
+        self.assertEqual(datos.subrol, "REPRESENTANTE LEGAL")
+        self.assertIs(tokenizar("03.- 20577 C1. CUIT RL 15-06-2025.pdf"), datos)
+
+    def test_paridad_con_parsers_anteriores(self):
+        self.assertEqual(verificar_paridad(), [])
+
+class TestCacheDirectorios(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.test_dir, "100", "01. CAC", "TITULAR", "2025"))
+        os.makedirs(os.path.join(self.test_dir, "200", "01. CAC"))
+        cache_directorios.olvidar()
+        for clave in cache_directorios.estadisticas:
+            cache_directorios.estadisticas[clave] = 0
+
+    def tearDown(self):
+        cache_directorios.olvidar()
+        shutil.rmtree(self.test_dir)
+
+    def test_precalentado_evita_consultas(self):
+        cache_directorios.precalentar(self.test_dir, {"100", "300"})
+        self.assertEqual(cache_directorios.estadisticas["escaneados"], 5)  # raíz + árbol de la cuenta 100
+
+        original = os.makedirs
+        os.makedirs = lambda *a, **k: self.fail("no debería consultar el disco")
+        try:
+            for _ in range(3):
+                self.assertFalse(cache_directorios.asegurar_directorio(
+                    os.path.join(self.test_dir, "100", "01. CAC", "TITULAR", "2025")))
+            self.assertTrue(cache_directorios.existe(os.path.join(self.test_dir, "100")))
+        finally:
+            os.makedirs = original
+        self.assertEqual(cache_directorios.estadisticas["evitadas"], 4)
+
+    def test_creacion_y_olvido(self):
+        nuevo = os.path.join(self.test_dir, "300", "01. CAC", "OTROS", "2025")
+        self.assertTrue(cache_directorios.asegurar_directorio(nuevo))
+        self.assertTrue(os.path.isdir(nuevo))
+        self.assertFalse(cache_directorios.asegurar_directorio(nuevo))
+        self.assertTrue(cache_directorios.existe(os.path.join(self.test_dir, "300")))
+        self.assertEqual(cache_directorios.estadisticas["consultas"], 1)
+
+        shutil.rmtree(os.path.join(self.test_dir, "300"))
+        cache_directorios.olvidar(os.path.join(self.test_dir, "300"))
+        self.assertTrue(cache_directorios.asegurar_directorio(nuevo))
+
+    def test_creacion_respeta_mayusculas(self):
+        # Simula Windows, donde normcase pasa la ruta a minúsculas
+        original = os.path.normcase
+        os.path.normcase = lambda ruta: original(ruta).lower()
+        try:
+            nuevo = os.path.join(self.test_dir, "300", "10. OTROS", "SIN_FECHA")
+            self.assertTrue(cache_directorios.asegurar_directorio(nuevo))
+            self.assertTrue(cache_directorios.existe(os.path.join(self.test_dir, "300", "10. OTROS")))
+        finally:
+            os.path.normcase = original
+        self.assertEqual(os.listdir(os.path.join(self.test_dir, "300")), ["10. OTROS"])
+        self.assertEqual(os.listdir(os.path.join(self.test_dir, "300", "10. OTROS")), ["SIN_FECHA"])
+
+class TestModoVigilancia(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.test_dir, "previo.pdf"), "wb") as f:
+            f.write(b"p")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _vigilar(self, fuente):
+        entregados = []
+        detener = threading.Event()
+
+        def al_estabilizarse(ruta):
+            entregados.append((os.path.basename(ruta), os.path.getsize(ruta)))
+            os.remove(ruta)
+
+        hilo = threading.Thread(target=modo_vigilancia.vigilar, args=(self.test_dir, al_estabilizarse),
+                                kwargs={"espera_estable": 0.4, "intervalo": 0.05, "detener": detener, "fuente": fuente})
+        hilo.start()
+        try:
+            with open(os.path.join(self.test_dir, "escaneo.pdf"), "wb") as f:
+                for _ in range(3):  # el escáner escribe por partes
+                    f.write(b"x" * 1000)
+                    f.flush()
+                    time.sleep(0.15)
+            with open(os.path.join(self.test_dir, "escaneo.tmp"), "wb") as f:
+                f.write(b"ignorado")
+            limite = time.time() + 5
+            while len(entregados) < 2 and time.time() < limite:
+                time.sleep(0.05)
+        finally:
+            detener.set()
+            hilo.join(5)
+        return entregados
+
+    def test_sondeo_entrega_archivos_estables(self):
+        entregados = self._vigilar(modo_vigilancia.FuenteSondeo(self.test_dir, 0.05))
+        self.assertEqual(entregados, [("previo.pdf", 1), ("escaneo.pdf", 3000)])
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify solo en Linux")
+    def test_inotify_entrega_archivos_estables(self):
+        entregados = self._vigilar(modo_vigilancia.FuenteInotify(self.test_dir))
+        self.assertEqual(entregados, [("previo.pdf", 1), ("escaneo.pdf", 3000)])
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify solo en Linux")
+    def test_inotify_desborde_relee_la_carpeta(self):
+        fuente = modo_vigilancia.FuenteInotify(self.test_dir)
+        try:
+            evento = modo_vigilancia._EVENTO
+            desborde = evento.pack(-1, modo_vigilancia.IN_Q_OVERFLOW, 0, 0)
+            nombre = b"nuevo.pdf\0\0\0\0\0\0\0"
+            creado = evento.pack(1, modo_vigilancia.IN_CREATE, 0, len(nombre)) + nombre
+            self.assertEqual(fuente._interpretar(creado + desborde), {"nuevo.pdf", "previo.pdf"})
+
+            self.assertEqual(fuente._interpretar(evento.pack(1, modo_vigilancia.IN_IGNORED, 0, 0)), set())
+            self.assertFalse(fuente.activa)
+            self.assertEqual(fuente.esperar(0), {"previo.pdf"})
+            self.assertTrue(fuente.activa)
+        finally:
+            fuente.cerrar()
+
+class TestBitacoraMovimientos(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.test_dir, "movimientos.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _archivo(self, nombre, contenido):
+        ruta = os.path.join(self.test_dir, nombre)
+        with open(ruta, "wb") as f:
+            f.write(contenido)
+        return ruta
+
+    def test_flujo_completo_deja_la_bitacora_vacia(self):
+        bitacora = BitacoraMovimientos(self.ruta)
+        id_movimiento = bitacora.planificar("a", "b", archivo="a")
+        bitacora.movido(id_movimiento, "h")
+        self.assertEqual(len(bitacora.incompletas()), 1)
+        bitacora.registrado(id_movimiento)
+        bitacora.cerrar()
+        self.assertEqual(os.path.getsize(self.ruta), 0)
+
+    def test_recuperacion_de_entradas_incompletas(self):
+        bitacora = BitacoraMovimientos(self.ruta)
+        # 1) planificado sin mover: se revierte (no hay nada que hacer)
+        bitacora.planificar(self._archivo("o1", b"1"), os.path.join(self.test_dir, "d1"), archivo="o1")
+        # 2) planificado y renombrado antes del corte: se rehace con el hash del destino
+        bitacora.planificar(os.path.join(self.test_dir, "o2"), self._archivo("d2", b"2"), archivo="o2")
+        # 3) copia entre volúmenes completa pero sin borrar el origen
+        bitacora.planificar(self._archivo("o3", b"3"), self._archivo("d3", b"3"), archivo="o3")
+        # 4) copia a medias: se borra el destino parcial
+        bitacora.planificar(self._archivo("o4", b"4444"), os.path.join(self.test_dir, "d4"), archivo="o4")
+        self._archivo("d4", b"44")
+        # 5) movido pero sin registrar
+        id_5 = bitacora.planificar(os.path.join(self.test_dir, "o5"), self._archivo("d5", b"5"), archivo="o5")
+        bitacora.movido(id_5, "hash5")
+        # 6) ya registrado: no se toca
+        id_6 = bitacora.planificar("o6", "d6", archivo="o6")
+        bitacora.registrado(id_6)
+        bitacora.cerrar()
+
+        registrados = []
+        resultado = BitacoraMovimientos(self.ruta).recuperar(registrados.append)
+        self.assertEqual(sorted(e["archivo"] for e in resultado["rehechos"]), ["o2", "o3", "o5"])
+        self.assertEqual(sorted(e["archivo"] for e in resultado["revertidos"]), ["o1", "o4"])
+        self.assertEqual({e["archivo"]: e["hash"] for e in registrados}["o2"], hashlib.sha256(b"2").hexdigest())
+        self.assertEqual({e["archivo"]: e["hash"] for e in registrados}["o5"], "hash5")
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, "o3")))
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, "d4")))
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, "o4")))
+        self.assertEqual(BitacoraMovimientos(self.ruta).incompletas(), [])
+
+    def test_recuperacion_no_borra_un_destino_previo(self):
+        bitacora = BitacoraMovimientos(self.ruta)
+        origen = self._archivo("nuevo.pdf", b"nuevo")
+        destino = self._archivo("archivado.pdf", b"documento ya archivado")
+        bitacora.planificar(origen, destino, archivo="nuevo.pdf")
+        bitacora.cerrar()
+
+        registrados = []
+        resultado = BitacoraMovimientos(self.ruta).recuperar(registrados.append)
+        self.assertEqual([e["archivo"] for e in resultado["revertidos"]], ["nuevo.pdf"])
+        self.assertEqual(registrados, [])
+        with open(destino, "rb") as f:
+            self.assertEqual(f.read(), b"documento ya archivado")
+        self.assertTrue(os.path.exists(origen))
+
+class TestPipelineEtapas(unittest.TestCase):
+    def test_orden_y_etapa_ordenada(self):
+        vistos = []
+
+        def lento_si_par(n):
+            time.sleep(0.002 if n % 2 == 0 else 0)
+            return n
+
+        def anotar(n):
+            vistos.append(n)
+            return n * 10
+
+        pipeline = Pipeline([
+            Etapa("desordenar", lento_si_par, hilos=4),
+            Etapa("anotar", anotar, ordenada=True),
+            Etapa("final", lambda n: n + 1)
+        ])
+        self.assertEqual(pipeline.ejecutar(range(50)), [n * 10 + 1 for n in range(50)])
+        self.assertEqual(vistos, list(range(50)))
+        metricas = pipeline.metricas()
+        self.assertEqual([m["procesados"] for m in metricas.values()], [50, 50, 50, 50])
+
+    def test_colas_acotadas(self):
+        def lento(n):
+            time.sleep(0.001)
+            return n
+
+        pipeline = Pipeline([Etapa("rapida", lambda n: n, hilos=2), Etapa("lenta", lento)], capacidad=3)
+        self.assertEqual(len(pipeline.ejecutar(range(100))), 100)
+        self.assertLessEqual(max(m["max_en_cola"] for m in pipeline.metricas().values()), 3)
+
+    def test_error_en_una_etapa_se_relanza(self):
+        def fallar(n):
+            if n == 7:
+                raise ValueError("falla")
+            return n
+
+        pipeline = Pipeline([Etapa("fallar", fallar, hilos=2), Etapa("final", lambda n: n)], capacidad=2)
+        with self.assertRaises(ValueError):
+            pipeline.ejecutar(range(1000))
+
+class ServidorSMTPPrueba(socketserver.ThreadingTCPServer):
+    """SMTP mínimo en 127.0.0.1: guarda los mensajes y puede rechazar las primeras conexiones."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, rechazar=0):
+        super().__init__(("127.0.0.1", 0), ManejadorSMTPPrueba)
+        self.rechazar = rechazar
+        self.conexiones = 0
+        self.mensajes = []
+
+class ManejadorSMTPPrueba(socketserver.StreamRequestHandler):
+    def responder(self, linea):
+        self.wfile.write(linea.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.conexiones += 1
+        if self.server.conexiones <= self.server.rechazar:
+            self.responder("421 servicio no disponible")
+            return
+        self.responder("220 prueba")
+        while True:
+            linea = self.rfile.readline()
+            if not linea:
+                return
+            comando = linea[:4].upper()
+            if comando == b"DATA":
+                self.responder("354 fin con .")
+                datos = b""
+                for linea in iter(self.rfile.readline, b".\r\n"):
+                    datos += linea
+                self.server.mensajes.append(message_from_bytes(datos))
+                self.responder("250 recibido")
+            elif comando == b"QUIT":
+                self.responder("221 chau")
+                return
+            else:
+                self.responder("250 prueba")
+
+class TestDespachadorAlertas(unittest.TestCase):
+    def setUp(self):
+        self.servidores = []
+
+    def tearDown(self):
+        for servidor in self.servidores:
+            servidor.shutdown()
+            servidor.server_close()
+
+    def _despachador(self, rechazar=0, **opciones):
+        servidor = ServidorSMTPPrueba(rechazar)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        self.servidores.append(servidor)
+        opciones.setdefault("ventana_agrupado", 0.3)
+        return servidor, DespachadorAlertas("127.0.0.1", servidor.server_address[1], espera_inicial=0.01, **opciones)
+
+    def test_rafaga_se_agrupa_en_un_resumen(self):
+        servidor, despachador = self._despachador()
+        for i in range(5):
+            despachador.encolar(f"Archivo alterado: doc{i}.pdf", "soporte@empresa.com")
+        self.assertTrue(despachador.cerrar(5))
+        self.assertEqual(len(servidor.mensajes), 1)
+        cuerpo = servidor.mensajes[0].get_payload()
+        self.assertIn("(5 alertas)", servidor.mensajes[0]["Subject"])
+        self.assertTrue(all(f"doc{i}.pdf" in cuerpo for i in range(5)))
+
+    def test_conexion_reutilizada_entre_envios(self):
+        servidor, despachador = self._despachador(ventana_agrupado=0)
+        resultados = []
+        for i in range(3):
+            despachador.encolar(f"alerta {i}", "soporte@empresa.com",
+                                al_resultado=lambda alerta, error: resultados.append(error))
+            self.assertTrue(despachador.vaciar(5))
+        despachador.cerrar(5)
+        self.assertEqual(len(servidor.mensajes), 3)
+        self.assertEqual(resultados, [None, None, None])
+        self.assertEqual(servidor.conexiones, 1)
+
+    def test_reintentos_con_espera(self):
+        servidor, despachador = self._despachador(rechazar=2)
+        inicio = time.perf_counter()
+        despachador.encolar("alerta", "soporte@empresa.com")
+        self.assertLess(time.perf_counter() - inicio, 0.1)  # encolar no espera al SMTP
+        self.assertTrue(despachador.cerrar(5))
+        self.assertEqual(len(servidor.mensajes), 1)
+        self.assertEqual(despachador.estadisticas["reintentos"], 2)
+
+    def test_falla_definitiva_se_informa(self):
+        servidor, despachador = self._despachador(rechazar=10, reintentos=2)
+        resultados = []
+        despachador.encolar("alerta", "soporte@empresa.com",
+                            al_resultado=lambda alerta, error: resultados.append(error))
+        despachador.cerrar(5)
+        self.assertEqual(len(resultados), 1)
+        self.assertIsNotNone(resultados[0])
+        self.assertEqual(despachador.estadisticas["fallidas"], 1)
+
+class TestArranque(unittest.TestCase):
+    def test_importar_main_sin_dns_ni_modulos_pesados(self):
+        codigo = (
+            "import socket, sys\n"
+            "def sin_dns(*args):\n"
+            "    raise AssertionError('DNS al importar')\n"
+            "socket.gethostbyname = sin_dns\n"
+            "import main\n"
+            f"print(','.join(m for m in {MODULOS_PESADOS!r} if m in sys.modules))\n"
+        )
+        proceso = subprocess.run([sys.executable, "-c", codigo], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                 capture_output=True, text=True)
+        self.assertEqual(proceso.returncode, 0, proceso.stderr)
+        self.assertEqual(proceso.stdout.strip(), "")
+
+    def test_reporte_de_importacion(self):
+        reporte = medir_importacion("scripts.parser_nombres")
+        self.assertGreater(reporte["modulo_ms"], 0)
+        self.assertIn("re", [nombre for nombre, _, _ in reporte["directos"]])
+        self.assertEqual(reporte["pesados"], [])
+
+class TestGeneradorDocupen(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _contenido(self, carpeta):
+        return {nombre: calcular_sha256(os.path.join(carpeta, nombre)) for nombre in os.listdir(carpeta)}
+
+    def test_misma_semilla_mismo_lote(self):
+        a = os.path.join(self.test_dir, "a")
+        b = os.path.join(self.test_dir, "b")
+        manifiesto = generar_docupen(a, 300, semilla=7)
+        self.assertEqual(manifiesto, generar_docupen(b, 300, semilla=7))
+        self.assertEqual(self._contenido(a), self._contenido(b))
+        self.assertEqual(sum(manifiesto["variantes"].values()), 300)
+
+    def test_duplicados_y_variantes_de_nombre(self):
+        carpeta = os.path.join(self.test_dir, "docupen")
+        manifiesto = generar_docupen(carpeta, 400, semilla=3, proporcion_duplicados=0.25,
+                                     variantes={"canonico": 1, "invalido": 1})
+        hashes = self._contenido(carpeta)
+        self.assertEqual(len(hashes), 400)
+        self.assertEqual(len(hashes) - len(set(hashes.values())), manifiesto["duplicados"])
+        self.assertAlmostEqual(manifiesto["duplicados"] / 400, 0.25, delta=0.08)
+        sin_cuenta = [n for n in hashes if tokenizar(n).cuenta is None]
+        self.assertEqual(len(sin_cuenta), manifiesto["variantes"]["invalido"])
+
+    def test_comparar_contra_base(self):
+        base = {"escalas": {"1000": {"etapas": {"hash": 1.0, "resumen": 2.0}}}}
+        actual = {"escalas": {"1000": {"etapas": {"parseo": 0.1, "hash": 1.05, "movimiento": 1.0,
+                                                    "historial": 1.0, "resumen": 3.0, "inconsistencias": 0.1}}}}
+        regresiones = comparar(actual, base, tolerancia=0.15)
+        self.assertEqual([(escala, etapa) for escala, etapa, _ in regresiones], [("1000", "resumen")])
+
+class TestMetricasFlujo(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        metricas_flujo.reiniciar()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+        metricas_flujo.reiniciar()
+
+    def test_bytes_y_latencia_de_hash(self):
+        ruta = os.path.join(self.test_dir, "a.pdf")
+        with open(ruta, "wb") as f:
+            f.write(b"x" * 5000)
+        calcular_sha256(ruta)
+        calcular_sha256(ruta)
+        datos = metricas_flujo.instantanea()
+        self.assertEqual(datos["contadores"]["bytes_hasheados"], 10000)
+        self.assertEqual(datos["histogramas"]["hash"]["cantidad"], 2)
+
+    def test_histograma_y_etapas(self):
+        for segundos in (0.0005, 0.003, 0.003, 50):
+            metricas_flujo.observar("movimiento", segundos)
+        with metricas_flujo.medir("resumen"):
+            time.sleep(0.01)
+        datos = metricas_flujo.instantanea()
+        cubetas = datos["histogramas"]["movimiento"]["cubetas"]
+        self.assertEqual(cubetas[0], 1)
+        self.assertEqual(cubetas[metricas_flujo.LIMITES_LATENCIA.index(0.005)], 2)
+        self.assertEqual(cubetas[-1], 1)  # por encima del último límite: solo en +Inf
+        self.assertGreaterEqual(datos["etapas"]["resumen"], 0.01)
+
+    def test_exportar_json_y_prometheus(self):
+        metricas_flujo.sumar("archivos_vistos", 3)
+        metricas_flujo.observar("archivo", 0.02)
+        metricas_flujo.observar("archivo", 0.2)
+        metricas_flujo.registrar_pipeline({"mover": {"hilos": 2, "procesados": 3, "en_cola": 0,
+                                                     "max_en_cola": 1, "ocupado": 0.5, "por_segundo": 6.0}})
+        ruta_json = os.path.join(self.test_dir, "m", "metricas.json")
+        ruta_prom = os.path.join(self.test_dir, "m", "metricas.prom")
+        metricas_flujo.exportar(ruta_json, ruta_prom)
+
+        with open(ruta_json, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["contadores"]["archivos_vistos"], 3)
+        with open(ruta_prom, encoding="utf-8") as f:
+            lineas = f.read().splitlines()
+        self.assertIn("archivado_archivos_vistos 3", lineas)
+        self.assertIn('archivado_archivo_segundos_bucket{le="0.025"} 1', lineas)
+        self.assertIn('archivado_archivo_segundos_bucket{le="+Inf"} 2', lineas)
+        self.assertIn("archivado_archivo_segundos_count 2", lineas)
+        self.assertIn('archivado_pipeline_ocupado{etapa="mover"} 0.5', lineas)
+        self.assertEqual(sorted(os.listdir(os.path.dirname(ruta_json))), ["metricas.json", "metricas.prom"])
+
+class TestRegistroEventos(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        registro_eventos.detener_registro()
+        shutil.rmtree(self.test_dir)
+
+    def test_log_por_cola_se_escribe_al_detener(self):
+        ruta_log = os.path.join(self.test_dir, "logs", "archivado.log")
+        registro_eventos.configurar_registro("info", ruta_log=ruta_log, consola=False)
+        log = registro_eventos.obtener_logger("prueba")
+        log.debug("detalle por archivo")
+        for i in range(100):
+            log.info("📦 Movido: %s", i)
+        registro_eventos.detener_registro()
+        with open(ruta_log, encoding="utf-8") as f:
+            lineas = f.read().splitlines()
+        self.assertEqual(len(lineas), 100)
+        self.assertTrue(lineas[-1].endswith("archivado.prueba: 📦 Movido: 99"))
+
+    def test_log_auditoria_en_disco(self):
+        auditoria = LogAuditoria(os.path.join(self.test_dir, "auditoria"))
+        self.assertEqual(list(auditoria), [])
+        for i in range(500):
+            auditoria.append({"archivo": f"{i}.pdf", "estado": "Duplicado" if i % 5 == 0 else "Procesado"})
+        mitad = auditoria.posicion()
+        auditoria.append({"archivo": "ultimo.pdf", "estado": "Procesado"})
+        auditoria.cerrar()
+        auditoria.append({"archivo": "tras_cerrar.pdf", "estado": "Procesado"})
+
+        self.assertEqual(len(auditoria), 502)
+        self.assertEqual(auditoria.por_estado, {"Procesado": 402, "Duplicado": 100})
+        self.assertEqual(len(os.listdir(os.path.join(self.test_dir, "auditoria"))), 1)
+        self.assertEqual([e["archivo"] for e in auditoria.leer(mitad)], ["ultimo.pdf", "tras_cerrar.pdf"])
+        self.assertEqual(sum(1 for _ in auditoria), 502)
+        auditoria.cerrar()
+
+    def test_log_auditoria_escribe_cada_evento_sin_cerrar(self):
+        auditoria = LogAuditoria(os.path.join(self.test_dir, "auditoria"))
+        auditoria.append({"archivo": "a.pdf", "estado": "Procesado"})
+        auditoria.append({"archivo": "b.pdf", "estado": "Duplicado"})
+        with open(auditoria.ruta, encoding="utf-8") as f:
+            self.assertEqual([json.loads(l)["archivo"] for l in f], ["a.pdf", "b.pdf"])
+        auditoria.cerrar()
+
+class TestInconsistencias(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.ruta_estado = os.path.join(self.test_dir, "estado.json")
+        self.margen = inconsistencias.MARGEN_MTIME
+        inconsistencias.MARGEN_MTIME = 0
+        self.registros = []
+        for cuenta in range(3):
+            carpeta = os.path.join(self.test_dir, "Legajos", str(cuenta), "Pagos")
+            os.makedirs(carpeta)
+            for i in range(2):
+                ruta = os.path.join(carpeta, f"{cuenta}_{i}.pdf")
+                with open(ruta, "wb") as f:
+                    f.write(b"x")
+                self.registros.append((f"h{cuenta}{i}", ruta))
+
+    def tearDown(self):
+        inconsistencias.MARGEN_MTIME = self.margen
+        shutil.rmtree(self.test_dir)
+
+    def detectar(self, registros=None):
+        return inconsistencias.detectar_inconsistencias(registros or self.registros, self.ruta_estado, hilos=2)
+
+    def test_detecta_faltantes_y_carpeta_ausente(self):
+        os.remove(self.registros[1][1])
+        ausente = ("hz", os.path.join(self.test_dir, "Legajos", "9", "Pagos", "9_0.pdf"))
+        resultado = self.detectar(self.registros + [ausente])
+        self.assertEqual([i["hash"] for i in resultado], ["h01", "hz"])
+        self.assertEqual(resultado[0]["ruta_esperada"], self.registros[1][1])
+        self.assertEqual(resultado[0]["estado"], "Archivo no encontrado")
+        self.assertEqual(inconsistencias.estadisticas["ausentes"], 1)
+        self.assertEqual([r for r in self.registros if not os.path.exists(r[1])],
+                         [self.registros[1]])
+
+    def test_reutiliza_carpetas_sin_cambios(self):
+        os.remove(self.registros[0][1])
+        self.assertEqual(len(self.detectar()), 1)
+        self.assertEqual(inconsistencias.estadisticas["escaneadas"], 3)
+        self.assertEqual([i["hash"] for i in self.detectar()], ["h00"])
+        self.assertEqual(inconsistencias.estadisticas["reutilizadas"], 3)
+        self.assertEqual(inconsistencias.estadisticas["escaneadas"], 0)
+
+    def test_vuelve_a_listar_si_cambia_la_carpeta_o_lo_esperado(self):
+        self.detectar()
+        os.remove(self.registros[5][1])  # cambia el mtime de la carpeta 2
+        self.assertEqual([i["hash"] for i in self.detectar()], ["h21"])
+        self.assertEqual(inconsistencias.estadisticas["escaneadas"], 1)
+
+        nuevo = ("h02", os.path.join(os.path.dirname(self.registros[0][1]), "0_2.pdf"))
+        self.assertEqual([i["hash"] for i in self.detectar(self.registros + [nuevo])], ["h02", "h21"])
+        self.assertEqual(inconsistencias.estadisticas["escaneadas"], 1)
+
+    def test_margen_de_mtime_no_reutiliza(self):
+        inconsistencias.MARGEN_MTIME = 10**18
+        self.detectar()
+        self.detectar()
+        self.assertEqual(inconsistencias.estadisticas["reutilizadas"], 0)
+
+class TestVerificarResultados(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.base = os.path.join(self.test_dir, "Archivados")
+        for cuenta in ("1001", "1002"):
+            for categoria, archivos in (("Pagos", 3), ("Constancias", 1)):
+                carpeta = os.path.join(self.base, cuenta, categoria)
+                os.makedirs(carpeta)
+                for i in range(archivos):
+                    open(os.path.join(carpeta, f"{i}.pdf"), "wb").close()
+        open(os.path.join(self.base, "suelto.txt"), "wb").close()
+        self.base_path = verificar_resultados.BASE_PATH
+        self.log_path = verificar_resultados.LOG_PATH
+        verificar_resultados.BASE_PATH = self.base
+
+    def tearDown(self):
+        verificar_resultados.BASE_PATH = self.base_path
+        verificar_resultados.LOG_PATH = self.log_path
+        shutil.rmtree(self.test_dir)
+
+    def test_arbol_en_una_pasada(self):
+        arbol = verificar_resultados.escanear_arbol(self.base, hilos=2)
+        self.assertEqual(arbol, {"1001": {"Pagos": 3, "Constancias": 1},
+                                 "1002": {"Pagos": 3, "Constancias": 1}})
+        self.assertEqual(verificar_resultados.escanear_arbol(os.path.join(self.test_dir, "no_existe")), {})
+
+    def test_chequeos_desde_el_arbol(self):
+        arbol = verificar_resultados.escanear_arbol(self.base)
+        with redirect_stdout(io.StringIO()):
+            verificar_resultados.verificar_estructura(["1001", "1002"], {"Pagos", "Constancias"}, arbol)
+            self.assertEqual(verificar_resultados.verificar_archivos_movidos(
+                ["1001", "1002", "9999"], {"Pagos", "Constancias", "Otros"}, arbol), 8)
+            with self.assertRaisesRegex(AssertionError, "Falta subcarpeta: Otros en cuenta 1001"):
+                verificar_resultados.verificar_estructura(["1001"], {"Otros"}, arbol)
+            with self.assertRaisesRegex(AssertionError, "Carpeta de cuenta no encontrada: 9999"):
+                verificar_resultados.verificar_estructura(["9999"], {"Pagos"}, arbol)
+
+    def test_log_leido_por_lineas(self):
+        verificar_resultados.LOG_PATH = os.path.join(self.test_dir, "registro.log")
+        with open(verificar_resultados.LOG_PATH, "w", encoding="utf-8") as f:
+            f.write("otra línea\n" * 1000 + "2025-01-01 - INFO - Inicio del flujo principal\n")
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(verificar_resultados.verificar_log())
+            with open(verificar_resultados.LOG_PATH, "w", encoding="utf-8") as f:
+                f.write("sin marca\n")
+            self.assertFalse(verificar_resultados.verificar_log())
+
+class TestIndiceMerkle(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.base = os.path.join(self.test_dir, "Legajos")
+        self.documentos = {}
+        for ruta, contenido in (("1001/01. CAC/SIN SUBROL/2024/a.pdf", b"a"),
+                                ("1001/01. CAC/SIN SUBROL/2025/b.pdf", b"b"),
+                                ("1002/07. DNI/TITULAR/2023/c.pdf", b"c"),
+                                ("Docupen/pendiente.pdf", b"p")):
+            self.documentos[ruta] = self.escribir(ruta, contenido)
+        self.indice = IndiceMerkle(self.base, excluir=["Docupen"])
+        for ruta, h in self.documentos.items():
+            if not ruta.startswith("Docupen"):
+                self.indice.agregar(os.path.join(self.base, ruta), h)
+
+    def tearDown(self):
+        self.indice.cerrar()
+        shutil.rmtree(self.test_dir)
+
+    def escribir(self, ruta, contenido):
+        completa = os.path.join(self.base, ruta)
+        os.makedirs(os.path.dirname(completa), exist_ok=True)
+        with open(completa, "wb") as f:
+            f.write(contenido)
+        return hashlib.sha256(contenido).hexdigest()
+
+    def test_incremental_igual_a_reconstruir(self):
+        completo = IndiceMerkle(self.base, os.path.join(self.test_dir, "completo.db"), excluir=["Docupen"])
+        self.assertEqual(completo.construir(hilos=2), 3)
+        self.assertEqual(completo.raiz(), self.indice.raiz())
+        self.assertEqual(sorted(self.indice.hijos()), ["1001", "1002"])
+        self.assertIsNotNone(self.indice.hash_de("1001/01. CAC/SIN SUBROL/2024"))
+        completo.cerrar()
+        self.assertIn("_indice_integridad.db", os.listdir(self.base))
+
+    def test_verificar_solo_una_cuenta(self):
+        self.assertTrue(self.indice.verificar("1001", hilos=2)["intacto"])
+        self.escribir("1002/07. DNI/TITULAR/2023/c.pdf", b"alterado")
+        self.escribir("1002/07. DNI/TITULAR/2023/d.pdf", b"d")
+        self.assertTrue(self.indice.verificar("1001", hilos=2)["intacto"])
+        resultado = self.indice.verificar("1002", hilos=2)
+        self.assertFalse(resultado["intacto"])
+        self.assertEqual(resultado["diferencias"], [("1002/07. DNI/TITULAR/2023/c.pdf", "modificado"),
+                                                    ("1002/07. DNI/TITULAR/2023/d.pdf", "agregado")])
+        self.assertFalse(self.indice.verificar(hilos=2)["intacto"])
+
+    def test_comparar_instantaneas(self):
+        antes = self.indice.instantanea(os.path.join(self.test_dir, "antes.db"))
+        raiz = self.indice.raiz()
+        self.indice.agregar(os.path.join(self.base, "1003/01. CAC/SIN SUBROL/2025/e.pdf"), "e" * 64)
+        self.indice.quitar(os.path.join(self.base, "1002/07. DNI/TITULAR/2023/c.pdf"))
+        self.assertNotEqual(self.indice.raiz(), raiz)
+        self.assertIsNone(self.indice.hash_de("1002"))
+        self.assertEqual(antes.comparar(self.indice), [("1002/07. DNI/TITULAR/2023/c.pdf", "eliminado"),
+                                                       ("1003/01. CAC/SIN SUBROL/2025/e.pdf", "agregado")])
+        self.assertEqual(antes.comparar(antes), [])
+        antes.cerrar()
+        with self.assertRaises(ValueError):
+            self.indice.agregar(os.path.join(self.test_dir, "afuera.pdf"), "f" * 64)
+
+class TestFlujoPrincipal(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        self.salida = os.path.join(self.test_dir, "Legajos")
+        self.entrada = os.path.join(self.salida, "Docupen")
+        for carpeta in ("config", "logs", "scripts", self.entrada):
+            os.makedirs(os.path.join(self.test_dir, carpeta))
+        with open(os.path.join(self.test_dir, "config", "config.ini"), "w", encoding="utf-8") as f:
+            f.write(f"""[RUTAS]
+directorio_base = {self.test_dir}
+estructura_json = {os.path.join(self.test_dir, "config", "estructura_carpetas.json")}
+log_path = {os.path.join(self.test_dir, "logs", "registro.log")}
+[ARCHIVO]
+carpeta_origen = {self.entrada}
+tipo_cliente = juridico, fisico
+[SEGURIDAD]
+validar_hash = True
+[EMAIL]
+activar_alertas = False
+destinatario = test@correo.com
+[GENERAL]
+modo_ejecucion = prueba
+log_nivel = error
+""")
+        os.chdir(self.test_dir)
+
+        self.originales = {nombre: getattr(archivado_auditable, nombre) for nombre in (
+            "RUTA_ENTRADA", "RUTA_SALIDA", "bitacora_movimientos", "log_auditoria", "indice_integridad")}
+        estado = {
+            "RUTA_ENTRADA": self.entrada,
+            "RUTA_SALIDA": self.salida,
+            "bitacora_movimientos": BitacoraMovimientos("scripts/movimientos_auditable.jsonl"),
+            "log_auditoria": LogAuditoria("logs/auditoria"),
+            "indice_integridad": IndiceMerkle(self.salida, excluir=["Docupen"])
+        }
+        for nombre, valor in estado.items():
+            setattr(archivado_auditable, nombre, valor)
+        main.RUTA_ENTRADA = self.entrada
+        main.log_auditoria = estado["log_auditoria"]
+        main.indice_integridad = estado["indice_integridad"]
+        archivado_auditable.hashes_existentes.clear()
+        cache_hash._cache = None
+        cache_directorios._conocidos.clear()
+        cache_directorios._escaneados.clear()
+
+    def tearDown(self):
+        registro_eventos.detener_registro()
+        archivado_auditable.log_auditoria.cerrar()
+        archivado_auditable.bitacora_movimientos.cerrar()
+        archivado_auditable.indice_integridad.cerrar()
+        for nombre, valor in self.originales.items():
+            setattr(archivado_auditable, nombre, valor)
+        main.RUTA_ENTRADA = self.originales["RUTA_ENTRADA"]
+        main.log_auditoria = self.originales["log_auditoria"]
+        main.indice_integridad = self.originales["indice_integridad"]
+        archivado_auditable.hashes_existentes.clear()
+        cache_hash._cache = None
+        cache_directorios._conocidos.clear()
+        cache_directorios._escaneados.clear()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_historial_y_resumen_tras_archivar(self):
+        with open(os.path.join(self.entrada, "01. 14959 CAC 13-03-2025.pdf"), "wb") as f:
+            f.write(b"documento")
+        with redirect_stdout(io.StringIO()):
+            main.ejecutar_flujo_principal()
+
+        historial = list(leer_entradas("scripts/historial_archivo.json"))
+        self.assertEqual([(e["evento"], e["archivo"], e["cuenta"]) for e in historial],
+                         [("Archivo archivado", "01. 14959 CAC 13-03-2025.pdf", "14959")])
+        self.assertTrue(os.path.exists(historial[0]["destino"]))
+        self.assertTrue(os.path.exists(main.RUTA_RESUMEN))
+        self.assertEqual(archivado_auditable.procesar_archivos(), [])
+
+    def test_modo_vigilancia_publica_cada_tanda(self):
+        def una_tanda(carpeta, al_estabilizarse, *args, al_quedar_inactivo=None, **kwargs):
+            for nombre in sorted(os.listdir(carpeta)):
+                al_estabilizarse(os.path.join(carpeta, nombre))
+            al_quedar_inactivo()
+            raise KeyboardInterrupt
+
+        with open(os.path.join(self.entrada, "01. 14959 CAC 13-03-2025.pdf"), "wb") as f:
+            f.write(b"documento")
+        original = modo_vigilancia.vigilar
+        modo_vigilancia.vigilar = una_tanda
+        try:
+            with redirect_stdout(io.StringIO()):
+                main.ejecutar_modo_vigilancia()
+        finally:
+            modo_vigilancia.vigilar = original
+
+        historial = list(leer_entradas("scripts/historial_archivo.json"))
+        self.assertEqual([(e["evento"], e["archivo"]) for e in historial],
+                         [("Archivo archivado", "01. 14959 CAC 13-03-2025.pdf")])
+        self.assertTrue(os.path.exists(main.RUTA_RESUMEN))
+
+    def test_metricas_exportadas_aunque_falle(self):
+        def falla():
+            raise OSError("rename falló")
+
+        original = main.procesar_archivos
+        main.procesar_archivos = falla
+        try:
+            with redirect_stdout(io.StringIO()), self.assertRaises(OSError):
+                main.ejecutar_flujo_principal()
+        finally:
+            main.procesar_archivos = original
+        with open("logs/metricas_flujo.json", encoding="utf-8") as f:
+            datos = json.load(f)
+        self.assertEqual(datos["contadores"]["ejecucion_fallida"], 1)
+        self.assertIn("archivado", datos["etapas"])
+        with open("logs/metricas_flujo.prom", encoding="utf-8") as f:
+            self.assertIn("archivado_ejecucion_fallida 1", f.read())
+
+    def test_indice_incluye_el_archivo_previo(self):
+        previo = os.path.join(self.salida, "14959", "01. CAC", "SIN SUBROL", "2024", "previo.pdf")
+        os.makedirs(os.path.dirname(previo))
+        with open(previo, "wb") as f:
+            f.write(b"archivado antes del indice")
+        with open(os.path.join(self.entrada, "01. 14959 CAC 13-03-2025.pdf"), "wb") as f:
+            f.write(b"documento")
+        with redirect_stdout(io.StringIO()):
+            main.ejecutar_flujo_principal()
+
+        indice = archivado_auditable.indice_integridad
+        resultado = indice.verificar("14959", hilos=2)
+        self.assertTrue(resultado["intacto"], resultado["diferencias"])
+        self.assertIn("14959/01. CAC/SIN SUBROL/2024/previo.pdf", indice.archivos_bajo("14959"))
+        self.assertIsNone(indice.construir_si_falta())
+
+if __name__ == "__main__":
+    unittest.main()